@@ -0,0 +1,79 @@
+import asyncio
+from time import time
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from api.schemas.request_models import JobRequest
+from api.schemas.response_models import JobResponse, PickingResponse
+from api.routes.picking import picking_service
+from services.job_service import Job, JobScheduler, FINISHED
+from config.settings import Settings
+
+router = APIRouter(prefix='/picking/jobs')
+
+def run_picking_job(job: Job) -> PickingResponse:
+    config = dict(job.config)
+    if job.deadline is not None and 'latency_target' not in config:
+        config['latency_target'] = max(job.deadline - time(), 0.05)
+
+    picking_solution = picking_service.optimize(job.product_list, **config)
+    return PickingResponse(
+        paths=picking_solution.paths,
+        summaries=picking_solution.summaries,
+        portfolio_config=picking_solution.portfolio_config
+    )
+
+scheduler = JobScheduler(run_picking_job, max_workers=Settings.job_workers, max_queue=Settings.job_queue_depth)
+
+def job_response(job: Job, deduplicated: bool = False) -> JobResponse:
+    return JobResponse(
+        job_id=job.id,
+        status=job.status,
+        deduplicated=deduplicated,
+        queue_position=scheduler.queue_position(job.id),
+        result=job.result,
+        error=job.error
+    )
+
+def get_job_or_404(job_id: str) -> Job:
+    job = scheduler.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f'Unknown job: {job_id}')
+    return job
+
+@router.post(
+    '',
+    response_model=JobResponse,
+    status_code=202,
+    responses={503: {'description': 'The job queue is full, retry after the Retry-After header'}}
+)
+async def submit_job(request: JobRequest) -> JobResponse:
+    # A full queue raises Overloaded, answered with 503 and Retry-After by the app handler
+    job, deduplicated = scheduler.submit(
+        request.product_list,
+        request.config,
+        priority=request.priority,
+        deadline=request.deadline
+    )
+    return job_response(job, deduplicated)
+
+@router.get('/{job_id}', response_model=JobResponse)
+async def get_job(job_id: str) -> JobResponse:
+    return job_response(get_job_or_404(job_id))
+
+@router.get('/{job_id}/stream')
+async def stream_job(job_id: str) -> StreamingResponse:
+    '''Server-sent events with the job state, one per status change, until it is finished.'''
+    job = get_job_or_404(job_id)
+
+    async def events():
+        status = None
+        while True:
+            if job.status != status:
+                status = job.status
+                yield f'event: {status}\ndata: {job_response(job).model_dump_json()}\n\n'
+
+            if status in FINISHED:
+                return
+            await asyncio.sleep(0.2)
+
+    return StreamingResponse(events(), media_type='text/event-stream')
@@ -1,26 +1,68 @@
 from fastapi import APIRouter
-from api.schemas.request_models import PickingRequest, LatestOrderConfig
-from api.schemas.response_models import PickingResponse
+from api.schemas.request_models import PickingRequest, LatestOrderConfig, WaveRequest
+from api.schemas.response_models import PickingResponse, BatchResponse, WaveResponse, WaveBatchResponse
 from services.picking_service import PickingService
+from services.admission_control import AdmissionController
 from config.settings import Config, Settings
 
 router = APIRouter(prefix='/picking')
 picking_service = PickingService(is_testing=Settings.is_testing)
+admission = AdmissionController(Settings.picking_workers, Settings.picking_queue_depth)
 
 @router.post('/optimize', response_model=PickingResponse)
 async def optimize_picking(request: PickingRequest) -> PickingResponse:
-    picking_solution = picking_service.optimize(
+    picking_solution = await admission.run(
+        picking_service.optimize,
         request.product_list,
         **request.config
     )
 
     return PickingResponse(
         paths=picking_solution.paths,
-        summaries=picking_solution.summaries   
+        summaries=picking_solution.summaries,
+        portfolio_config=picking_solution.portfolio_config
     )
 
-@router.post('/latest-order', response_model=PickingResponse)
-async def compute_latest_route(request: LatestOrderConfig = LatestOrderConfig()) -> PickingResponse:
+@router.post('/optimize-batch', response_model=BatchResponse)
+async def optimize_batch(requests: list[PickingRequest]) -> BatchResponse:
+    batch_solution = await admission.run(
+        picking_service.optimize_batch,
+        [request.product_list for request in requests],
+        [request.config for request in requests]
+    )
+
+    return BatchResponse(
+        results=[
+            PickingResponse(
+                paths=picking_solution.paths,
+                summaries=picking_solution.summaries
+            )
+            for picking_solution in batch_solution.solutions
+        ]
+    )
+
+@router.post('/optimize-wave', response_model=WaveResponse)
+async def optimize_wave(request: WaveRequest) -> WaveResponse:
+    wave_solution = await admission.run(
+        picking_service.optimize_wave,
+        request.orders,
+        **request.config
+    )
+
+    return WaveResponse(
+        batches=[
+            WaveBatchResponse(
+                order_ids=batch.order_ids,
+                paths=batch.solution.paths,
+                summaries=batch.solution.summaries,
+                order_summaries=batch.order_summaries
+            )
+            for batch in wave_solution.batches
+        ]
+    )
+
+def get_scheduled_outbounds() -> list[tuple[str, str, int]]:
+    '''Scheduled outbound lines as (outbound uuid, product id, quantity) tuples.'''
     cursor = Config.postgres_conn.cursor()
     query = '''
     SELECT DISTINCT sop.sku
@@ -32,21 +74,35 @@ async def compute_latest_route(request: LatestOrderConfig = LatestOrderConfig())
     map_products = {product[0]: f'Product_{i}' for i, product in enumerate(distinct_products, 1)}
     
     query = '''
-    SELECT sop.sku, sop.cantidad
+    SELECT so.uuid_outbound, sop.sku, sop.cantidad
     FROM wms.scheduled_outbounds so
     JOIN wms.scheduled_outbounds_products sop ON so.uuid_outbound = sop.uuid_outbound;
     '''
     cursor.execute(query)
     picking_order = cursor.fetchall()
     cursor.close()
-    
-    product_list = {map_products[product]: quantity for product, quantity in picking_order}
-    picking_solution = picking_service.optimize(
-        product_list,
-        **request.config
-    )
+
+    return [(str(outbound), map_products[product], quantity) for outbound, product, quantity in picking_order]
+
+@router.post('/latest-order', response_model=PickingResponse)
+async def compute_latest_route(request: LatestOrderConfig = LatestOrderConfig()) -> PickingResponse:
+    def solve_latest_order():
+        product_list = {product: quantity for _, product, quantity in get_scheduled_outbounds()}
+        return picking_service.optimize(product_list, **request.config)
+
+    picking_solution = await admission.run(solve_latest_order)
 
     return PickingResponse(
         paths=picking_solution.paths,
-        summaries=picking_solution.summaries   
-    )
\ No newline at end of file
+        summaries=picking_solution.summaries,
+        portfolio_config=picking_solution.portfolio_config
+    )
+
+@router.post('/latest-wave', response_model=WaveResponse)
+async def compute_latest_wave(request: LatestOrderConfig = LatestOrderConfig()) -> WaveResponse:
+    orders = dict()
+    for outbound, product, quantity in await admission.run(get_scheduled_outbounds):
+        orders.setdefault(outbound, dict())
+        orders[outbound][product] = orders[outbound].get(product, 0) + quantity
+
+    return await optimize_wave(WaveRequest(orders=orders, config=request.config))
\ No newline at end of file
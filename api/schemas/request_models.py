@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Optional
 from pydantic import BaseModel, Field, field_validator
 
 class PickingRequest(BaseModel):
@@ -22,4 +22,33 @@ class LatestOrderConfig(BaseModel):
     config: dict[str, Any] = Field(
         default_factory=dict,
         description='Additional configuration parameters for the optimize method'
+    )
+
+class WaveRequest(BaseModel):
+    orders: dict[str, dict[str, int]] = Field(
+        ...,
+        description='Dictionary of ORDER:product list pairs'
+    )
+
+    config: dict[str, Any] = Field(
+        default_factory=dict,
+        description='Additional configuration parameters for the optimize_wave method'
+    )
+
+    @field_validator('orders')
+    def validate_quantities(cls, v):
+        if not all(isinstance(qty, int) and qty > 0 for product_list in v.values() for qty in product_list.values()):
+            raise ValueError('All quantities must be positive integers')
+        return v
+
+class JobRequest(PickingRequest):
+    priority: int = Field(
+        default=0,
+        description='Jobs with higher priority are started first'
+    )
+
+    deadline: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description='Seconds from submission after which the job is dropped if it has not started'
     )
\ No newline at end of file
@@ -1,5 +1,27 @@
+from typing import Optional
 from pydantic import BaseModel, Field
 
 class PickingResponse(BaseModel):
     paths: list[list[dict]]
-    summaries: list[list[dict[str, str | int]]]
\ No newline at end of file
+    summaries: list[list[dict[str, str | int]]]
+    portfolio_config: Optional[tuple[str, str]] = None
+
+class WaveBatchResponse(BaseModel):
+    order_ids: list[str]
+    paths: list[list[dict]]
+    summaries: list[list[dict[str, str | int]]]
+    order_summaries: dict[str, list[dict[str, str | int]]]
+
+class WaveResponse(BaseModel):
+    batches: list[WaveBatchResponse]
+
+class BatchResponse(BaseModel):
+    results: list[PickingResponse]
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    deduplicated: bool = False
+    queue_position: Optional[int] = None
+    result: Optional[PickingResponse] = None
+    error: Optional[str] = None
\ No newline at end of file
@@ -1,5 +1,7 @@
-from fastapi import FastAPI
-from api.routes import picking
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from api.routes import picking, jobs
+from services.admission_control import Overloaded
 
 def create_app() -> FastAPI:
     app = FastAPI(
@@ -9,5 +11,14 @@ def create_app() -> FastAPI:
     )
     
     app.include_router(picking.router, tags=['Picking'])
+    app.include_router(jobs.router, tags=['Jobs'])
+
+    @app.exception_handler(Overloaded)
+    async def overloaded_handler(request: Request, exc: Overloaded) -> JSONResponse:
+        return JSONResponse(
+            status_code=503,
+            content={'detail': str(exc)},
+            headers={'Retry-After': str(exc.retry_after)}
+        )
     
     return app
\ No newline at end of file
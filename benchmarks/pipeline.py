@@ -0,0 +1,284 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tracemalloc
+import numpy as np
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Optional
+from data.synthetic import SyntheticWarehouse, generate_warehouse
+from logic.layout_model import LayoutModel
+from logic.inventory_index import InventoryIndex
+from services.picking_service import PickingService
+
+STAGES = ('location_search', 'distance_matrix', 'tour_optimization', 'path_finding', 'summary_generation')
+PERCENTILES = (50, 90, 99)
+
+SIZES = (100, 1000, 10000)
+PICK_LIST_SIZES = (5, 20, 50)
+NUM_ROUTES = (1, 2)
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'pipeline.json')
+
+
+@dataclass
+class Scenario:
+    n_locations: int
+    n_lines: int
+    num_routes: int
+
+    @property
+    def name(self) -> str:
+        return f'{self.n_locations}-locations/{self.n_lines}-lines/{self.num_routes}-routes'
+
+
+def max_rss_mb() -> float:
+    # Kilobytes on Linux, bytes on macOS
+    scale = 2 ** 20 if sys.platform == 'darwin' else 2 ** 10
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    return {f'p{q}': float(np.percentile(samples, q)) for q in PERCENTILES}
+
+def run_scenario(
+        warehouse: SyntheticWarehouse,
+        layout: LayoutModel,
+        inventory: InventoryIndex,
+        scenario: Scenario,
+        runs: int,
+        solver: str = 'ortools',
+        solver_params: Optional[dict] = None,
+        allocation: str = 'greedy'
+    ) -> dict:
+    '''
+    Time every stage of the picking pipeline over a stream of orders of the same size.
+
+    The orders are solved once more with tracemalloc on to measure the peak memory, so the
+    tracing overhead does not show in the timings.
+
+    Args:
+        warehouse: Synthetic warehouse the orders are drawn from
+        layout: Layout snapshot of the warehouse
+        inventory: Inventory snapshot of the warehouse
+        scenario: Pick list size and number of routes
+        runs: Number of orders timed
+        solver: Name of the routing engine (default: 'ortools')
+        solver_params: Extra keyword arguments for the routing engine (default: None)
+        allocation: How storages are chosen for each product (default: 'greedy')
+
+    Returns:
+        Dictionary with the percentiles of every stage and of the total, the peak Python
+        memory in MB, the process maximum resident set size so far (which includes the
+        solver's native memory) and the mean travel distance
+    '''
+    orders = [order.product_list for order in warehouse.orders(runs, lines=scenario.n_lines)]
+    solver_params = solver_params or dict()
+
+    def solve(product_list: dict[str, int]) -> dict[str, float]:
+        return PickingService._solve_test(
+            layout, inventory, product_list, 'start', 'dest1',
+            scenario.num_routes, solver, solver_params, allocation, False
+        ).performance_metrics
+
+    samples = {stage: list() for stage in STAGES}
+    totals, distances = list(), list()
+    for product_list in orders:
+        metrics = solve(product_list)
+        for stage in STAGES:
+            samples[stage].append(metrics[stage])
+        totals.append(sum(metrics[stage] for stage in STAGES))
+        distances.append(metrics['travel_distance'])
+
+    tracemalloc.start()
+    for product_list in orders[:max(1, runs // 5)]:
+        solve(product_list)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'runs': runs,
+        'stages': {stage: percentiles(samples[stage]) for stage in STAGES},
+        'total': percentiles(totals),
+        'peak_memory_mb': peak / 2 ** 20,
+        'max_rss_mb': max_rss_mb(),
+        'travel_distance': float(np.mean(distances))
+    }
+
+def run_suite(
+        sizes: tuple[int, ...] = SIZES,
+        pick_list_sizes: tuple[int, ...] = PICK_LIST_SIZES,
+        num_routes: tuple[int, ...] = NUM_ROUTES,
+        runs: int = 20,
+        seed: int = 0,
+        solver_params: Optional[dict] = None
+    ) -> dict:
+    '''
+    Benchmark the picking pipeline on synthetic warehouses, without a database.
+
+    Every size gets a warehouse from generate_warehouse, and its layout and inventory
+    snapshots stand in for the graph. The time and peak memory of building them are reported
+    under `setup`, every pick list size and number of routes under `scenarios`.
+
+    Returns:
+        Report with the `environment`, `setup` and `scenarios` sections
+    '''
+    report = {
+        'environment': {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'runs': runs,
+            'seed': seed,
+            'solver_params': solver_params or dict()
+        },
+        'setup': dict(),
+        'scenarios': dict()
+    }
+
+    for n_locations in sizes:
+        tracemalloc.start()
+        started = perf_counter()
+        warehouse = generate_warehouse(n_locations, seed=seed)
+        layout, inventory = warehouse.layout_model(), warehouse.inventory_index()
+        duration = perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        report['setup'][str(n_locations)] = {
+            'storages': len(warehouse.stock),
+            'seconds': duration,
+            'peak_memory_mb': peak / 2 ** 20
+        }
+
+        for n_lines in pick_list_sizes:
+            for routes in num_routes:
+                scenario = Scenario(n_locations, n_lines, routes)
+                report['scenarios'][scenario.name] = run_scenario(
+                    warehouse, layout, inventory, scenario, runs, solver_params=solver_params
+                )
+
+    return report
+
+def compare(
+        report: dict,
+        baseline: dict,
+        tolerance: float = 0.25,
+        min_seconds: float = 0.002,
+        min_megabytes: float = 0.5
+    ) -> list[str]:
+    '''
+    Setups, stages, totals and peak memories of the report that got worse than the baseline.
+
+    Args:
+        report: Report from run_suite
+        baseline: Earlier report to compare to
+        tolerance: Relative slowdown or memory growth allowed (default: 0.25)
+        min_seconds: Absolute slowdown ignored as noise (default: 0.002)
+        min_megabytes: Absolute memory growth ignored as noise (default: 0.5)
+
+    Returns:
+        One message per regression, empty if there are none
+    '''
+    regressions = list()
+
+    for n_locations, setup in report['setup'].items():
+        reference = baseline['setup'].get(n_locations)
+        if reference is None:
+            continue
+
+        if (
+            setup['seconds'] > reference['seconds'] * (1 + tolerance) and
+            setup['seconds'] - reference['seconds'] > min_seconds
+        ):
+            regressions.append(
+                f'{n_locations} locations setup: {reference["seconds"]:.4f} s -> {setup["seconds"]:.4f} s'
+            )
+        if (
+            setup['peak_memory_mb'] > reference['peak_memory_mb'] * (1 + tolerance) and
+            setup['peak_memory_mb'] - reference['peak_memory_mb'] > min_megabytes
+        ):
+            regressions.append(
+                f'{n_locations} locations setup memory: '
+                f'{reference["peak_memory_mb"]:.1f} MB -> {setup["peak_memory_mb"]:.1f} MB'
+            )
+
+    for name, result in report['scenarios'].items():
+        reference = baseline['scenarios'].get(name)
+        if reference is None:
+            continue
+
+        timings = [(stage, result['stages'][stage], reference['stages'].get(stage, {})) for stage in STAGES]
+        timings.append(('total', result['total'], reference['total']))
+
+        for stage, values, reference_values in timings:
+            for percentile, value in values.items():
+                expected = reference_values.get(percentile)
+                if expected is not None and value > expected * (1 + tolerance) and value - expected > min_seconds:
+                    regressions.append(f'{name} {stage} {percentile}: {expected:.4f} s -> {value:.4f} s')
+
+        expected, value = reference['peak_memory_mb'], result['peak_memory_mb']
+        if value > expected * (1 + tolerance) and value - expected > min_megabytes:
+            regressions.append(f'{name} peak memory: {expected:.1f} MB -> {value:.1f} MB')
+
+    return regressions
+
+def print_report(report: dict) -> None:
+    for n_locations, setup in report['setup'].items():
+        print(
+            f'{n_locations} locations: {setup["storages"]} storages built in {setup["seconds"]:.2f} s, '
+            f'{setup["peak_memory_mb"]:.1f} MB'
+        )
+
+    print(f'\n{"scenario":<36}{"stage":<20}' + ''.join(f'{f"p{q}":>10}' for q in PERCENTILES) + f'{"MB":>8}')
+    for name, result in report['scenarios'].items():
+        rows = [(stage, result['stages'][stage]) for stage in STAGES] + [('total', result['total'])]
+        for stage, values in rows:
+            memory = f'{result["peak_memory_mb"]:>8.2f}' if stage == 'total' else ''
+            print(f'{name:<36}{stage:<20}' + ''.join(f'{values[f"p{q}"]:>10.4f}' for q in PERCENTILES) + memory)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Offline benchmark of the picking pipeline')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='Warehouse sizes in locations')
+    parser.add_argument('--lines', type=int, nargs='+', default=PICK_LIST_SIZES, help='Pick list sizes')
+    parser.add_argument('--routes', type=int, nargs='+', default=NUM_ROUTES, help='Numbers of routes')
+    parser.add_argument('--runs', type=int, default=20, help='Orders timed per scenario')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the warehouses and orders')
+    parser.add_argument('--latency-target', type=float, default=0.2, help='Solver latency target in seconds')
+    parser.add_argument('--baseline', default=BASELINE, help='Baseline report to compare to')
+    parser.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Relative regression allowed')
+    parser.add_argument('--output', help='Write the report as JSON')
+    arguments = parser.parse_args()
+
+    report = run_suite(
+        tuple(arguments.sizes),
+        tuple(arguments.lines),
+        tuple(arguments.routes),
+        arguments.runs,
+        arguments.seed,
+        {'latency_target': arguments.latency_target}
+    )
+    print_report(report)
+
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if arguments.save_baseline:
+        os.makedirs(os.path.dirname(arguments.baseline), exist_ok=True)
+        with open(arguments.baseline, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f'\nBaseline stored in {arguments.baseline}')
+    elif os.path.exists(arguments.baseline):
+        with open(arguments.baseline) as file:
+            regressions = compare(report, json.load(file), arguments.tolerance)
+
+        print('\nRegressions against the baseline:' if regressions else '\nNo regressions against the baseline')
+        for regression in regressions:
+            print(f'  {regression}')
+
+        sys.exit(1 if regressions else 0)
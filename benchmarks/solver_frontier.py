@@ -0,0 +1,276 @@
+import argparse
+import json
+import numpy as np
+from dataclasses import dataclass, field, asdict
+from time import time
+from typing import Optional
+from data.synthetic import generate_warehouse
+from logic.allocation import allocate_stock
+from logic.routing_operations import get_distance_matrix, run_solver
+from logic.solver_budget import SolverBudget
+
+STOP_COUNTS = (5, 10, 20, 40, 80)
+FIRST_SOLUTION_STRATEGIES = ('PATH_CHEAPEST_ARC', 'SAVINGS', 'PARALLEL_CHEAPEST_INSERTION')
+METAHEURISTICS = ('GUIDED_LOCAL_SEARCH', 'SIMULATED_ANNEALING', 'TABU_SEARCH')
+CHECKPOINTS = (0.05, 0.1, 0.25, 0.5, 1, 2)
+
+
+@dataclass
+class Problem:
+    '''
+    A routing problem of the corpus, with distances truncated to integers as OR-Tools sees
+    them, so every engine is scored on the same matrix.
+    '''
+    name: str
+    stops: int
+    distance_matrix: list[list[int]]
+    start_index: int
+    dest_index: int
+
+
+@dataclass
+class SolverConfig:
+    name: str
+    solver: str
+    params: dict = field(default_factory=dict)
+
+
+def build_corpus(
+        stop_counts: tuple[int, ...] = STOP_COUNTS,
+        per_size: int = 3,
+        n_locations: int = 5000,
+        seed: int = 0
+    ) -> list[Problem]:
+    '''
+    Distance matrices of synthetic orders, allocated greedily as the picking service does.
+
+    Args:
+        stop_counts: Pick list sizes of the orders, storages shared by lines merge into one stop
+        per_size: Orders per pick list size (default: 3)
+        n_locations: Size of the synthetic warehouse (default: 5000)
+        seed: Random seed of the warehouse and orders (default: 0)
+    '''
+    warehouse = generate_warehouse(n_locations, seed=seed)
+    layout, inventory = warehouse.layout_model(), warehouse.inventory_index()
+    corpus = list()
+
+    for lines in stop_counts:
+        for k, order in enumerate(warehouse.orders(per_size, lines=lines, seed=seed + lines)):
+            storage_locations = allocate_stock(
+                None, 'start', 'dest1', order.product_list, 'greedy', inventory, layout
+            )
+            distance_matrix, node_to_index = get_distance_matrix(
+                None, storage_locations, 'start', 'dest1', layout=layout
+            )
+            corpus.append(Problem(
+                name=f'{lines}-lines/{k}',
+                stops=len(node_to_index) - 2,
+                distance_matrix=np.asarray(distance_matrix).astype(int).tolist(),
+                start_index=node_to_index['start'],
+                dest_index=node_to_index['dest1']
+            ))
+
+    return corpus
+
+def save_corpus(corpus: list[Problem], path: str) -> None:
+    with open(path, 'w') as file:
+        json.dump([asdict(problem) for problem in corpus], file)
+
+def load_corpus(path: str) -> list[Problem]:
+    with open(path) as file:
+        return [Problem(**problem) for problem in json.load(file)]
+
+def solver_configs(
+        time_limit: float,
+        first_solution_strategies: tuple[str, ...] = FIRST_SOLUTION_STRATEGIES,
+        metaheuristics: tuple[str, ...] = METAHEURISTICS
+    ) -> list[SolverConfig]:
+    '''
+    Engines to compare, each given the whole time limit so its curve covers every checkpoint.
+
+    `ortools/planned` is the budget the picking service plans for the problem size with the
+    time limit as latency target, so it may stop earlier on a plateau.
+    '''
+    configs = [
+        SolverConfig(
+            name=f'ortools/{strategy}/{metaheuristic}',
+            solver='ortools',
+            params={'budget': SolverBudget(
+                time_limit=time_limit,
+                first_solution_strategy=strategy,
+                local_search_metaheuristic=metaheuristic
+            )}
+        )
+        for strategy in first_solution_strategies
+        for metaheuristic in metaheuristics
+    ]
+    configs.append(SolverConfig(name='ortools/planned', solver='ortools', params={'latency_target': time_limit}))
+    configs.append(SolverConfig(
+        name='aco', solver='aco', params={'latency_target': time_limit, 'max_iter': 10 ** 6, 'seed': 0}
+    ))
+    return configs
+
+def run_config(problem: Problem, config: SolverConfig, num_routes: int = 1) -> dict:
+    '''
+    Solve a problem with an engine, recording its anytime curve.
+
+    Returns:
+        Dictionary with the `trace` of (seconds, cost) of the solutions found, the wall
+        clock `seconds` and the final `cost`
+    '''
+    trace = list()
+    started = time()
+    tours = run_solver(
+        config.solver,
+        problem.distance_matrix,
+        problem.start_index,
+        problem.dest_index,
+        num_routes,
+        {**config.params, 'trace': trace}
+    )
+    seconds = time() - started
+    cost = float(sum(tour.optimal_value for tour in tours))
+
+    if not trace:
+        trace.append((seconds, cost))
+
+    return {'trace': [list(point) for point in trace], 'seconds': seconds, 'cost': cost}
+
+def cost_at(trace: list[list[float]], seconds: float) -> float:
+    '''Best cost found within the given seconds, infinite if none was found yet.'''
+    costs = [cost for elapsed, cost in trace if elapsed <= seconds]
+    return min(costs) if costs else np.inf
+
+def frontier(
+        corpus: list[Problem],
+        results: dict[str, dict[str, dict]],
+        checkpoints: tuple[float, ...] = CHECKPOINTS,
+        target_gap: float = 0.01
+    ) -> dict:
+    '''
+    Quality against time of every engine, per bucket of problems with the same pick list size.
+
+    The gap of a run at a checkpoint is its best cost so far relative to the best cost any
+    engine found for the problem. A run without a solution yet has an infinite gap.
+
+    Args:
+        corpus: Problems that were solved
+        results: Dictionary mapping problem names to the run of every engine
+        checkpoints: Seconds the curves are read at
+        target_gap: Gap an engine must reach to be recommended (default: 0.01)
+
+    Returns:
+        Dictionary mapping buckets to the mean `gaps` of every engine at every checkpoint,
+        the Pareto `frontier` of (seconds, engine, gap) and the `recommended` point: the
+        earliest one within the target gap
+    '''
+    buckets = dict()
+    for problem in corpus:
+        buckets.setdefault(problem.name.split('/')[0], list()).append(problem)
+
+    report = dict()
+    for bucket, problems in buckets.items():
+        best = {problem.name: min(run['cost'] for run in results[problem.name].values()) for problem in problems}
+        engines = list(results[problems[0].name])
+
+        gaps = {
+            engine: {
+                str(seconds): float(np.mean([
+                    cost_at(results[problem.name][engine]['trace'], seconds) / max(best[problem.name], 1) - 1
+                    for problem in problems
+                ]))
+                for seconds in checkpoints
+            }
+            for engine in engines
+        }
+
+        # Ties at a checkpoint go to the engine that finishes sooner on its own
+        wall = {
+            engine: np.mean([results[problem.name][engine]['seconds'] for problem in problems])
+            for engine in engines
+        }
+        points = sorted(
+            (seconds, gaps[engine][str(seconds)], wall[engine], engine)
+            for engine in engines for seconds in checkpoints
+        )
+        pareto, best_gap = list(), np.inf
+        for seconds, gap, _, engine in points:
+            if gap < best_gap:
+                pareto.append({'seconds': seconds, 'engine': engine, 'gap': gap})
+                best_gap = gap
+
+        report[bucket] = {
+            'stops': float(np.mean([problem.stops for problem in problems])),
+            'gaps': gaps,
+            'frontier': pareto,
+            'recommended': next((point for point in pareto if point['gap'] <= target_gap), None)
+        }
+
+    return report
+
+def run_frontier(
+        corpus: list[Problem],
+        configs: list[SolverConfig],
+        checkpoints: tuple[float, ...] = CHECKPOINTS,
+        num_routes: int = 1,
+        target_gap: float = 0.01
+    ) -> dict:
+    results = {
+        problem.name: {config.name: run_config(problem, config, num_routes) for config in configs}
+        for problem in corpus
+    }
+    return {'runs': results, 'buckets': frontier(corpus, results, checkpoints, target_gap)}
+
+def print_frontier(report: dict) -> None:
+    for bucket, result in report['buckets'].items():
+        checkpoints = list(next(iter(result['gaps'].values())))
+        print(f'\n{bucket} (mean {result["stops"]:.1f} stops), gap to the best known tour in %')
+        print(f'{"engine":<60}' + ''.join(f'{seconds + " s":>9}' for seconds in checkpoints))
+
+        for engine, gaps in result['gaps'].items():
+            print(f'{engine:<60}' + ''.join(f'{100 * gaps[seconds]:>9.2f}' for seconds in checkpoints))
+
+        recommended = result['recommended']
+        if recommended:
+            print(f'Recommended: {recommended["engine"]} for {recommended["seconds"]} s ({100 * recommended["gap"]:.2f}%)')
+        else:
+            print('Recommended: no engine reaches the target gap')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tour cost against solve time of the routing engines')
+    parser.add_argument('--stops', type=int, nargs='+', default=STOP_COUNTS, help='Pick list sizes of the corpus')
+    parser.add_argument('--per-size', type=int, default=3, help='Problems per pick list size')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the corpus')
+    parser.add_argument('--corpus', help='Corpus file, read if it exists and written otherwise')
+    parser.add_argument('--time-limit', type=float, default=max(CHECKPOINTS), help='Seconds every engine runs for')
+    parser.add_argument('--checkpoints', type=float, nargs='+', default=CHECKPOINTS, help='Seconds curves are read at')
+    parser.add_argument('--routes', type=int, default=1, help='Number of routes')
+    parser.add_argument('--target-gap', type=float, default=0.01, help='Gap an engine must reach to be recommended')
+    parser.add_argument('--output', help='Write the curves and frontier as JSON')
+    arguments = parser.parse_args()
+
+    corpus: Optional[list[Problem]] = None
+    if arguments.corpus:
+        try:
+            corpus = load_corpus(arguments.corpus)
+        except FileNotFoundError:
+            pass
+
+    if corpus is None:
+        corpus = build_corpus(tuple(arguments.stops), arguments.per_size, seed=arguments.seed)
+        if arguments.corpus:
+            save_corpus(corpus, arguments.corpus)
+
+    report = run_frontier(
+        corpus,
+        solver_configs(arguments.time_limit),
+        tuple(arguments.checkpoints),
+        arguments.routes,
+        arguments.target_gap
+    )
+    print_frontier(report)
+
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump(report, file, indent=2)
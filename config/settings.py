@@ -19,4 +19,15 @@ class Config:
     # )
 
 class Settings:
-    is_testing = os.getenv('IS_TESTING', 'false').lower() == 'true'
\ No newline at end of file
+    is_testing = os.getenv('IS_TESTING', 'false').lower() == 'true'
+    solver_workers = int(os.getenv('SOLVER_WORKERS', os.cpu_count() or 1))
+    picking_workers = int(os.getenv('PICKING_WORKERS', 4))
+    picking_queue_depth = int(os.getenv('PICKING_QUEUE_DEPTH', 16))
+    job_workers = int(os.getenv('JOB_WORKERS', 2))
+    job_queue_depth = int(os.getenv('JOB_QUEUE_DEPTH', 1000))
+    inventory_max_age = float(os.getenv('INVENTORY_MAX_AGE', 5))
+    layout = os.getenv('LAYOUT')
+    backend = os.getenv('BACKEND', 'neo4j')
+    result_cache_size = int(os.getenv('RESULT_CACHE_SIZE', 256))
+    result_cache_ttl = float(os.getenv('RESULT_CACHE_TTL', 30))
+    portfolio_size = int(os.getenv('PORTFOLIO_SIZE', 4))
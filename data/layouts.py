@@ -0,0 +1,89 @@
+from data.warehouse_details import WarehouseSpecs
+from logic.layout_compiler import (
+    LayoutSpec,
+    RowSpec,
+    WallSpec,
+    OriginSpec,
+    FloorSpec,
+    HALL,
+    SINGLE_RACK,
+    BACK_TO_BACK_RACKS
+)
+
+def standard_row(n_halls: int) -> list[str]:
+    '''Halls with back to back racks between each pair of them.'''
+    return [element for _ in range(n_halls - 1) for element in (HALL, BACK_TO_BACK_RACKS)] + [HALL]
+
+def standard_layout() -> LayoutSpec:
+    details = WarehouseSpecs.details
+    n_rows, n_cols = details['hall']['n_rows'], details['hall']['n_cols']
+    X, Y = WarehouseSpecs.X, WarehouseSpecs.Y
+
+    return LayoutSpec(
+        name='standard',
+        rows=[
+            RowSpec(row=row, elements=standard_row(n_cols), rack_offset=(row - 1) * 2 * (n_cols - 1))
+            for row in range(1, n_rows)
+        ],
+        indexes=details['rack']['indexes'],
+        levels=details['rack']['levels'],
+        hall=WarehouseSpecs.dimensions['hall'],
+        pallet=WarehouseSpecs.dimensions['pallet'],
+        origins=[
+            OriginSpec(
+                id='start', x=X//2, y=-10, inbound=True,
+                intersections=[f'C{col}.R1' for col in range(1, n_cols + 1)]
+            )
+        ] + [
+            OriginSpec(
+                id=dest_id, x=x, y=Y+10, inbound=False,
+                intersections=[f'C{col}.R{n_rows}' for col in range(1, n_cols + 1)]
+            )
+            for dest_id, x in (('dest1', X//3), ('dest2', X//2), ('dest3', X//1.5))
+        ]
+    )
+
+def gaon_layout() -> LayoutSpec:
+    indexes = 18
+    hall = {'x': 4, 'y': 4}
+    pallet = {'x': 1.2, 'y': 1, 'z': 2}
+
+    # Both rows start with a single rack against the wall instead of a hall
+    row_2 = [SINGLE_RACK] + standard_row(n_halls=14)[2:]
+    row_1 = [SINGLE_RACK] + standard_row(n_halls=10)[2:]
+    n_cols = max(row.count(HALL) for row in (row_1, row_2))
+
+    return LayoutSpec(
+        name='gaon',
+        rows=[
+            RowSpec(row=2, elements=row_2, rack_offset=0),
+            RowSpec(row=1, elements=row_1, rack_offset=25),
+        ],
+        indexes=indexes,
+        levels=4,
+        hall=hall,
+        pallet=pallet,
+        rack_names='numbers',
+        storage_id='{rack}-{level}-{index}',
+        hall_id='{hall}',
+        # Wall between the first and second row, open at the last column only
+        walls=[WallSpec(row=2, openings=[n_cols])],
+        origins=[
+            OriginSpec(id='start', col=n_cols - 3, y=-2, inbound=True, intersections=[f'C{n_cols - 3}.R1']),
+            OriginSpec(id='dest1', col=n_cols - 2, y=-2, inbound=False, intersections=[f'C{n_cols - 2}.R1']),
+        ],
+        floors=[
+            FloorSpec(
+                id='Patio',
+                level=5,
+                cols=[n_cols - 2, n_cols - 1],
+                y=(1.5 * hall['y'] + pallet['y'] * indexes) / 2,
+                intersections=[f'C{col}.R1' for col in range(n_cols - 3, n_cols + 1)] + [f'C{n_cols}.R2']
+            )
+        ]
+    )
+
+LAYOUTS = {
+    'standard': standard_layout(),
+    'gaon': gaon_layout(),
+}
@@ -0,0 +1,255 @@
+import math
+import numpy as np
+from dataclasses import dataclass
+from typing import Iterator, Optional
+from graph_db.bulk_loader import WarehouseGraph
+from logic.layout_compiler import LayoutSpec, RowSpec, OriginSpec, CompiledLayout, compile_layout
+from logic.layout_model import LayoutModel
+from logic.inventory_index import InventoryIndex
+from data.layouts import standard_row
+
+HALL = {'x': 4, 'y': 6}
+PALLET = {'x': 1.2, 'y': 1, 'z': 2}
+
+
+@dataclass
+class SyntheticOrder:
+    order_id: str
+    arrival: float
+    product_list: dict[str, int]
+
+
+@dataclass
+class SyntheticWarehouse:
+    '''
+    A generated layout with its products and stock, usable without a database.
+
+    `popularity` holds the Zipf probability of every product of `products`, in the same order.
+    '''
+    layout: CompiledLayout
+    products: list[dict]
+    popularity: np.ndarray
+    stock: list[dict]
+    seed: int
+
+    def graph(self) -> WarehouseGraph:
+        '''Layout, products and stock, for the seeder or the CSV export.'''
+        graph = WarehouseGraph(nodes=list(self.layout.graph.nodes), edges=list(self.layout.graph.edges))
+        for product in self.products:
+            graph.add_node('Product', **product)
+        for line in self.stock:
+            graph.add_stock(line['storage_id'], line['product_id'], line['quantity'])
+        return graph
+
+    def layout_model(self) -> LayoutModel:
+        return LayoutModel.from_layout(self.layout)
+
+    def inventory_index(self) -> InventoryIndex:
+        '''Inventory snapshot, as InventoryIndex.load would read it after seeding.'''
+        coordinates = {
+            node['properties']['id']: tuple(self.layout.coordinates[n])
+            for n, node in enumerate(self.layout.graph.nodes)
+        }
+        stock = [{**line, **dict(zip('xyz', coordinates[line['storage_id']]))} for line in self.stock]
+
+        # Products without stock still show up, as GET_INVENTORY returns them
+        stocked = {line['product_id'] for line in self.stock}
+        stock += [
+            {'product_id': product['id'], 'storage_id': None, 'quantity': None, 'x': None, 'y': None, 'z': None}
+            for product in self.products if product['id'] not in stocked
+        ]
+        return InventoryIndex(stock, coordinates)
+
+    def orders(
+            self,
+            n_orders: int,
+            mean_lines: float = 4,
+            mean_quantity: float = 3,
+            rate: float = 1,
+            seed: Optional[int] = None,
+            lines: Optional[int] = None
+        ) -> Iterator[SyntheticOrder]:
+        '''Order stream drawn from the warehouse products, see order_stream.'''
+        return order_stream(
+            [product['id'] for product in self.products],
+            self.popularity,
+            n_orders,
+            mean_lines=mean_lines,
+            mean_quantity=mean_quantity,
+            rate=rate,
+            seed=self.seed if seed is None else seed,
+            lines=lines
+        )
+
+
+def zipf_popularity(n_products: int, exponent: float = 1.0) -> np.ndarray:
+    '''Probability of each product rank, proportional to 1 / rank^exponent.'''
+    weights = 1 / np.arange(1, n_products + 1) ** exponent
+    return weights / weights.sum()
+
+def synthetic_layout(n_locations: int, levels: Optional[int] = None, indexes: Optional[int] = None) -> LayoutSpec:
+    '''
+    Roughly square layout of standard rows with at least n_locations storages.
+
+    Args:
+        n_locations: Minimum number of storages
+        levels: Levels per rack, 1 below 1000 locations and 4 above if not given
+        indexes: Positions per rack along the hall, growing with the layout if not given
+
+    Returns:
+        LayoutSpec with a start and a destination in front of the first row
+    '''
+    assert n_locations > 0, 'A layout needs at least one location'
+    levels = levels or (1 if n_locations < 1000 else 4)
+    indexes = indexes or min(max(round(math.sqrt(n_locations / levels) / 4), 4), 30)
+
+    # Back to back rack pairs, spread so the layout is about as wide as it is deep
+    pairs = math.ceil(n_locations / (2 * indexes * levels))
+    pair_width = HALL['x'] + 2 * PALLET['x']
+    row_depth = HALL['y'] + indexes * PALLET['y']
+    n_pairs = max(math.ceil(math.sqrt(pairs * row_depth / pair_width)), 1)
+    n_rows = math.ceil(pairs / n_pairs)
+    n_cols = n_pairs + 1
+
+    return LayoutSpec(
+        name=f'synthetic-{n_locations}',
+        rows=[
+            RowSpec(row=row, elements=standard_row(n_cols), rack_offset=(row - 1) * 2 * n_pairs)
+            for row in range(1, n_rows + 1)
+        ],
+        indexes=indexes,
+        levels=levels,
+        hall=HALL,
+        pallet=PALLET,
+        origins=[
+            OriginSpec(
+                id='start', col=1, y=-HALL['y'], inbound=True,
+                intersections=[f'C{col}.R1' for col in range(1, n_cols + 1)]
+            ),
+            OriginSpec(
+                id='dest1', col=n_cols, y=-HALL['y'], inbound=False,
+                intersections=[f'C{col}.R1' for col in range(1, n_cols + 1)]
+            ),
+        ]
+    )
+
+def slot_stock(
+        layout: CompiledLayout,
+        product_ids: list[str],
+        popularity: np.ndarray,
+        slotting: float,
+        rng: np.random.Generator,
+        start_id: str = 'start'
+    ) -> list[dict]:
+    '''
+    One product per storage, with a number of storages per product proportional to its
+    popularity (at least one while storages last). With slotting 1 the most popular products
+    take the storages closest to the start, with 0 they are spread at random.
+    '''
+    nodes = layout.graph.nodes
+    storages = [n for n, node in enumerate(nodes) if 'Storage' in node['labels']]
+    start = next(n for n, node in enumerate(nodes) if node['properties'].get('id') == start_id)
+
+    # Same distance the inventory index sorts storages by
+    distances = (np.abs(layout.coordinates[storages] - layout.coordinates[start]) * np.array([1, 1, 100])).sum(axis=1)
+    rank = np.argsort(np.argsort(distances, kind='stable'), kind='stable') / max(len(storages) - 1, 1)
+    score = slotting * rank + (1 - slotting) * rng.random(len(storages))
+    slots = [storages[i] for i in np.argsort(score, kind='stable')]
+
+    n_stocked = min(len(product_ids), len(slots))
+    copies = np.ones(n_stocked, dtype=np.int64)
+    spare = len(slots) - n_stocked
+    if spare:
+        share = popularity[:n_stocked] / popularity[:n_stocked].sum()
+        copies += np.floor(share * spare).astype(np.int64)
+        copies[:spare - int(copies.sum() - n_stocked)] += 1
+
+    placements = np.repeat(np.arange(n_stocked), copies)
+    return [
+        {
+            'storage_id': nodes[slot]['properties']['id'],
+            'product_id': product_ids[p],
+            'quantity': int(rng.integers(50, 301))
+        }
+        for slot, p in zip(slots, placements)
+    ]
+
+def generate_warehouse(
+        n_locations: int,
+        n_products: Optional[int] = None,
+        exponent: float = 1.0,
+        slotting: float = 0.8,
+        seed: int = 0,
+        levels: Optional[int] = None,
+        indexes: Optional[int] = None
+    ) -> SyntheticWarehouse:
+    '''
+    Deterministic warehouse for scale tests, the same arguments always give the same warehouse.
+
+    Args:
+        n_locations: Minimum number of storages, from 10^2 to 10^5 in practice
+        n_products: Number of products, a quarter of the storages if not given
+        exponent: Zipf exponent of the product popularity (default: 1.0)
+        slotting: How strictly popular products sit close to the start, from 0 to 1 (default: 0.8)
+        seed: Random seed (default: 0)
+        levels: Levels per rack, see synthetic_layout
+        indexes: Positions per rack, see synthetic_layout
+
+    Returns:
+        SyntheticWarehouse with the compiled layout, products and stock
+    '''
+    assert 0 <= slotting <= 1, 'Slotting must be between 0 and 1'
+    rng = np.random.default_rng(seed)
+    layout = compile_layout(synthetic_layout(n_locations, levels, indexes))
+
+    n_storages = len(layout.graph.by_label('Storage'))
+    n_products = n_products or max(n_storages // 4, 1)
+    popularity = zipf_popularity(n_products, exponent)
+
+    products = [
+        {'id': f'Product_{i}', 'volume': int(volume)}
+        for i, volume in enumerate(rng.integers(1, 11, size=n_products), start=1)
+    ]
+    stock = slot_stock(layout, [product['id'] for product in products], popularity, slotting, rng)
+
+    return SyntheticWarehouse(layout=layout, products=products, popularity=popularity, stock=stock, seed=seed)
+
+def order_stream(
+        product_ids: list[str],
+        popularity: np.ndarray,
+        n_orders: int,
+        mean_lines: float = 4,
+        mean_quantity: float = 3,
+        rate: float = 1,
+        seed: int = 0,
+        lines: Optional[int] = None
+    ) -> Iterator[SyntheticOrder]:
+    '''
+    Orders with Poisson arrivals, a Poisson number of distinct lines and geometric quantities,
+    the products of each order drawn by popularity.
+
+    Args:
+        product_ids: Products to draw from
+        popularity: Probability of each product
+        n_orders: Number of orders
+        mean_lines: Mean number of lines per order, at least 1 (default: 4)
+        mean_quantity: Mean quantity per line, at least 1 (default: 3)
+        rate: Orders per second (default: 1)
+        seed: Random seed (default: 0)
+        lines: Exact number of lines of every order, instead of a Poisson number (default: None)
+    '''
+    assert mean_lines >= 1 and mean_quantity >= 1, 'Orders need at least one line of one unit'
+    rng = np.random.default_rng(seed)
+    arrival = 0.0
+
+    for n in range(1, n_orders + 1):
+        arrival += rng.exponential(1 / rate)
+        n_lines = min(lines or 1 + rng.poisson(mean_lines - 1), len(product_ids))
+        drawn = rng.choice(len(product_ids), size=n_lines, replace=False, p=popularity)
+        quantities = rng.geometric(1 / mean_quantity, size=n_lines)
+
+        yield SyntheticOrder(
+            order_id=f'Order_{n}',
+            arrival=arrival,
+            product_list={product_ids[p]: int(q) for p, q in zip(drawn, quantities)}
+        )
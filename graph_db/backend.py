@@ -0,0 +1,329 @@
+from threading import Lock
+from typing import Optional
+from neo4j import Transaction
+from graph_db.bulk_loader import WarehouseGraph
+from graph_db.connection import Neo4jConnection
+from graph_db.queries.utility_queries import SPECIFIC_PRODUCT_OFFER
+from graph_db.seed import build_seed
+from data.layouts import LAYOUTS
+from logic.layout_compiler import compile_layout
+from logic.layout_model import LayoutModel, get_layout_model
+from logic.inventory_index import InventoryIndex, get_inventory_index, clear_inventory_index
+from logic.warehouse_operations import (
+    get_storage_locations,
+    reserve_products,
+    add_product_to_location,
+    move_product_to_location
+)
+from logic.routing_operations import get_distance_matrix, find_path
+from config.settings import Config
+
+BACKENDS = ('neo4j', 'memory')
+
+
+class WarehouseBackend:
+    '''
+    Operations the picking pipeline and the stock endpoints need from the warehouse graph.
+
+    Reads mirror the functions of warehouse_operations and routing_operations, writes the
+    RESERVE_PRODUCTS, ADD_PRODUCT_TO_LOCATION and MOVE_PRODUCT_TO_LOCATION queries.
+    '''
+    def snapshots(self) -> tuple[LayoutModel, InventoryIndex]:
+        '''
+        Layout and inventory snapshots the compute phase works on. A stock change made
+        through the backend drops the inventory snapshot, the next one has a new generation.
+        '''
+        raise NotImplementedError
+
+    def product_offer(self, product_ids: list[str]) -> dict[str, int]:
+        '''
+        Stock of every product, as SPECIFIC_PRODUCT_OFFER.
+
+        Raises:
+            AssertionError: If a product is not registered
+        '''
+        raise NotImplementedError
+
+    def storage_locations(self, start_id: str, product_list: dict[str, int]) -> list[dict]:
+        '''Closest storages covering every product of the list, see get_storage_locations.'''
+        raise NotImplementedError
+
+    def distance_matrix(
+            self,
+            storage_locations: list[dict],
+            start_id: str = 'start',
+            dest_id: str = 'dest1'
+        ) -> tuple[list[list[float]], dict[str, int]]:
+        '''Distances between the storages, the start and the destination, see get_distance_matrix.'''
+        raise NotImplementedError
+
+    def find_path(self, tour: list[int], node_to_index: dict[str, int]) -> list[dict]:
+        '''Detailed legs of a tour, see find_path.'''
+        raise NotImplementedError
+
+    def reserve_products(self, picking_list: list[dict]) -> None:
+        '''
+        Move the picked quantities from the stock to the reservations.
+
+        Args:
+            picking_list: Lines with `from_location`, `gwin` (product ID) and `quantity`
+        '''
+        raise NotImplementedError
+
+    def add_product_to_location(self, location: str, product_id: str, quantity: int) -> None:
+        raise NotImplementedError
+
+    def move_product_to_location(
+            self,
+            product_id: str,
+            from_location: str,
+            to_location: str,
+            quantity: int
+        ) -> None:
+        raise NotImplementedError
+
+
+class Neo4jBackend(WarehouseBackend):
+    '''Every operation runs in its own transaction of a Neo4j session.'''
+    def __init__(
+            self,
+            connection: Neo4jConnection,
+            layout: Optional[str] = None,
+            inventory_max_age: Optional[float] = None
+        ):
+        '''
+        Args:
+            connection: Database connection
+            layout: Name of the layout description the layout snapshot is compiled from,
+                the whole graph is pulled if not given (default: None)
+            inventory_max_age: Seconds after which the inventory snapshot is reloaded (default: None)
+        '''
+        self.connection = connection
+        self.layout = layout
+        self.inventory_max_age = inventory_max_age
+
+    def read(self, work, *args):
+        with self.connection.driver.session() as session:
+            return session.execute_read(work, *args)
+
+    def write(self, work, *args):
+        with self.connection.driver.session() as session:
+            result = session.execute_write(work, *args)
+
+        # Dropped once committed, so no request reloads the stock before the change lands
+        clear_inventory_index()
+        return result
+
+    def snapshots(self) -> tuple[LayoutModel, InventoryIndex]:
+        '''Shared snapshots, only queried when missing or stale.'''
+        def fetch(tx: Transaction) -> tuple[LayoutModel, InventoryIndex]:
+            layout = get_layout_model(tx, layout=self.layout)
+            return layout, get_inventory_index(tx, layout, self.inventory_max_age)
+
+        return self.read(fetch)
+
+    def product_offer(self, product_ids: list[str]) -> dict[str, int]:
+        def offer(tx: Transaction) -> dict[str, int]:
+            result = tx.run(SPECIFIC_PRODUCT_OFFER, productIds=product_ids)
+            return {record['id']: record['contained'] for record in result}
+
+        return self.read(offer)
+
+    def storage_locations(self, start_id: str, product_list: dict[str, int]) -> list[dict]:
+        return self.read(get_storage_locations, start_id, product_list)
+
+    def distance_matrix(
+            self,
+            storage_locations: list[dict],
+            start_id: str = 'start',
+            dest_id: str = 'dest1'
+        ) -> tuple[list[list[float]], dict[str, int]]:
+        # Weighted shortest paths, as the layout snapshot computes them
+        return self.read(get_distance_matrix, storage_locations, start_id, dest_id, True)
+
+    def find_path(self, tour: list[int], node_to_index: dict[str, int]) -> list[dict]:
+        return self.read(find_path, tour, node_to_index)
+
+    def reserve_products(self, picking_list: list[dict]) -> None:
+        self.write(reserve_products, picking_list)
+
+    def add_product_to_location(self, location: str, product_id: str, quantity: int) -> None:
+        self.write(add_product_to_location, location, product_id, quantity)
+
+    def move_product_to_location(
+            self,
+            product_id: str,
+            from_location: str,
+            to_location: str,
+            quantity: int
+        ) -> None:
+        self.write(move_product_to_location, product_id, from_location, to_location, quantity)
+
+
+class InMemoryBackend(WarehouseBackend):
+    '''
+    Pure Python warehouse graph, for tests, benchmarks and sites small enough to keep in memory.
+
+    Distances and paths come from a LayoutModel of the graph, allocations from an
+    InventoryIndex of the current stock, rebuilt on the first read after a write. Writes
+    follow the Cypher queries: a line whose storage, product or stock does not match is
+    skipped, as MATCH drops its row, and the apoc.util.validate checks of
+    MOVE_PRODUCT_TO_LOCATION raise AssertionError.
+    '''
+    def __init__(self, graph: WarehouseGraph, max_cached_legs: int = 100_000):
+        '''
+        Args:
+            graph: Layout nodes and edges, products and stock
+            max_cached_legs: Number of reconstructed legs kept in memory (default: 100000)
+        '''
+        nodes = [node for node in graph.nodes if 'Product' not in node['labels']]
+        self.layout = LayoutModel(nodes, graph.edges, max_cached_legs)
+
+        self.storages = {properties['id']: properties for properties in graph.by_label('Storage')}
+        self.product_ids = {properties['id'] for properties in graph.by_label('Product')}
+        self.coordinates = {
+            properties['id']: (properties['x'], properties['y'], properties.get('z') or 0)
+            for properties in self.layout.properties if 'id' in properties
+        }
+
+        # Quantities by storage and product, as the CONTAINS and RESERVE relationships
+        self.contains = {storage_id: dict() for storage_id in self.storages}
+        self.reserved = {storage_id: dict() for storage_id in self.storages}
+        for line in graph.stock:
+            stock = self.contains[line['storage_id']]
+            stock[line['product_id']] = stock.get(line['product_id'], 0) + line['quantity']
+
+        self._inventory = None
+        self._lock = Lock()
+
+    def inventory_index(self) -> InventoryIndex:
+        with self._lock:
+            if self._inventory is None:
+                stock = [
+                    {'product_id': product_id, 'storage_id': storage_id, 'quantity': quantity,
+                     **dict(zip('xyz', self.coordinates[storage_id]))}
+                    for storage_id, products in self.contains.items()
+                    for product_id, quantity in products.items()
+                ]
+
+                # Products without stock still show up, as GET_INVENTORY returns them
+                stocked = {line['product_id'] for line in stock}
+                stock += [
+                    {'product_id': product_id, 'storage_id': None, 'quantity': None, 'x': None, 'y': None, 'z': None}
+                    for product_id in self.product_ids - stocked
+                ]
+                self._inventory = InventoryIndex(stock, self.coordinates)
+
+            return self._inventory
+
+    def snapshots(self) -> tuple[LayoutModel, InventoryIndex]:
+        return self.layout, self.inventory_index()
+
+    def _stock_changed(self) -> None:
+        self._inventory = None
+
+    def product_offer(self, product_ids: list[str]) -> dict[str, int]:
+        missing = [product_id for product_id in product_ids if product_id not in self.product_ids]
+        assert not missing, f'Warehouse has no registered product: {missing}'
+
+        offer = self.inventory_index().offer
+        return {product_id: offer.get(product_id, 0) for product_id in product_ids}
+
+    def storage_locations(self, start_id: str, product_list: dict[str, int]) -> list[dict]:
+        return get_storage_locations(None, start_id, product_list, self.inventory_index())
+
+    def distance_matrix(
+            self,
+            storage_locations: list[dict],
+            start_id: str = 'start',
+            dest_id: str = 'dest1'
+        ) -> tuple[list[list[float]], dict[str, int]]:
+        return get_distance_matrix(None, storage_locations, start_id, dest_id, layout=self.layout)
+
+    def find_path(self, tour: list[int], node_to_index: dict[str, int]) -> list[dict]:
+        return find_path(None, tour, node_to_index, self.layout)
+
+    def _take(self, relationship: dict, storage_id: str, product_id: str, quantity: int) -> None:
+        '''Lower a quantity, deleting the relationship when nothing is left, as apoc.do.when does.'''
+        remaining = relationship[storage_id][product_id] - quantity
+        if remaining > 0:
+            relationship[storage_id][product_id] = remaining
+        else:
+            del relationship[storage_id][product_id]
+
+    def reserve_products(self, picking_list: list[dict]) -> None:
+        with self._lock:
+            for item in picking_list:
+                storage_id, product_id = item['from_location'], item['gwin']
+                if product_id not in self.contains.get(storage_id, {}):
+                    continue
+
+                reserved = self.reserved[storage_id]
+                reserved[product_id] = reserved.get(product_id, 0) + item['quantity']
+                self._take(self.contains, storage_id, product_id, item['quantity'])
+
+            self._stock_changed()
+
+    def add_product_to_location(self, location: str, product_id: str, quantity: int) -> None:
+        with self._lock:
+            if location not in self.storages or product_id not in self.product_ids:
+                return
+
+            stock = self.contains[location]
+            stock[product_id] = stock.get(product_id, 0) + quantity
+            self._stock_changed()
+
+    def move_product_to_location(
+            self,
+            product_id: str,
+            from_location: str,
+            to_location: str,
+            quantity: int
+        ) -> None:
+        with self._lock:
+            if product_id not in self.product_ids:
+                return
+
+            available = self.contains.get(from_location, {}).get(product_id)
+            assert available is not None, f'{from_location} does not have product: {product_id}'
+            assert available >= quantity, (
+                f'{from_location} has {available} products of: {product_id}, not enough to move {quantity}'
+            )
+
+            if to_location not in self.storages:
+                return
+
+            stock = self.contains[to_location]
+            stock[product_id] = stock.get(product_id, 0) + quantity
+            self._take(self.contains, from_location, product_id, quantity)
+            self._stock_changed()
+
+
+_backend: Optional[WarehouseBackend] = None
+_backend_lock = Lock()
+
+def get_backend(
+        name: str = 'neo4j',
+        layout: Optional[str] = None,
+        inventory_max_age: Optional[float] = None
+    ) -> WarehouseBackend:
+    '''
+    Shared backend, created on first use.
+
+    Args:
+        name: One of BACKENDS (default: 'neo4j')
+        layout: Name of the layout description, the in-memory backend is seeded with it
+            ('standard' if not given) and the Neo4j backend compiles its snapshot from it
+        inventory_max_age: Seconds after which the Neo4j inventory snapshot is reloaded
+    '''
+    global _backend
+    assert name in BACKENDS, f'Unknown backend {name}, use one of {BACKENDS}'
+
+    with _backend_lock:
+        if _backend is None:
+            if name == 'memory':
+                _backend = InMemoryBackend(build_seed(compile_layout(LAYOUTS[layout or 'standard'])))
+            else:
+                _backend = Neo4jBackend(Config.db, layout, inventory_max_age)
+
+        return _backend
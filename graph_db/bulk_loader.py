@@ -0,0 +1,256 @@
+import csv
+import os
+from dataclasses import dataclass, field
+from typing import Iterator
+from neo4j import Session, Transaction
+from graph_db.queries.creation_queries import BULK_CREATE_NODES, BULK_CONNECT, BULK_ADD_STOCK
+
+DEFAULT_BATCH_SIZE = 5000
+
+# Properties that identify a node of each label, Hall ids repeat in some layouts
+NODE_KEYS = {
+    'Storage': ('id',),
+    'Hall': ('row', 'col', 'index'),
+    'Intersection': ('id',),
+    'Origin': ('id',),
+    'Product': ('id',),
+}
+
+def node_key(label: str, properties: dict) -> str:
+    return f'{label}:' + '.'.join(str(properties[name]) for name in NODE_KEYS[label])
+
+
+@dataclass
+class WarehouseGraph:
+    '''
+    Nodes, CONNECTED_TO edges and stock of a warehouse, built in Python before writing.
+
+    Nodes and edges follow the records of GET_LAYOUT_NODES and GET_LAYOUT_EDGES, with
+    node keys from node_key instead of element ids, so a graph can be loaded into the
+    database or handed to LayoutModel directly.
+    '''
+    nodes: list[dict] = field(default_factory=list)
+    edges: list[dict] = field(default_factory=list)
+    stock: list[dict] = field(default_factory=list)
+
+    def add_node(self, label: str, **properties) -> str:
+        key = node_key(label, properties)
+        self.nodes.append({'key': key, 'labels': [label], 'properties': properties})
+        return key
+
+    def connect(self, from_key: str, to_key: str, x: float, y: float, z: float, distance: float) -> None:
+        self.edges.append({'from': from_key, 'to': to_key, 'distance': distance, 'x': x, 'y': y, 'z': z})
+
+    def add_stock(self, storage_id: str, product_id: str, quantity: int) -> None:
+        self.stock.append({'storage_id': storage_id, 'product_id': product_id, 'quantity': quantity})
+
+    def by_label(self, label: str) -> list[dict]:
+        return [node['properties'] for node in self.nodes if label in node['labels']]
+
+
+def connect_layout(graph: WarehouseGraph) -> None:
+    '''
+    Add the edges CONNECT_STORAGE_VERTICALLY, CONNECT_INTERSECTION, CONNECT_HALL,
+    CONNECT_INTERSECTION_HALL and CONNECT_HALL_STORAGE would create, from dictionary
+    lookups instead of cartesian matches.
+    '''
+    def offsets(a: dict, b: dict) -> tuple[float, float, float]:
+        return abs(a['x'] - b['x']), abs(a['y'] - b['y']), abs(a.get('z', 0) - b.get('z', 0))
+
+    def link(from_label: str, a: dict, to_label: str, b: dict, vertical: bool = False) -> None:
+        x, y, z = offsets(a, b)
+        graph.connect(
+            node_key(from_label, a), node_key(to_label, b), x, y, z if vertical else 0,
+            x + y + z if vertical else x + y
+        )
+
+    storages = graph.by_label('Storage')
+    halls = {(h['row'], h['col'], h['index']): h for h in graph.by_label('Hall')}
+    intersections = {(i['row'], i['col']): i for i in graph.by_label('Intersection')}
+
+    racks = {
+        (s['rack'], s['index'], s['level']): s for s in storages
+        if s.get('rack') is not None and s.get('index') is not None
+    }
+    for (rack, index, level), s in racks.items():
+        if (rack, index, level + 1) in racks:
+            link('Storage', s, 'Storage', racks[(rack, index, level + 1)], vertical=True)
+
+    for (row, col), i in intersections.items():
+        for neighbor in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+            if neighbor in intersections:
+                link('Intersection', i, 'Intersection', intersections[neighbor])
+
+    for (row, col, index), h in halls.items():
+        for neighbor in ((row, col, index - 1), (row, col, index + 1)):
+            if neighbor in halls:
+                link('Hall', h, 'Hall', halls[neighbor])
+
+        if h.get('adjacentRow') is not None and (h['adjacentRow'], col) in intersections:
+            link('Intersection', intersections[(h['adjacentRow'], col)], 'Hall', h)
+
+    for s in storages:
+        if s.get('level') != 1 or s.get('row') is None or s.get('index') is None:
+            continue
+
+        for col in s.get('adjacentCols') or []:
+            if (s['row'], col, s['index']) in halls:
+                link('Hall', halls[(s['row'], col, s['index'])], 'Storage', s)
+
+
+def connect_origin(graph: WarehouseGraph, origin_id: str, intersection_ids: list[str], inbound: bool) -> None:
+    '''Straight line edges between an origin and intersections, as CONNECT_IN_ORIGIN and CONNECT_OUT_ORIGIN.'''
+    origin = next(o for o in graph.by_label('Origin') if o['id'] == origin_id)
+    intersections = {i['id']: i for i in graph.by_label('Intersection')}
+
+    for intersection_id in intersection_ids:
+        i = intersections[intersection_id]
+        x, y = abs(origin['x'] - i['x']), abs(origin['y'] - i['y'])
+        keys = (node_key('Origin', origin), node_key('Intersection', i))
+        graph.connect(*(keys if inbound else keys[::-1]), x, y, 0, (x ** 2 + y ** 2) ** 0.5)
+
+
+def batches(rows: list, batch_size: int) -> Iterator[list]:
+    assert batch_size > 0, 'Batch size must be positive'
+    for i in range(0, len(rows), batch_size):
+        yield rows[i:i + batch_size]
+
+def graph_statements(graph: WarehouseGraph, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[tuple[str, list]]:
+    '''UNWIND statements writing the graph, as (query, rows) pairs of at most batch_size rows.'''
+    nodes = dict()
+    for node in graph.nodes:
+        label, = node['labels']
+        nodes.setdefault(label, []).append(node['properties'])
+
+    for label, rows in nodes.items():
+        for batch in batches(rows, batch_size):
+            yield BULK_CREATE_NODES.format(label=label), batch
+
+    match_keys = {node['key']: (node['labels'][0], node['properties']) for node in graph.nodes}
+    edges = dict()
+    for edge in graph.edges:
+        (from_label, a), (to_label, b) = match_keys[edge['from']], match_keys[edge['to']]
+        edges.setdefault((from_label, to_label), []).append({
+            'from': {name: a[name] for name in NODE_KEYS[from_label]},
+            'to': {name: b[name] for name in NODE_KEYS[to_label]},
+            'properties': {name: edge[name] for name in ('distance', 'x', 'y', 'z')}
+        })
+
+    for (from_label, to_label), rows in edges.items():
+        query = BULK_CONNECT.format(
+            from_label=from_label,
+            to_label=to_label,
+            from_match=', '.join(f'{name}: row.from.{name}' for name in NODE_KEYS[from_label]),
+            to_match=', '.join(f'{name}: row.to.{name}' for name in NODE_KEYS[to_label])
+        )
+        for batch in batches(rows, batch_size):
+            yield query, batch
+
+    for batch in batches(graph.stock, batch_size):
+        yield BULK_ADD_STOCK, batch
+
+def write_graph(tx: Transaction, graph: WarehouseGraph, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+    '''Write the whole graph in a single transaction.'''
+    for query, rows in graph_statements(graph, batch_size):
+        tx.run(query, rows=rows).consume()
+
+def load_graph(session: Session, graph: WarehouseGraph, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+    '''Write the graph with a transaction per batch, for graphs too large for a single one.'''
+    for query, rows in graph_statements(graph, batch_size):
+        session.execute_write(lambda tx: tx.run(query, rows=rows).consume())
+
+
+def csv_type(values: list) -> str:
+    '''neo4j-admin import type of a property column.'''
+    present = [value for value in values if value is not None]
+    items = [item for value in present if isinstance(value, list) for item in value]
+
+    if items or any(isinstance(value, list) for value in present):
+        return 'float[]' if any(isinstance(item, float) for item in items) else 'int[]'
+    if present and all(isinstance(value, bool) for value in present):
+        return 'boolean'
+    if present and all(isinstance(value, int) and not isinstance(value, bool) for value in present):
+        return 'int'
+    if present and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+        return 'float'
+    return 'string'
+
+def csv_value(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return ';'.join(str(item) for item in value)
+    return str(value)
+
+def _write_csv(path: str, header: list[str], rows: list[list]) -> None:
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows([[csv_value(value) for value in row] for row in rows])
+
+def export_csv(graph: WarehouseGraph, directory: str) -> dict[str, list[str]]:
+    '''
+    Write the graph as CSV files for an offline `neo4j-admin database import`, with a
+    node file per label and a relationship file per type. Arrays use `;` as delimiter.
+
+    Args:
+        graph: Warehouse graph to export
+        directory: Folder the files are written to, created if missing
+
+    Returns:
+        Dictionary with the `nodes` and `relationships` file paths
+    '''
+    os.makedirs(directory, exist_ok=True)
+    files = {'nodes': [], 'relationships': []}
+
+    nodes = dict()
+    for node in graph.nodes:
+        nodes.setdefault(node['labels'][0], []).append(node)
+
+    for label, group in nodes.items():
+        names = list(dict.fromkeys(name for node in group for name in node['properties']))
+        types = [csv_type([node['properties'].get(name) for node in group]) for name in names]
+
+        path = os.path.join(directory, f'{label.lower()}_nodes.csv')
+        _write_csv(
+            path,
+            [':ID'] + [f'{name}:{type_}' for name, type_ in zip(names, types)] + [':LABEL'],
+            [[node['key']] + [node['properties'].get(name) for name in names] + [label] for node in group]
+        )
+        files['nodes'].append(path)
+
+    path = os.path.join(directory, 'connected_to.csv')
+    _write_csv(
+        path,
+        [':START_ID', ':END_ID', 'distance:float', 'x:float', 'y:float', 'z:float', ':TYPE'],
+        [
+            [edge['from'], edge['to'], edge['distance'], edge['x'], edge['y'], edge['z'], 'CONNECTED_TO']
+            for edge in graph.edges
+        ]
+    )
+    files['relationships'].append(path)
+
+    # The loader merges repeated lines of a storage and product, the import needs them summed
+    stock = dict()
+    for line in graph.stock:
+        key = (line['storage_id'], line['product_id'])
+        stock[key] = stock.get(key, 0) + line['quantity']
+
+    if stock:
+        path = os.path.join(directory, 'contains.csv')
+        _write_csv(
+            path,
+            [':START_ID', ':END_ID', 'quantity:int', ':TYPE'],
+            [
+                [
+                    node_key('Storage', {'id': storage_id}),
+                    node_key('Product', {'id': product_id}),
+                    quantity,
+                    'CONTAINS'
+                ]
+                for (storage_id, product_id), quantity in stock.items()
+            ]
+        )
+        files['relationships'].append(path)
+
+    return files
@@ -147,4 +147,36 @@ MERGE (product: Product {id: $id})
 
 UNIQUE_PRODUCT_CONSTRAINT = """
 CREATE CONSTRAINT FOR (product: Product) REQUIRE product.id IS UNIQUE
-"""
\ No newline at end of file
+"""
+
+### Bulk loading, labels and match keys are filled in by graph_db.bulk_loader
+
+BULK_CREATE_NODES = '''
+UNWIND $rows as row
+CREATE (n:{label})
+SET n = row
+'''
+
+BULK_CONNECT = '''
+UNWIND $rows as row
+MATCH (from:{from_label} {{{from_match}}})
+MATCH (to:{to_label} {{{to_match}}})
+CREATE (from)-[r:CONNECTED_TO]->(to)
+SET r = row.properties
+'''
+
+BULK_ADD_STOCK = '''
+UNWIND $rows as row
+MATCH (storage:Storage {id: row.storage_id})
+MATCH (product:Product {id: row.product_id})
+MERGE (storage)-[c:CONTAINS]->(product)
+ON MATCH SET c.quantity = c.quantity + row.quantity
+ON CREATE SET c.quantity = row.quantity
+'''
+
+### Layout
+
+SET_LAYOUT = '''
+MERGE (layout:Layout)
+SET layout.name = $name, layout.fingerprint = $fingerprint
+'''
@@ -1,6 +1,7 @@
 STORAGE_LOCATION_RETRIEVER = '''
-MATCH (from)
-WHERE from.id = $startId
+OPTIONAL MATCH (origin:Origin {id: $startId})
+OPTIONAL MATCH (storage:Storage {id: $startId})
+WITH coalesce(origin, storage) as from
 UNWIND $productList as productItem
 WITH from, productItem[0] as productId, productItem[1] as desiredQuantity
 
@@ -45,8 +46,14 @@ ORDER BY productId, storage.distance
 
 NODE_DISTANCES = '''
 // Query for storage-to-storage distances
-MATCH (from), (to)
-WHERE from.id IN $ids AND to.id IN $ids AND from.id <> to.id AND from.id > to.id
+OPTIONAL MATCH (storage:Storage) WHERE storage.id IN $ids
+WITH collect(storage) as storages
+OPTIONAL MATCH (origin:Origin) WHERE origin.id IN $ids
+WITH storages + collect(origin) as nodes
+UNWIND nodes as from
+UNWIND nodes as to
+WITH from, to
+WHERE from.id > to.id
 MATCH path = shortestPath((from)-[:CONNECTED_TO*]-(to))
 RETURN from.id as from, to.id as to,
     reduce(distance = 0, r IN relationships(path) | distance + r.distance) as distance
@@ -54,18 +61,26 @@ RETURN from.id as from, to.id as to,
 
 NODE_DISTANCE_EXHAUSTIVE = '''
 // Query for storage-to-storage distances
-MATCH (from), (to)
-WHERE from.id IN $ids AND to.id IN $ids AND from.id <> to.id AND from.id > to.id
+OPTIONAL MATCH (storage:Storage) WHERE storage.id IN $ids
+WITH collect(storage) as storages
+OPTIONAL MATCH (origin:Origin) WHERE origin.id IN $ids
+WITH storages + collect(origin) as nodes
+UNWIND nodes as from
+UNWIND nodes as to
+WITH from, to
+WHERE from.id > to.id
 CALL apoc.algo.dijkstra(from, to, 'CONNECTED_TO', 'distance')
 YIELD path, weight
 RETURN from.id as from, to.id as to, weight as distance
 '''
 
 FIND_PATH = '''
-WITH $sortedNodes as sortedNodes
-UNWIND range(0, size(sortedNodes)-1) as i
-MATCH (from), (to)
-WHERE from.id = sortedNodes[i] AND to.id = sortedNodes[i+1]
+OPTIONAL MATCH (storage:Storage) WHERE storage.id IN $sortedNodes
+WITH collect(storage) as storages
+OPTIONAL MATCH (origin:Origin) WHERE origin.id IN $sortedNodes
+WITH storages + collect(origin) as nodes, $sortedNodes as sortedNodes
+UNWIND range(0, size(sortedNodes)-2) as i
+WITH [n IN nodes WHERE n.id = sortedNodes[i]][0] as from, [n IN nodes WHERE n.id = sortedNodes[i+1]][0] as to
 CALL apoc.algo.dijkstra(from, to, 'CONNECTED_TO', 'distance')
 YIELD path, weight
 RETURN
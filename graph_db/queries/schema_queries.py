@@ -0,0 +1,48 @@
+### Constraints, each one is backed by a range index on the property
+STORAGE_ID_CONSTRAINT = '''
+CREATE CONSTRAINT storage_id IF NOT EXISTS
+FOR (storage: Storage) REQUIRE storage.id IS UNIQUE
+'''
+
+PRODUCT_ID_CONSTRAINT = '''
+CREATE CONSTRAINT product_id IF NOT EXISTS
+FOR (product: Product) REQUIRE product.id IS UNIQUE
+'''
+
+ORIGIN_ID_CONSTRAINT = '''
+CREATE CONSTRAINT origin_id IF NOT EXISTS
+FOR (origin: Origin) REQUIRE origin.id IS UNIQUE
+'''
+
+INTERSECTION_ID_CONSTRAINT = '''
+CREATE CONSTRAINT intersection_id IF NOT EXISTS
+FOR (intersection: Intersection) REQUIRE intersection.id IS UNIQUE
+'''
+
+### Indexes
+HALL_ID_INDEX = '''
+// Hall ids repeat in some layouts, so they are indexed without a constraint
+CREATE INDEX hall_id IF NOT EXISTS
+FOR (hall: Hall) ON (hall.id)
+'''
+
+HALL_POSITION_INDEX = '''
+CREATE INDEX hall_position IF NOT EXISTS
+FOR (hall: Hall) ON (hall.row, hall.col, hall.index)
+'''
+
+INTERSECTION_POSITION_INDEX = '''
+CREATE INDEX intersection_position IF NOT EXISTS
+FOR (intersection: Intersection) ON (intersection.row, intersection.col)
+'''
+
+STORAGE_RACK_INDEX = '''
+CREATE INDEX storage_rack IF NOT EXISTS
+FOR (storage: Storage) ON (storage.rack)
+'''
+
+### Introspection
+SHOW_SCHEMA_NAMES = '''
+SHOW INDEXES YIELD name, state
+RETURN name, state
+'''
@@ -39,4 +39,35 @@ CALL apoc.util.validate(product IS NULL, "Warehouse has no registered product: "
 OPTIONAL MATCH (product)<-[contains: CONTAINS]-()
 RETURN product.id as id, sum(coalesce(contains.quantity, 0)) as contained
 ORDER BY contained DESC
-'''
\ No newline at end of file
+'''
+
+GET_LAYOUT_NODES = '''
+MATCH (n:Storage)
+RETURN elementId(n) as key, labels(n) as labels, properties(n) as properties
+UNION ALL
+MATCH (n:Hall)
+RETURN elementId(n) as key, labels(n) as labels, properties(n) as properties
+UNION ALL
+MATCH (n:Intersection)
+RETURN elementId(n) as key, labels(n) as labels, properties(n) as properties
+UNION ALL
+MATCH (n:Origin)
+RETURN elementId(n) as key, labels(n) as labels, properties(n) as properties
+'''
+
+GET_LAYOUT_EDGES = '''
+MATCH (from)-[r:CONNECTED_TO]->(to)
+RETURN elementId(from) as from, elementId(to) as to, r.distance as distance
+'''
+
+GET_INVENTORY = '''
+MATCH (product:Product)
+OPTIONAL MATCH (product)<-[contains:CONTAINS]-(storage:Storage)
+RETURN product.id as product_id, storage.id as storage_id, contains.quantity as quantity,
+    storage.x as x, storage.y as y, storage.z as z
+'''
+
+GET_LAYOUT_FINGERPRINT = '''
+MATCH (layout:Layout)
+RETURN layout.name as name, layout.fingerprint as fingerprint
+'''
@@ -0,0 +1,143 @@
+from typing import Optional
+from neo4j import Transaction
+from graph_db.queries.schema_queries import (
+    STORAGE_ID_CONSTRAINT,
+    PRODUCT_ID_CONSTRAINT,
+    ORIGIN_ID_CONSTRAINT,
+    INTERSECTION_ID_CONSTRAINT,
+    HALL_ID_INDEX,
+    HALL_POSITION_INDEX,
+    INTERSECTION_POSITION_INDEX,
+    STORAGE_RACK_INDEX,
+    SHOW_SCHEMA_NAMES
+)
+from graph_db.queries.manipulation_queries import (
+    STORAGE_LOCATION_RETRIEVER,
+    NODE_DISTANCES,
+    NODE_DISTANCE_EXHAUSTIVE,
+    FIND_PATH,
+    RESERVE_PRODUCTS,
+    ADD_PRODUCT_TO_LOCATION,
+    MOVE_PRODUCT_TO_LOCATION
+)
+from graph_db.queries.utility_queries import (
+    SPECIFIC_PRODUCT_OFFER,
+    GET_LAYOUT_NODES,
+    GET_LAYOUT_EDGES,
+    GET_INVENTORY
+)
+from config.settings import Config
+
+SCHEMA = {
+    'storage_id': STORAGE_ID_CONSTRAINT,
+    'product_id': PRODUCT_ID_CONSTRAINT,
+    'origin_id': ORIGIN_ID_CONSTRAINT,
+    'intersection_id': INTERSECTION_ID_CONSTRAINT,
+    'hall_id': HALL_ID_INDEX,
+    'hall_position': HALL_POSITION_INDEX,
+    'intersection_position': INTERSECTION_POSITION_INDEX,
+    'storage_rack': STORAGE_RACK_INDEX,
+}
+
+# Queries on the request path, with parameters of the right shape to plan them
+HOT_QUERIES = {
+    'STORAGE_LOCATION_RETRIEVER': (STORAGE_LOCATION_RETRIEVER, {'startId': 'start', 'productList': [['Product_1', 1]]}),
+    'SPECIFIC_PRODUCT_OFFER': (SPECIFIC_PRODUCT_OFFER, {'productIds': ['Product_1']}),
+    'NODE_DISTANCES': (NODE_DISTANCES, {'ids': ['start', 'dest1']}),
+    'NODE_DISTANCE_EXHAUSTIVE': (NODE_DISTANCE_EXHAUSTIVE, {'ids': ['start', 'dest1']}),
+    'FIND_PATH': (FIND_PATH, {'sortedNodes': ['start', 'dest1']}),
+    'GET_LAYOUT_NODES': (GET_LAYOUT_NODES, {}),
+    'GET_LAYOUT_EDGES': (GET_LAYOUT_EDGES, {}),
+    'GET_INVENTORY': (GET_INVENTORY, {}),
+    'RESERVE_PRODUCTS': (RESERVE_PRODUCTS, {'pickingList': [{'from_location': 'S', 'gwin': 'Product_1', 'quantity': 1}]}),
+    'ADD_PRODUCT_TO_LOCATION': (ADD_PRODUCT_TO_LOCATION, {'location': 'S', 'productId': 'Product_1', 'quantity': 1}),
+    'MOVE_PRODUCT_TO_LOCATION': (
+        MOVE_PRODUCT_TO_LOCATION,
+        {'gwin': 'Product_1', 'fromLocation': 'S', 'toLocation': 'T', 'quantity': 1}
+    ),
+}
+
+FORBIDDEN_OPERATORS = ('AllNodesScan', 'CartesianProduct')
+
+
+class SchemaError(Exception):
+    '''Raised when schema objects are missing or hot queries are not backed by indexes.'''
+    def __init__(self, missing: Optional[list[str]] = None, violations: Optional[dict[str, list[str]]] = None):
+        self.missing = missing or list()
+        self.violations = violations or dict()
+
+        problems = list()
+        if self.missing:
+            problems.append(f'Schema is incomplete: {self.missing}')
+        if self.violations:
+            problems.append(f'Queries not backed by indexes: {self.violations}')
+        super().__init__('. '.join(problems))
+
+
+def create_schema(tx: Transaction) -> None:
+    '''Create every constraint and index that is missing, existing ones are left untouched.'''
+    for statement in SCHEMA.values():
+        tx.run(statement)
+
+def missing_schema(tx: Transaction) -> list[str]:
+    '''Names of the constraints and indexes that do not exist or are not online yet.'''
+    states = {record['name']: record['state'] for record in tx.run(SHOW_SCHEMA_NAMES)}
+    return [name for name in SCHEMA if states.get(name) != 'ONLINE']
+
+def assert_schema_complete(tx: Transaction) -> None:
+    '''
+    Raises:
+        SchemaError: With the constraints and indexes that are missing or not online
+    '''
+    missing = missing_schema(tx)
+    if missing:
+        raise SchemaError(missing=missing)
+
+def plan_operators(plan: dict) -> list[str]:
+    '''Operator names of a query plan and all its children, without the runtime suffix.'''
+    operators = [plan['operatorType'].split('@')[0]]
+    for child in plan.get('children', []):
+        operators.extend(plan_operators(child))
+    return operators
+
+def plan_violations(plan: dict) -> list[str]:
+    return sorted({operator for operator in plan_operators(plan) if operator in FORBIDDEN_OPERATORS})
+
+def check_plans(plans: dict[str, dict]) -> None:
+    '''
+    Raises:
+        SchemaError: With the offending operators of every query plan that has some
+    '''
+    violations = {name: plan_violations(plan) for name, plan in plans.items()}
+    violations = {name: operators for name, operators in violations.items() if operators}
+    if violations:
+        raise SchemaError(violations=violations)
+
+def explain(tx: Transaction, query: str, parameters: dict) -> dict:
+    '''Plan of a query, computed by EXPLAIN without running it.'''
+    return tx.run(f'EXPLAIN {query}', parameters).consume().plan
+
+def assert_index_backed(tx: Transaction, queries: dict[str, tuple[str, dict]] = HOT_QUERIES) -> None:
+    '''
+    Fail if any query plan scans every node or builds a cartesian product.
+
+    Args:
+        tx: Database transaction object
+        queries: Dictionary mapping query names to the query and sample parameters
+            (default: HOT_QUERIES)
+
+    Raises:
+        SchemaError: With the offending operators of every failing query
+    '''
+    check_plans({name: explain(tx, query, parameters) for name, (query, parameters) in queries.items()})
+
+
+if __name__ == '__main__':
+    with Config.db.driver.session() as session:
+        session.execute_write(create_schema)
+        session.run('CALL db.awaitIndexes(300)').consume()
+
+        # EXPLAIN only plans the queries, write queries included, so both checks are reads
+        session.execute_read(assert_schema_complete)
+        session.execute_read(assert_index_backed)
+        print('Schema is complete and every hot query is index backed')
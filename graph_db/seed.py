@@ -1,176 +1,84 @@
-from graph_db.queries.creation_queries import (
-    CREATE_STORAGE,
-    CONNECT_STORAGE_VERTICALLY,
-    CREATE_INTERSECTION,
-    CONNECT_INTERSECTION,
-    CREATE_HALL,
-    CONNECT_HALL,
-    CONNECT_HALL_STORAGE,
-    CONNECT_INTERSECTION_HALL,
-    CREATE_ORIGIN,
-    CONNECT_IN_ORIGIN,
-    CONNECT_OUT_ORIGIN,
-    CREATE_PRODUCT
-)
+from graph_db.bulk_loader import WarehouseGraph, write_graph, load_graph, export_csv, DEFAULT_BATCH_SIZE
 from graph_db.queries.utility_queries import GET_STORAGES
-from graph_db.queries.manipulation_queries import ADD_PRODUCT_TO_LOCATION
+from graph_db.queries.creation_queries import SET_LAYOUT
 from data import WarehouseSpecs
+from data.layouts import LAYOUTS
+from data.synthetic import generate_warehouse
+from logic.layout_compiler import CompiledLayout, compile_layout
 from neo4j import Transaction
+from graph_db.schema import create_schema
 from config.settings import Config
+import argparse
 import random
 
-details = WarehouseSpecs.details
-dimensions = WarehouseSpecs.dimensions
-X = WarehouseSpecs.X
-Y = WarehouseSpecs.Y
-Z = WarehouseSpecs.Z
-
-def number_to_letters(n):
-    result = []
-    
-    while n > 0:
-        n -= 1
-        remainder = n % 26
-        result.append(chr(remainder + 65))
-        n //= 26
-    
-    return ''.join(result[::-1])
-
-def create_warehouse(tx: Transaction) -> None:
-    n_rack = 0
-
-    for row in range(1, details['hall']['n_rows']):
-        y_hall = row * dimensions['hall']['y'] + (row - 1) * dimensions['pallet']['y'] * details['rack']['indexes']
-
-        for col in range(1, details['hall']['n_cols']):
-            x_hall = col * dimensions['hall']['x'] + (col - 1) * dimensions['pallet']['x'] * 2
-
-            # Back to back racks
-            for rack_column in range(2):
-                x = x_hall + (rack_column + 0.5) * dimensions['pallet']['x']
-                
-                n_rack += 1
-                rack_id = number_to_letters(n_rack)
-
-                # Rack locations
-                for index in range(1, details['rack']['indexes'] + 1):
-                    y = y_hall + (index - 0.5) * dimensions['pallet']['y']
-
-                    # Level within each rack
-                    for level in range(1, details['rack']['levels'] + 1):
-                        z = (level - 1) * dimensions['pallet']['z']
-
-                        tx.run(
-                            CREATE_STORAGE,
-                            id=f'{rack_id}.{level}.{index}',
-                            rack=rack_id,
-                            index=index,
-                            level=level,
-                            row=row,
-                            adjacentCols=[col + rack_column],
-                            x=x,
-                            y=y,
-                            z=z
-                        )
-
-    tx.run(CONNECT_STORAGE_VERTICALLY)
-
-    # Intersection row
-    for row in range(1, details['hall']['n_rows'] + 1):
-        y = (row - 0.5) * dimensions['hall']['y'] + (row - 1) * dimensions['pallet']['y'] * details['rack']['indexes']
-
-        # Intersection col
-        for col in range(1, details['hall']['n_cols'] + 1):
-            x = (col - 0.5) * dimensions['hall']['x'] + (col - 1) * dimensions['pallet']['x'] * 2
-
-            tx.run(
-                CREATE_INTERSECTION,
-                id=f'C{col}.R{row}',
-                row=row,
-                col=col,
-                x=x,
-                y=y
-            )
-
-    # Intersection row
-    for row in range(1, details['hall']['n_rows']):
-        y_hall = row * dimensions['hall']['y'] + (row - 1) * dimensions['pallet']['y'] * details['rack']['indexes']
-
-        # Intersection col
-        for col in range(1, details['hall']['n_cols'] + 1):
-            x = (col - 0.5) * dimensions['hall']['x'] + (col - 1) * dimensions['pallet']['x'] * 2
-
-            for index in range(1, details['rack']['indexes'] + 1):
-                y = y_hall + (index - 0.5) * dimensions['pallet']['y']
-                adjacent_row = row if index == 1 else (row + 1 if index == details['rack']['indexes'] else None)
-
-                tx.run(
-                    CREATE_HALL,
-                    id=f'C{col}.R{row}.{index}',
-                    col=col,
-                    row=row,
-                    index=index,
-                    adjacentRow=adjacent_row,
-                    x=x,
-                    y=y
-                )
-
-    tx.run(CONNECT_INTERSECTION)
-    tx.run(CONNECT_INTERSECTION_HALL)
-    tx.run(CONNECT_HALL)
-    tx.run(CONNECT_HALL_STORAGE)
-
-    # Starting point
-    tx.run(CREATE_ORIGIN, id=f'start', x=X//2, y=-10)
-    tx.run(
-        CONNECT_IN_ORIGIN,
-        originIds=['start'],
-        intersectionIds=[f"C{col}.R1" for col in range(1, details['hall']['n_cols'] + 1)]
-    )
-
-    # Destinations
-    tx.run(CREATE_ORIGIN, id=f'dest1', x=X//3, y=Y+10)
-    tx.run(CREATE_ORIGIN, id=f'dest2', x=X//2, y=Y+10)
-    tx.run(CREATE_ORIGIN, id=f'dest3', x=X//1.5, y=Y+10)
-    tx.run(
-        CONNECT_OUT_ORIGIN,
-        originIds=['dest1', 'dest2', 'dest3'],
-        intersectionIds=[f"C{col}.R{details['hall']['n_rows']}" for col in range(1, details['hall']['n_cols'] + 1)]
-    )
+def build_warehouse(layout: str = 'standard') -> WarehouseGraph:
+    return compile_layout(LAYOUTS[layout]).graph
 
 unique_products = WarehouseSpecs.unique_products
 unique_locations = WarehouseSpecs.unique_positions
 
-def create_products(tx: Transaction) -> None:
+def build_products(graph: WarehouseGraph) -> None:
     for i in range(1, unique_products + 1):
-        tx.run(
-            CREATE_PRODUCT,
-            id=f'Product_{i}',
-            volume=random.randint(1, 10),
-        )
+        graph.add_node('Product', id=f'Product_{i}', volume=random.randint(1, 10))
 
-def add_products_to_locations(tx: Transaction) -> None:
-    locations = tx.run(
-        GET_STORAGES,
-        n=unique_locations
-    )
-    for location in locations:
+def build_stock(graph: WarehouseGraph, storage_ids: list[str]) -> None:
+    for storage_id in storage_ids:
         distinct_products = random.randint(1, 5)
         product_index_options = random.sample(range(1, unique_products + 1), distinct_products)
 
         for index in product_index_options:
-            product_id = f'Product_{index}'
-            quantity = random.randint(50, 300)
+            graph.add_stock(storage_id, f'Product_{index}', random.randint(50, 300))
+
+def create_warehouse(tx: Transaction, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+    write_graph(tx, build_warehouse(), batch_size)
+
+def create_products(tx: Transaction, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+    graph = WarehouseGraph()
+    build_products(graph)
+    write_graph(tx, graph, batch_size)
+
+def add_products_to_locations(tx: Transaction, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+    graph = WarehouseGraph()
+    locations = tx.run(GET_STORAGES, n=unique_locations)
+    build_stock(graph, [location.get('id') for location in locations])
+    write_graph(tx, graph, batch_size)
+
+def record_layout(tx: Transaction, layout: CompiledLayout) -> None:
+    '''Store the name and fingerprint of the seeded layout, checked by get_layout_model.'''
+    tx.run(SET_LAYOUT, name=layout.name, fingerprint=layout.fingerprint)
+
+def build_seed(layout: CompiledLayout) -> WarehouseGraph:
+    '''Layout, products and stock in every storage of a warehouse.'''
+    graph = WarehouseGraph(nodes=list(layout.graph.nodes), edges=list(layout.graph.edges))
+    build_products(graph)
+    build_stock(graph, [storage['id'] for storage in graph.by_label('Storage')])
+    return graph
+
+def seed_arguments(layout: str = 'standard') -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Seed the warehouse graph')
+    parser.add_argument('--layout', choices=sorted(LAYOUTS), default=layout, help='Layout to seed')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows per UNWIND statement')
+    parser.add_argument('--csv', metavar='DIRECTORY', help='Write neo4j-admin import files instead of loading')
+    parser.add_argument('--locations', type=int, help='Seed a synthetic warehouse of at least this many storages')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the synthetic warehouse')
+    return parser.parse_args()
+
+def seed(arguments: argparse.Namespace) -> None:
+    if arguments.locations:
+        warehouse = generate_warehouse(arguments.locations, seed=arguments.seed)
+        layout, graph = warehouse.layout, warehouse.graph()
+    else:
+        layout = compile_layout(LAYOUTS[arguments.layout])
+        graph = build_seed(layout)
+
+    if arguments.csv:
+        print(export_csv(graph, arguments.csv))
+        return
 
-            tx.run(
-                ADD_PRODUCT_TO_LOCATION,
-                productId=product_id,
-                locationId=location.get('id'),
-                quantity=quantity,
-            )
+    with Config.db.driver.session() as session:
+        session.execute_write(create_schema)
+        load_graph(session, graph, arguments.batch_size)
+        session.execute_write(record_layout, layout)
 
 if __name__ == '__main__':
-    with Config.db.driver.session() as session:
-        session.execute_write(create_warehouse)
-        session.execute_write(create_products)
-        session.execute_write(add_products_to_locations)
\ No newline at end of file
+    seed(seed_arguments())
@@ -0,0 +1,157 @@
+from collections import defaultdict
+
+AISLE_HEURISTICS = ('s_shape', 'return', 'largest_gap', 'combined')
+
+
+def route_block(
+        aisles: list[list[tuple]],
+        depth: int,
+        method: str
+    ) -> list[int]:
+    '''
+    Visiting order of the picks of one block of parallel aisles.
+
+    The picker enters the block through its front cross aisle and visits the aisles
+    in the given order. Positions grow from the front (1) to the back (depth) of the aisle.
+
+    Args:
+        aisles: Picks of every aisle as (position, level, stop) tuples, in visiting order
+        depth: Number of positions along an aisle of the block
+        method: One of AISLE_HEURISTICS
+
+    Returns:
+        Stops in visiting order
+    '''
+    aisles = [sorted(picks) for picks in aisles if picks]
+
+    def up(picks):
+        return [stop for *_, stop in picks]
+
+    def down(picks):
+        return [stop for *_, stop in reversed(picks)]
+
+    if method == 'return':
+        return [stop for picks in aisles for stop in up(picks)]
+
+    if method == 's_shape':
+        # Alternate the direction of every aisle, the last one is left the way it was entered
+        return [
+            stop
+            for i, picks in enumerate(aisles)
+            for stop in (up(picks) if i % 2 == 0 else down(picks))
+        ]
+
+    if method == 'largest_gap':
+        if len(aisles) == 1:
+            return up(aisles[0])
+
+        front, back = list(), list()
+        for picks in aisles[1:-1]:
+            positions = [0] + [position for position, *_ in picks] + [depth + 1]
+            gaps = [b - a for a, b in zip(positions, positions[1:])]
+            split = max(range(len(gaps)), key=lambda i: gaps[i])
+
+            # Picks before the largest gap are reached from the front, the rest from the back
+            front.append(picks[:split])
+            back.append(picks[split:])
+
+        return (
+            up(aisles[0]) +
+            [stop for picks in back for stop in down(picks)] +
+            down(aisles[-1]) +
+            [stop for picks in reversed(front) for stop in up(picks)]
+        )
+
+    if method == 'combined':
+        return combined_block(aisles, depth, up, down)
+
+    raise ValueError(f'Unknown aisle heuristic: {method}')
+
+
+def combined_block(aisles: list[list[tuple]], depth: int, up, down) -> list[int]:
+    '''
+    Combined heuristic: every aisle is either traversed or entered and left from the
+    cross aisle the picker stands on, chosen by dynamic programming over the aisles.
+    '''
+    # Best (cost, sequence) when standing at the front (0) or back (1) cross aisle
+    states = {0: (0, list()), 1: (float('inf'), list())}
+
+    for picks in aisles:
+        nearest_back = depth + 1 - picks[0][0]
+        farthest_front = picks[-1][0]
+        new_states = {0: (float('inf'), list()), 1: (float('inf'), list())}
+
+        for side, (cost, sequence) in states.items():
+            options = [
+                # Traverse the aisle, ending on the opposite cross aisle
+                (1 - side, cost + depth + 1, sequence + (up(picks) if side == 0 else down(picks))),
+                # Enter and leave through the same cross aisle
+                (side, cost + 2 * (farthest_front if side == 0 else nearest_back),
+                    sequence + (up(picks) if side == 0 else down(picks))),
+            ]
+
+            for new_side, new_cost, new_sequence in options:
+                if new_cost < new_states[new_side][0]:
+                    new_states[new_side] = (new_cost, new_sequence)
+
+        states = new_states
+
+    # Ending at the back means walking one more aisle length to leave the block
+    front_cost, front_sequence = states[0]
+    back_cost, back_sequence = states[1]
+    return front_sequence if front_cost <= back_cost + depth + 1 else back_sequence
+
+
+def aisle_sequence(
+        stops: list[int],
+        locations: list[dict],
+        start_x: float,
+        method: str
+    ) -> tuple[list[int], list[int]]:
+    '''
+    Order the stops that sit in parallel aisles with a classic routing heuristic.
+
+    Blocks (rack rows) are visited from the front of the warehouse to the back. Within
+    each block, aisles are swept starting from the side closest to the picker.
+
+    Args:
+        stops: Indices of the stops to order
+        locations: Aisle attributes of every index, see LayoutModel.aisle_attributes
+        start_x: Horizontal coordinate where the picker starts
+        method: One of AISLE_HEURISTICS
+
+    Returns:
+        Tuple containing:
+        - Stops in visiting order
+        - Stops that are not in an aisle, left for the caller to place
+    '''
+    blocks = defaultdict(lambda: defaultdict(list))
+    depths, aisle_x = dict(), dict()
+    unplaced = list()
+
+    for stop in stops:
+        location = locations[stop]
+
+        if location.get('block') is None:
+            unplaced.append(stop)
+            continue
+
+        block, aisle = location['block'], location['aisle']
+        blocks[block][aisle].append((location['position'], location['level'], stop))
+        depths[block] = location['depth']
+        aisle_x[(block, aisle)] = location['aisle_x']
+
+    sequence = list()
+    current_x = start_x
+
+    for block in sorted(blocks):
+        aisles = sorted(blocks[block], key=lambda aisle: aisle_x[(block, aisle)])
+        left, right = aisle_x[(block, aisles[0])], aisle_x[(block, aisles[-1])]
+
+        if abs(current_x - right) < abs(current_x - left):
+            aisles.reverse()
+
+        sequence += route_block([blocks[block][aisle] for aisle in aisles], depths[block], method)
+        current_x = aisle_x[(block, aisles[-1])]
+
+    return sequence, unplaced
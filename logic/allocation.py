@@ -0,0 +1,201 @@
+import numpy as np
+from typing import Optional
+from neo4j import Transaction
+from logic.inventory_index import InventoryIndex
+from logic.layout_model import LayoutModel
+from logic.warehouse_operations import get_storage_locations
+
+ALLOCATIONS = ('greedy', 'route_aware')
+
+
+class RouteAwareAllocation:
+    '''
+    Choice of the storages to pick from jointly with the tour that visits them.
+
+    A generalized TSP with quantities: every product may be taken from several storages,
+    and the chosen ones must cover its quantity while keeping the tour short. The tour is
+    built by cheapest insertion, adding at each step the storage with the lowest insertion
+    cost per share of the remaining demand it covers (the greedy set cover rule). Storages
+    already on the tour cost nothing, so products are taken from stops that are visited
+    anyway. The selection is then improved by dropping every storage in turn and covering
+    its demand again, while that shortens the tour.
+    '''
+    def __init__(
+            self,
+            inventory: InventoryIndex,
+            layout: LayoutModel,
+            start_id: str,
+            dest_id: str,
+            product_list: dict[str, int],
+            max_candidates: Optional[int] = 50
+        ):
+        '''
+        Args:
+            inventory: Inventory snapshot with the stock of every storage
+            layout: Layout snapshot used to measure distances
+            start_id: Node of starting id
+            dest_id: Node of destination id
+            product_list: Dictionary mapping product IDs to quantities
+            max_candidates: Storages in stock considered per product, the closest to the
+                start, more when they do not cover the demand, all of them when None
+                (default: 50)
+        '''
+        self.product_list = {p: q for p, q in product_list.items() if q > 0}
+        self.products = sorted(self.product_list)
+
+        node_ids = [start_id, dest_id]
+        node_index = {start_id: 0, dest_id: 1}
+        stock = dict()
+
+        for product_id in self.products:
+            product = inventory.products[product_id]
+            order, _ = inventory.sorted_stock(product_id, start_id)
+            order = order[product['quantities'][order] > 0]
+            if max_candidates is not None:
+                # The closest storages that cover the demand are always candidates
+                covering = np.searchsorted(np.cumsum(product['quantities'][order]), self.product_list[product_id]) + 1
+                order = order[:max(max_candidates, covering)]
+
+            for i in order:
+                quantity = int(product['quantities'][i])
+                storage_id = product['storage_ids'][i]
+                if storage_id not in node_index:
+                    node_index[storage_id] = len(node_ids)
+                    node_ids.append(storage_id)
+
+                key = (node_index[storage_id], product_id)
+                stock[key] = stock.get(key, 0) + quantity
+
+        self.node_ids = node_ids
+        self.start, self.dest = 0, 1
+
+        # Quantity of every product at every node, nodes by rows and products by columns
+        self.stock = np.zeros((len(node_ids), len(self.products)), dtype=np.int64)
+        product_column = {product_id: j for j, product_id in enumerate(self.products)}
+        for (node, product_id), quantity in stock.items():
+            self.stock[node, product_column[product_id]] = quantity
+
+        self.demand = np.array([self.product_list[p] for p in self.products], dtype=np.int64)
+        assert (self.stock.sum(axis=0) >= self.demand).all(), 'Candidate storages do not cover the demand'
+
+        self.layout = layout
+        self._columns = dict()
+
+    def column(self, node: int) -> np.ndarray:
+        '''Distances from every node to the given one, computed once.'''
+        if node not in self._columns:
+            self._columns[node] = self.layout.distance_block(self.node_ids, [self.node_ids[node]])[:, 0]
+        return self._columns[node]
+
+    def tour_length(self, tour: list[int]) -> float:
+        return float(sum(self.column(b)[a] for a, b in zip(tour, tour[1:])))
+
+    def cover(self, tour: list[int]) -> list[int]:
+        '''Insert storages into the tour until every quantity is covered.'''
+        tour = list(tour)
+        remaining = np.maximum(self.demand - self.stock[tour].sum(axis=0), 0)
+
+        while remaining.any():
+            columns = np.stack([self.column(node) for node in tour], axis=1)
+            edges = np.array([columns[a, k + 1] for k, a in enumerate(tour[:-1])])
+            insertion = columns[:, :-1] + columns[:, 1:] - edges[None, :]
+            positions = np.argmin(insertion, axis=1)
+            costs = insertion[np.arange(len(insertion)), positions]
+
+            share = (np.minimum(self.stock, remaining[None, :]) / self.demand[None, :]).sum(axis=1)
+            share[tour] = 0
+            candidates = np.flatnonzero(share > 0)
+
+            best = candidates[np.argmin(costs[candidates] / share[candidates])]
+            tour.insert(int(positions[best]) + 1, int(best))
+            remaining = np.maximum(remaining - self.stock[best], 0)
+
+        return tour
+
+    def improve(self, tour: list[int], max_passes: int = 3) -> list[int]:
+        '''Drop each storage and cover its demand again, keeping every change that shortens the tour.'''
+        length = self.tour_length(tour)
+
+        for _ in range(max_passes):
+            improved = False
+            for node in list(tour[1:-1]):
+                if node not in tour:
+                    continue
+
+                candidate = self.cover([x for x in tour if x != node])
+                candidate_length = self.tour_length(candidate)
+                if candidate_length < length - 1e-9:
+                    tour, length, improved = candidate, candidate_length, True
+
+            if not improved:
+                break
+
+        return tour
+
+    def takes(self, tour: list[int]) -> list[dict]:
+        '''Split every quantity over the storages of the tour holding the product, in tour order.'''
+        storage_locations = list()
+        for j, product_id in enumerate(self.products):
+            remaining = int(self.demand[j])
+            for node in tour:
+                if remaining == 0:
+                    break
+
+                take = min(int(self.stock[node, j]), remaining)
+                if take > 0:
+                    storage_locations.append({
+                        'product_id': product_id,
+                        'quantity': int(self.stock[node, j]),
+                        'storage_id': self.node_ids[node],
+                        'take': take
+                    })
+                    remaining -= take
+
+        return storage_locations
+
+    def __call__(self) -> list[dict]:
+        tour = self.improve(self.cover([self.start, self.dest]))
+        return self.takes(tour)
+
+
+def route_aware_allocation(
+        inventory: InventoryIndex,
+        layout: LayoutModel,
+        start_id: str,
+        dest_id: str,
+        product_list: dict[str, int],
+        max_candidates: Optional[int] = 50
+    ) -> list[dict]:
+    '''
+    Storages covering every product of the list, chosen to keep the picking tour short,
+    see RouteAwareAllocation.
+
+    Returns:
+        Allocation lines (product_id, quantity, storage_id, take), like get_storage_locations
+    '''
+    return RouteAwareAllocation(inventory, layout, start_id, dest_id, product_list, max_candidates)()
+
+
+def allocate_stock(
+        tx: Transaction,
+        start_id: str,
+        dest_id: str,
+        product_list: dict[str, int],
+        allocation: str = 'greedy',
+        inventory: Optional[InventoryIndex] = None,
+        layout: Optional[LayoutModel] = None
+    ) -> list[dict]:
+    '''
+    Allocation lines of a product list by the chosen mode, one of ALLOCATIONS.
+
+    `greedy` takes every product from the storages closest to the start, as
+    STORAGE_LOCATION_RETRIEVER does, and `route_aware` chooses them with the tour.
+    The route aware mode needs both snapshots.
+    '''
+    assert allocation in ALLOCATIONS, f'Unknown allocation: {allocation}. Available allocations: {list(ALLOCATIONS)}'
+
+    if allocation == 'route_aware':
+        assert inventory is not None and layout is not None, 'Route aware allocation needs the inventory and layout snapshots'
+        return route_aware_allocation(inventory, layout, start_id, dest_id, product_list)
+
+    return get_storage_locations(tx, start_id, product_list, inventory)
@@ -0,0 +1,354 @@
+import math
+import numpy as np
+from dataclasses import dataclass, replace
+from typing import Callable, Optional
+from logic.routing_operations import Tour, TSPSolver, objective_value
+from logic.solver_budget import SolverBudget
+
+DECOMPOSITIONS = ('kmedoids', 'aisle')
+
+
+@dataclass
+class Decomposition:
+    '''
+    Cluster-first, route-second settings.
+
+    Stops are split into clusters of about `cluster_size` stops (at least one per route),
+    each cluster is routed on its own, and `polish_time` seconds of search over the whole
+    problem may follow, starting from the stitched routes.
+    '''
+    method: str = 'kmedoids'
+    cluster_size: int = 60
+    polish_time: Optional[float] = None
+    seed: int = 0
+
+
+@dataclass
+class ClusterPlan:
+    '''
+    Clusters of a decomposed problem, in visiting order, with the route each belongs to
+    and the stops it is entered and left through.
+    '''
+    clusters: list[list[int]]
+    routes: list[int]
+    entries: list[int]
+    exits: list[int]
+
+
+def kmedoids(
+        distance_matrix: np.ndarray,
+        stops: list[int],
+        k: int,
+        seed: int = 0,
+        max_iter: int = 30
+    ) -> list[list[int]]:
+    '''
+    Partition stops around k medoids of the distance model (Voronoi iteration).
+
+    Medoids are seeded as in k-means++, each one drawn with a probability proportional to
+    the distance to the closest medoid so far, then every stop joins its closest medoid and
+    every cluster moves its medoid to the stop with the least total distance to the others.
+
+    Returns:
+        Stops of every non empty cluster
+    '''
+    rng = np.random.default_rng(seed)
+    distances = distance_matrix[np.ix_(stops, stops)]
+    k = min(k, len(stops))
+
+    medoids = [int(rng.integers(len(stops)))]
+    while len(medoids) < k:
+        closest = distances[:, medoids].min(axis=1)
+        weights = closest / closest.sum() if closest.sum() > 0 else None
+        medoids.append(int(rng.choice(len(stops), p=weights)))
+
+    for _ in range(max_iter):
+        labels = np.argmin(distances[:, medoids], axis=1)
+        updated = list()
+        for c in range(len(medoids)):
+            members = np.flatnonzero(labels == c)
+            if len(members) == 0:
+                updated.append(medoids[c])
+                continue
+            updated.append(int(members[np.argmin(distances[np.ix_(members, members)].sum(axis=1))]))
+
+        if updated == medoids:
+            break
+        medoids = updated
+
+    labels = np.argmin(distances[:, medoids], axis=1)
+    return [[stops[i] for i in np.flatnonzero(labels == c)] for c in range(len(medoids)) if (labels == c).any()]
+
+def aisle_clusters(locations: list[dict], stops: list[int], k: int) -> list[list[int]]:
+    '''
+    Partition stops into k runs of the same size along the aisles: by block, then aisle and
+    position. Stops outside any aisle are placed by their x coordinate.
+    '''
+    def sweep(stop: int) -> tuple:
+        location = locations[stop]
+        return (location.get('block', 0), location.get('aisle_x', location['x']), location.get('position', 0))
+
+    ordered = sorted(stops, key=sweep)
+    return [chunk.tolist() for chunk in np.array_split(np.array(ordered, dtype=np.int64), min(k, len(stops)))]
+
+def cluster_stops(
+        distance_matrix: np.ndarray,
+        stops: list[int],
+        k: int,
+        decomposition: Decomposition,
+        locations: Optional[list[dict]] = None
+    ) -> list[list[int]]:
+    '''Partition stops into about k clusters with the method of the decomposition.'''
+    assert decomposition.method in DECOMPOSITIONS, (
+        f'Unknown decomposition {decomposition.method}, use one of {DECOMPOSITIONS}'
+    )
+
+    if decomposition.method == 'aisle':
+        assert locations is not None, 'Aisle decomposition needs the aisle attributes of every location'
+        return aisle_clusters(locations, stops, k)
+
+    return kmedoids(distance_matrix, stops, k, decomposition.seed)
+
+def plan_clusters(
+        distance_matrix: np.ndarray,
+        start_index: int,
+        dest_index: int,
+        num_routes: int,
+        decomposition: Decomposition,
+        locations: Optional[list[dict]] = None
+    ) -> ClusterPlan:
+    '''
+    Cluster the stops, order the clusters and hand them out to the routes.
+
+    Clusters are visited in the order of a tour over their medoids from the start to the
+    destination, and split into contiguous groups with about the same number of stops, one
+    per route. Each cluster is entered through its stop closest to the previous medoid (or
+    the start) and left through its stop closest to the next one (or the destination), so
+    every cluster can be routed on its own.
+    '''
+    stops = [i for i in range(len(distance_matrix)) if i not in (start_index, dest_index)]
+    k = max(num_routes, math.ceil(len(stops) / decomposition.cluster_size))
+    clusters = cluster_stops(distance_matrix, stops, k, decomposition, locations)
+
+    medoids = [
+        cluster[int(np.argmin(distance_matrix[np.ix_(cluster, cluster)].sum(axis=1)))]
+        for cluster in clusters
+    ]
+
+    if len(clusters) > 1:
+        nodes = [start_index] + medoids + [dest_index]
+        tour = TSPSolver(
+            distance_matrix[np.ix_(nodes, nodes)],
+            0,
+            len(nodes) - 1,
+            budget=SolverBudget(time_limit=0.1, local_search_metaheuristic='GREEDY_DESCENT')
+        )()[0].tour
+        order = [i - 1 for i in tour[1:-1]]
+        clusters, medoids = [clusters[i] for i in order], [medoids[i] for i in order]
+
+    # Contiguous groups of clusters, balanced by their number of stops
+    sizes = np.array([len(cluster) for cluster in clusters])
+    middles = np.cumsum(sizes) - sizes / 2
+    routes = np.minimum((middles / sizes.sum() * num_routes).astype(int), num_routes - 1)
+    if len(set(routes.tolist())) < num_routes:
+        routes = np.concatenate([
+            np.full(len(chunk), r) for r, chunk in enumerate(np.array_split(np.arange(len(clusters)), num_routes))
+        ])
+
+    entries, exits = list(), list()
+    for c, cluster in enumerate(clusters):
+        first = c == 0 or routes[c - 1] != routes[c]
+        last = c == len(clusters) - 1 or routes[c + 1] != routes[c]
+
+        previous = start_index if first else medoids[c - 1]
+        following = dest_index if last else medoids[c + 1]
+
+        entry = cluster[int(np.argmin(distance_matrix[previous, cluster]))]
+        others = [stop for stop in cluster if stop != entry] or [entry]
+        entries.append(entry)
+        exits.append(others[int(np.argmin(distance_matrix[others, following]))])
+
+    return ClusterPlan(clusters=clusters, routes=routes.tolist(), entries=entries, exits=exits)
+
+def cluster_jobs(
+        plan: ClusterPlan,
+        distance_matrix: np.ndarray,
+        solver: str,
+        solver_params: dict,
+        latency_target: Optional[float] = None,
+        cluster_budget: Optional[Callable[[int, int, Optional[float]], Optional[SolverBudget]]] = None
+    ) -> list[dict]:
+    '''
+    Arguments of run_solver routing every cluster from its entry to its exit.
+
+    Every cluster gets latency_target and a budget planned from its own size by
+    cluster_budget, a budget given in solver_params is cut to the latency target.
+    '''
+    jobs = list()
+    for cluster, entry, exit_ in zip(plan.clusters, plan.entries, plan.exits):
+        params = dict(solver_params)
+        if 'locations' in params:
+            params['locations'] = [params['locations'][stop] for stop in cluster]
+
+        if latency_target is not None:
+            params['latency_target'] = latency_target
+            if params.get('budget') is not None:
+                time_limit = min(params['budget'].time_limit, latency_target)
+                plateau_time = params['budget'].plateau_time
+                params['budget'] = replace(
+                    params['budget'],
+                    time_limit=time_limit,
+                    plateau_time=min(plateau_time, time_limit) if plateau_time is not None else None
+                )
+
+        if cluster_budget is not None and params.get('budget') is None:
+            budget = cluster_budget(len(cluster), 1, latency_target)
+            if budget is not None:
+                params['budget'] = budget
+
+        jobs.append({
+            'solver': solver,
+            'distance_matrix': distance_matrix[np.ix_(cluster, cluster)],
+            'start_index': cluster.index(entry),
+            'dest_index': cluster.index(exit_),
+            'num_vehicles': 1,
+            'solver_params': params
+        })
+
+    return jobs
+
+def route_length(distance_matrix: np.ndarray, route: list[int]) -> float:
+    return float(sum(distance_matrix[a][b] for a, b in zip(route, route[1:])))
+
+def stitch_routes(
+        plan: ClusterPlan,
+        cluster_tours: list[list[Tour]],
+        distance_matrix: np.ndarray,
+        start_index: int,
+        dest_index: int,
+        num_routes: int
+    ) -> list[Tour]:
+    '''Routes from the start through the paths of their clusters to the destination.'''
+    routes = [[start_index] for _ in range(num_routes)]
+
+    for cluster, route, tours in zip(plan.clusters, plan.routes, cluster_tours):
+        path = [cluster[i] for i in tours[0].tour]
+        # A failed solve still visits every stop of the cluster
+        routes[route] += path + [stop for stop in cluster if stop not in set(path)]
+
+    tours = list()
+    for route in routes:
+        route = list(dict.fromkeys(route)) + [dest_index]
+        tours.append(Tour(route, route_length(distance_matrix, route)))
+
+    return tours
+
+def polish_routes(
+        distance_matrix: np.ndarray,
+        tours: list[Tour],
+        start_index: int,
+        dest_index: int,
+        time_limit: float,
+        objective: str = 'distance'
+    ) -> list[Tour]:
+    '''Search over the whole problem from the stitched routes, kept only if it improves the objective.'''
+    polished = TSPSolver(
+        distance_matrix,
+        start_index,
+        dest_index,
+        len(tours),
+        budget=SolverBudget(time_limit=time_limit),
+        initial_routes=[tour.tour[1:-1] for tour in tours],
+        objective=objective
+    )()
+
+    # Costs are compared on the float distances, OR-Tools reports truncated ones
+    polished = [Tour(tour.tour, route_length(distance_matrix, tour.tour)) for tour in polished if tour.tour]
+    if len(polished) == len(tours) and (
+            objective_value([t.optimal_value for t in polished], objective)
+            < objective_value([t.optimal_value for t in tours], objective)
+        ):
+        return polished
+    return tours
+
+def solve_decomposed(
+        solver: str,
+        distance_matrix: list[list[float]],
+        start_index: int,
+        dest_index: int,
+        num_routes: int,
+        solver_params: dict,
+        decomposition: Decomposition,
+        solve_many: Callable[[list[dict]], list[list[Tour]]],
+        locations: Optional[list[dict]] = None,
+        parallelism: int = 1,
+        cluster_budget: Optional[Callable[[int, int, Optional[float]], Optional[SolverBudget]]] = None
+    ) -> list[Tour]:
+    '''
+    Cluster-first, route-second: split the stops into clusters, route every cluster with
+    the chosen engine (in parallel through solve_many), stitch the clusters of every route
+    and optionally polish the result over the whole problem.
+
+    The latency target of solver_params covers the whole solve: clusters run in rounds of
+    `parallelism` jobs, and the polish takes at most one round's share of the target.
+
+    Args:
+        solver: Name of the routing engine for the clusters, one of SOLVERS
+        distance_matrix: Distances between every node
+        start_index: Matrix index of the start
+        dest_index: Matrix index of the destination
+        num_routes: Number of distinct picking routes
+        solver_params: Extra keyword arguments for the routing engine, as built by solver_job
+        decomposition: Clustering settings
+        solve_many: Runs a list of run_solver jobs, such as SolverExecutor.solve_many
+        locations: Aisle attributes of every node, needed by the aisle decomposition
+            (default: the `locations` of solver_params)
+        parallelism: Number of jobs solve_many runs at the same time (default: 1)
+        cluster_budget: Plans the budget of a cluster from its number of nodes, routes and
+            latency target, such as plan_budget or preferred_budget (default: None)
+
+    Returns:
+        One Tour per route
+    '''
+    distance_matrix = np.asarray(distance_matrix, dtype=float)
+    if len(distance_matrix) <= 2:
+        route = list(dict.fromkeys([start_index, dest_index])) + [dest_index] * (start_index == dest_index)
+        return [Tour(route, route_length(distance_matrix, route)) for _ in range(num_routes)]
+
+    plan = plan_clusters(
+        distance_matrix, start_index, dest_index, num_routes, decomposition, locations or solver_params.get('locations')
+    )
+
+    # Clusters of one or two stops have a single path, only the others are solved
+    solved = [c for c, cluster in enumerate(plan.clusters) if len(cluster) > 2]
+    rounds = max(math.ceil(len(solved) / max(parallelism, 1)), 1)
+
+    polish_time = decomposition.polish_time
+    latency_target = solver_params.get('latency_target')
+    if latency_target is not None:
+        if polish_time:
+            polish_time = min(polish_time, latency_target / (rounds + 1))
+            latency_target -= polish_time
+        latency_target /= rounds
+
+    jobs = cluster_jobs(plan, distance_matrix, solver, solver_params, latency_target, cluster_budget)
+    cluster_tours = [
+        [Tour([cluster.index(entry), cluster.index(exit_)], 0)]
+        for cluster, entry, exit_ in zip(plan.clusters, plan.entries, plan.exits)
+    ]
+    for c, tours in zip(solved, solve_many([jobs[c] for c in solved])):
+        cluster_tours[c] = tours
+
+    tours = stitch_routes(plan, cluster_tours, distance_matrix, start_index, dest_index, num_routes)
+
+    if polish_time:
+        tours = polish_routes(
+            distance_matrix,
+            tours,
+            start_index,
+            dest_index,
+            polish_time,
+            solver_params.get('objective', 'distance')
+        )
+
+    return tours
@@ -0,0 +1,195 @@
+import numpy as np
+from itertools import count
+from threading import Lock
+from time import time
+from typing import Optional
+from neo4j import Transaction
+from logic.layout_model import LayoutModel
+from graph_db.queries.utility_queries import GET_INVENTORY
+
+# Every snapshot built in the process gets the next generation
+_generations = count()
+
+class InventoryIndex:
+    '''
+    In-memory snapshot of the CONTAINS relationships, to allocate stock without a query.
+
+    For every product the storages holding it are kept as arrays. Per origin they are
+    sorted once, by the same distance as STORAGE_LOCATION_RETRIEVER (Manhattan, with the
+    height weighted by 100) and then by quantity, and the cumulative quantities are
+    stored, so the storages needed for a quantity are found by binary search.
+
+    Every snapshot has its own `generation`, so results computed from it can be told
+    apart from results computed from an earlier or later load of the stock.
+    '''
+    def __init__(self, stock: list[dict], coordinates: dict[str, tuple[float, float, float]]):
+        '''
+        Args:
+            stock: Records with `product_id`, `storage_id`, `quantity` and the storage
+                `x`, `y` and `z`; products without stock have a null `storage_id`
+            coordinates: Dictionary mapping node IDs to their (x, y, z), used for the origins
+        '''
+        self.coordinates = coordinates
+        self.generation = next(_generations)
+        grouped = dict()
+        for record in stock:
+            lines = grouped.setdefault(record['product_id'], list())
+            if record['storage_id'] is not None:
+                lines.append(record)
+
+        self.products = dict()
+        for product_id, lines in grouped.items():
+            self.products[product_id] = {
+                'storage_ids': [line['storage_id'] for line in lines],
+                'quantities': np.array([line['quantity'] for line in lines], dtype=np.int64),
+                'coordinates': np.array(
+                    [(line['x'], line['y'], line.get('z') or 0) for line in lines], dtype=float
+                ).reshape(-1, 3)
+            }
+
+        self.offer = {
+            product_id: int(product['quantities'].sum())
+            for product_id, product in self.products.items()
+        }
+
+        self._sorted = dict()
+        self._sorted_lock = Lock()
+
+    @classmethod
+    def load(cls, tx: Transaction, layout: LayoutModel) -> 'InventoryIndex':
+        '''Pull every product and its stock from the database, origins are located on the layout.'''
+        stock = [record.data() for record in tx.run(GET_INVENTORY)]
+
+        coordinates = dict()
+        for properties in layout.properties:
+            if 'id' in properties:
+                coordinates.setdefault(
+                    properties['id'], (properties['x'], properties['y'], properties.get('z') or 0)
+                )
+
+        return cls(stock, coordinates)
+
+    def missing_products(self, product_ids: list[str]) -> list[str]:
+        return [product_id for product_id in product_ids if product_id not in self.products]
+
+    def sorted_stock(self, product_id: str, start_id: str) -> tuple[np.ndarray, np.ndarray]:
+        '''
+        Storages of a product ordered from the closest to the start node.
+
+        Returns:
+            Tuple with the storage positions in the product arrays and their cumulative quantities
+        '''
+        key = (product_id, start_id)
+        with self._sorted_lock:
+            if key in self._sorted:
+                return self._sorted[key]
+
+        assert start_id in self.coordinates, f'Unknown start node: {start_id}'
+        product = self.products[product_id]
+
+        weights = np.array([1, 1, 100])
+        distances = (np.abs(product['coordinates'] - self.coordinates[start_id]) * weights).sum(axis=1)
+        order = np.lexsort((-product['quantities'], distances))
+        cumulative = np.cumsum(product['quantities'][order])
+
+        with self._sorted_lock:
+            self._sorted[key] = (order, cumulative)
+
+        return order, cumulative
+
+    def allocate(
+            self,
+            start_id: str,
+            product_list: dict[str, int],
+            taken: Optional[dict[tuple[str, str], int]] = None
+        ) -> list[dict]:
+        '''
+        Take every product from the closest storages until the quantity is covered, as
+        STORAGE_LOCATION_RETRIEVER does.
+
+        Args:
+            start_id: Node the distances are measured from
+            product_list: Dictionary mapping product IDs to quantities
+            taken: Quantities already promised, by (product ID, storage ID), which are not
+                allocated again (default: None)
+
+        Returns:
+            Allocation lines (product_id, quantity, storage_id, take) by product and distance
+        '''
+        storage_locations = list()
+
+        for product_id in sorted(product_list):
+            desired = product_list[product_id]
+            if product_id not in self.products or desired <= 0:
+                continue
+
+            product = self.products[product_id]
+            order, cumulative = self.sorted_stock(product_id, start_id)
+            available = product['quantities'][order]
+
+            if taken:
+                available = available.copy()
+                promised = {
+                    storage_id: quantity for (id_, storage_id), quantity in taken.items() if id_ == product_id
+                }
+                for k, i in enumerate(order):
+                    used = min(promised.get(product['storage_ids'][i], 0), int(available[k]))
+                    if used > 0:
+                        available[k] -= used
+                        promised[product['storage_ids'][i]] -= used
+                cumulative = np.cumsum(available)
+
+            # Storages before the first one whose cumulative quantity covers the demand, plus that one
+            last = min(int(np.searchsorted(cumulative, desired, side='left')), len(order) - 1)
+            previous = 0
+            for k in range(last + 1):
+                i = order[k]
+                take = min(int(available[k]), desired - previous)
+                previous = int(cumulative[k])
+
+                if take > 0:
+                    storage_locations.append({
+                        'product_id': product_id,
+                        'quantity': int(product['quantities'][i]),
+                        'storage_id': product['storage_ids'][i],
+                        'take': take
+                    })
+
+        return storage_locations
+
+
+_inventory_index: Optional[InventoryIndex] = None
+_inventory_loaded_at = 0.0
+_inventory_lock = Lock()
+
+def get_inventory_index(
+        tx: Transaction,
+        layout: LayoutModel,
+        max_age: Optional[float] = None,
+        refresh: bool = False
+    ) -> InventoryIndex:
+    '''
+    Shared inventory snapshot, pulled from the database on first use.
+
+    Args:
+        tx: Database transaction object
+        layout: Layout snapshot used to locate the origins
+        max_age: Seconds after which the snapshot is reloaded, never when None (default: None)
+        refresh: Reload the snapshot even if one is already cached (default: False)
+    '''
+    global _inventory_index, _inventory_loaded_at
+
+    with _inventory_lock:
+        stale = max_age is not None and time() - _inventory_loaded_at > max_age
+        if _inventory_index is None or refresh or stale:
+            _inventory_index = InventoryIndex.load(tx, layout)
+            _inventory_loaded_at = time()
+
+        return _inventory_index
+
+def clear_inventory_index() -> None:
+    '''Drop the cached snapshot, the next request reloads it.'''
+    global _inventory_index
+
+    with _inventory_lock:
+        _inventory_index = None
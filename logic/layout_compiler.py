@@ -0,0 +1,283 @@
+import hashlib
+import json
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Optional
+from graph_db.bulk_loader import WarehouseGraph, connect_layout, connect_origin, node_key
+
+# Row elements, a hall or a rack group facing the hall before and after it
+HALL = 'H'
+SINGLE_RACK = 'R'
+BACK_TO_BACK_RACKS = 'RR'
+ELEMENTS = (HALL, SINGLE_RACK, BACK_TO_BACK_RACKS)
+
+RACK_NAMES = ('letters', 'numbers')
+
+
+@dataclass
+class RowSpec:
+    '''
+    A row of racks and halls, from left to right.
+
+    A single rack can be picked from both halls around it, each rack of a back to back pair
+    only from its own side.
+    '''
+    row: int
+    elements: list[str]
+    rack_offset: int = 0
+
+
+@dataclass
+class WallSpec:
+    '''A wall along an intersection row, crossed only at the intersections of `openings` columns.'''
+    row: int
+    openings: list[int] = field(default_factory=list)
+
+
+@dataclass
+class OriginSpec:
+    '''
+    A start or destination point, linked in a straight line to some intersections.
+
+    Its x is either given or taken from the intersections of column `col`.
+    '''
+    id: str
+    y: float
+    intersections: list[str]
+    inbound: bool
+    x: Optional[float] = None
+    col: Optional[int] = None
+
+
+@dataclass
+class FloorSpec:
+    '''
+    A storage on an upper floor, reached from some intersections by a straight line plus a lift.
+
+    Its x is either given or the middle of the intersection columns in `cols`.
+    '''
+    id: str
+    level: int
+    y: float
+    intersections: list[str]
+    x: Optional[float] = None
+    cols: Optional[list[int]] = None
+
+
+@dataclass
+class LayoutSpec:
+    '''
+    Declarative description of a warehouse site.
+
+    Rows of racks lie between intersection rows, and a hall runs along each column of a row
+    from one intersection row to the next. Every rack position has `indexes` positions along
+    the hall and `levels` storages on top of each other.
+
+    Ids are built from format strings, with the fields `rack`, `level`, `index` for storages
+    and `hall` (the hall number in letters), `col`, `row`, `index` for halls.
+    '''
+    name: str
+    rows: list[RowSpec]
+    indexes: int
+    levels: int
+    hall: dict
+    pallet: dict
+    origins: list[OriginSpec] = field(default_factory=list)
+    walls: list[WallSpec] = field(default_factory=list)
+    floors: list[FloorSpec] = field(default_factory=list)
+    rack_names: str = 'letters'
+    storage_id: str = '{rack}.{level}.{index}'
+    hall_id: str = 'C{col}.R{row}.{index}'
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'LayoutSpec':
+        '''Layout from plain data, as read from a JSON file.'''
+        data = dict(data)
+        data['rows'] = [RowSpec(**row) for row in data['rows']]
+        data['origins'] = [OriginSpec(**origin) for origin in data.get('origins', [])]
+        data['walls'] = [WallSpec(**wall) for wall in data.get('walls', [])]
+        data['floors'] = [FloorSpec(**floor) for floor in data.get('floors', [])]
+        return cls(**data)
+
+
+@dataclass
+class CompiledLayout:
+    '''
+    Nodes and edges of a layout, ready to be seeded or handed to LayoutModel.
+
+    `coordinates` holds the x, y, z of every node of `graph.nodes`, `edge_index` the node
+    positions of every edge of `graph.edges` and `edge_distance` its length.
+    '''
+    name: str
+    graph: WarehouseGraph
+    coordinates: np.ndarray
+    edge_index: np.ndarray
+    edge_distance: np.ndarray
+    fingerprint: str
+
+
+def number_to_letters(n):
+    result = []
+
+    while n > 0:
+        n -= 1
+        remainder = n % 26
+        result.append(chr(remainder + 65))
+        n //= 26
+
+    return ''.join(result[::-1])
+
+def validate_layout(spec: LayoutSpec) -> None:
+    assert spec.rows, 'A layout needs at least one row'
+    assert spec.rack_names in RACK_NAMES, f'Unknown rack names {spec.rack_names}, use one of {RACK_NAMES}'
+    assert len({row.row for row in spec.rows}) == len(spec.rows), 'Row numbers must be unique'
+
+    for row in spec.rows:
+        assert row.row >= 1, f'Row numbers start at 1, got {row.row}'
+        unknown = set(row.elements) - set(ELEMENTS)
+        assert not unknown, f'Unknown elements {sorted(unknown)} in row {row.row}, use one of {ELEMENTS}'
+
+    for origin in spec.origins:
+        assert (origin.x is None) != (origin.col is None), f'Origin {origin.id} needs either x or col'
+
+    for floor in spec.floors:
+        assert (floor.x is None) != (floor.cols is None), f'Floor {floor.id} needs either x or cols'
+
+def layout_fingerprint(graph: WarehouseGraph) -> str:
+    '''Hash of the nodes and edges of a graph, independent of the order they were added in.'''
+    nodes = sorted(json.dumps([node['labels'], node['properties']], sort_keys=True) for node in graph.nodes)
+    edges = sorted(json.dumps(edge, sort_keys=True) for edge in graph.edges)
+    return hashlib.sha256(json.dumps([nodes, edges]).encode()).hexdigest()
+
+def compile_layout(spec: LayoutSpec) -> CompiledLayout:
+    '''
+    Build every node and edge of a layout.
+
+    Args:
+        spec: Layout description
+
+    Returns:
+        CompiledLayout with the graph, its coordinate and edge arrays and its fingerprint
+    '''
+    validate_layout(spec)
+    graph = WarehouseGraph()
+    hall_x, hall_y = spec.hall['x'], spec.hall['y']
+    pallet_x, pallet_y, pallet_z = spec.pallet['x'], spec.pallet['y'], spec.pallet['z']
+
+    def row_y(row: int) -> float:
+        return row * hall_y + (row - 1) * pallet_y * spec.indexes
+
+    total_halls = 0
+    hall_x_row_coords = []
+
+    for row_spec in spec.rows:
+        row = row_spec.row
+        n_hall = 0
+        n_rack = 0
+        hall_x_coords = []
+
+        for element in row_spec.elements:
+            if element == HALL:
+                n_hall += 1
+                total_halls += 1
+                x = (n_hall - 0.5) * hall_x + n_rack * pallet_x
+                hall_x_coords.append(x)
+
+                for index in range(1, spec.indexes + 1):
+                    adjacent_row = row if index == 1 else (row + 1 if index == spec.indexes else None)
+
+                    graph.add_node(
+                        'Hall',
+                        id=spec.hall_id.format(hall=number_to_letters(total_halls), col=n_hall, row=row, index=index),
+                        col=n_hall,
+                        row=row,
+                        index=index,
+                        adjacentRow=adjacent_row,
+                        x=x,
+                        y=row_y(row) + (index - 0.5) * pallet_y,
+                        z=0
+                    )
+                continue
+
+            adjacent_rack_cols = [[n_hall, n_hall + 1]] if element == SINGLE_RACK else [[n_hall], [n_hall + 1]]
+
+            for adjacent_cols in adjacent_rack_cols:
+                n_rack += 1
+                rack_number = n_rack + row_spec.rack_offset
+                rack_id = number_to_letters(rack_number) if spec.rack_names == 'letters' else str(rack_number)
+                x = n_hall * hall_x + (n_rack - 0.5) * pallet_x
+
+                for index in range(1, spec.indexes + 1):
+                    for level in range(1, spec.levels + 1):
+                        graph.add_node(
+                            'Storage',
+                            id=spec.storage_id.format(rack=rack_id, level=level, index=index),
+                            rack=rack_id,
+                            index=index,
+                            level=level,
+                            row=row,
+                            adjacentCols=adjacent_cols,
+                            x=x,
+                            y=row_y(row) + (index - 0.5) * pallet_y,
+                            z=(level - 1) * pallet_z
+                        )
+
+        hall_x_row_coords.append(hall_x_coords)
+
+    # Intersections line up with the halls of the widest row
+    column_x = max(hall_x_row_coords, key=len)
+    openings = {wall.row: set(wall.openings) for wall in spec.walls}
+
+    for row in range(1, max(row_spec.row for row_spec in spec.rows) + 2):
+        y = (row - 0.5) * hall_y + (row - 1) * pallet_y * spec.indexes
+
+        for col, x in enumerate(column_x, start=1):
+            if row in openings and col not in openings[row]:
+                continue
+
+            graph.add_node('Intersection', id=f'C{col}.R{row}', row=row, col=col, x=x, y=y, z=0)
+
+    connect_layout(graph)
+
+    for origin in spec.origins:
+        x = origin.x if origin.x is not None else column_x[origin.col - 1]
+        graph.add_node('Origin', id=origin.id, x=x, y=origin.y, z=0)
+        connect_origin(graph, origin.id, origin.intersections, inbound=origin.inbound)
+
+    intersections = {i['id']: i for i in graph.by_label('Intersection')}
+
+    for floor in spec.floors:
+        x_floor = floor.x if floor.x is not None else sum(column_x[col - 1] for col in floor.cols) / len(floor.cols)
+        z_floor = (floor.level - 1) * pallet_z
+        key = graph.add_node(
+            'Storage',
+            id=floor.id,
+            rack=floor.id,
+            index=None,
+            row=None,
+            adjacentCols=None,
+            level=floor.level,
+            x=x_floor,
+            y=floor.y,
+            z=z_floor
+        )
+
+        for intersection_id in floor.intersections:
+            i = intersections[intersection_id]
+            x, y, z = abs(x_floor - i['x']), abs(floor.y - i['y']), abs(z_floor - i['z'])
+            graph.connect(node_key('Intersection', i), key, x, y, z, (x ** 2 + y ** 2) ** 0.5 + z)
+
+    positions = {node['key']: n for n, node in enumerate(graph.nodes)}
+
+    return CompiledLayout(
+        name=spec.name,
+        graph=graph,
+        coordinates=np.array(
+            [[node['properties'][axis] for axis in ('x', 'y', 'z')] for node in graph.nodes], dtype=np.float64
+        ).reshape(-1, 3),
+        edge_index=np.array(
+            [[positions[edge['from']], positions[edge['to']]] for edge in graph.edges], dtype=np.int64
+        ).reshape(-1, 2),
+        edge_distance=np.array([edge['distance'] for edge in graph.edges], dtype=np.float64),
+        fingerprint=layout_fingerprint(graph)
+    )
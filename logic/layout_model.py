@@ -0,0 +1,497 @@
+import numpy as np
+from collections import deque, OrderedDict
+from threading import Lock
+from typing import Optional
+from neo4j import Transaction
+from graph_db.queries.utility_queries import GET_LAYOUT_NODES, GET_LAYOUT_EDGES, GET_LAYOUT_FINGERPRINT
+from logic.layout_compiler import CompiledLayout, compile_layout
+from data.layouts import LAYOUTS
+
+
+class LayoutModel:
+    '''
+    In-memory snapshot of the CONNECTED_TO graph with precomputed shortest paths.
+
+    The warehouse graph is mostly made of pendant trees (storage levels hanging from
+    a rack position) and chains of degree 2 nodes (halls between two intersections).
+    Both are contracted before the all-pairs computation, so the dense distance and
+    predecessor tables only span the junctions of the layout. Every other node reaches
+    the junctions through at most two portals (the ends of its chain), which keeps any
+    distance query a handful of array lookups.
+    '''
+    def __init__(
+            self,
+            nodes: list[dict],
+            edges: list[dict],
+            max_cached_legs: int = 100_000,
+            fingerprint: Optional[str] = None
+        ):
+        '''
+        Args:
+            nodes: Records with the node `key`, its `labels` and its `properties`
+            edges: Records with the `from` and `to` node keys and the edge `distance`
+            max_cached_legs: Number of reconstructed legs kept in memory (default: 100000)
+            fingerprint: Fingerprint of the compiled layout the graph comes from, if any
+        '''
+        self.fingerprint = fingerprint
+        self.keys = [node['key'] for node in nodes]
+        self.labels = [node['labels'] for node in nodes]
+        self.properties = [node['properties'] for node in nodes]
+
+        # Hall ids are not unique in every layout, pickable nodes (storages and origins) are
+        self.node_to_index = dict()
+        for i, properties in enumerate(self.properties):
+            self.node_to_index.setdefault(properties.get('id'), i)
+
+        key_to_index = {key: i for i, key in enumerate(self.keys)}
+        self.adjacency = [dict() for _ in nodes]
+
+        for edge in edges:
+            u, v = key_to_index[edge['from']], key_to_index[edge['to']]
+            distance = float(edge['distance'])
+
+            if u != v and distance < self.adjacency[u].get(v, np.inf):
+                self.adjacency[u][v] = distance
+                self.adjacency[v][u] = distance
+
+        self._strip_pendant_trees()
+        self._contract_chains()
+        self._compute_core_paths()
+        self._compute_portals()
+        self._index_aisles()
+
+        self.max_cached_legs = max_cached_legs
+        self._legs = OrderedDict()
+        self._legs_lock = Lock()
+
+    @classmethod
+    def load(cls, tx: Transaction) -> 'LayoutModel':
+        '''Pull the whole CONNECTED_TO graph from the database.'''
+        nodes = [record.data() for record in tx.run(GET_LAYOUT_NODES)]
+        edges = [record.data() for record in tx.run(GET_LAYOUT_EDGES)]
+        return cls(nodes, edges)
+
+    @classmethod
+    def from_layout(cls, layout: CompiledLayout) -> 'LayoutModel':
+        '''Build the snapshot from a compiled layout, without querying the database.'''
+        return cls(layout.graph.nodes, layout.graph.edges, fingerprint=layout.fingerprint)
+
+    def _strip_pendant_trees(self) -> None:
+        '''Peel degree 1 nodes until only the 2-core (or a single root per tree) remains.'''
+        n = len(self.keys)
+        degree = np.array([len(neighbors) for neighbors in self.adjacency])
+        self.parent = np.full(n, -1, dtype=np.int64)
+        removed = np.zeros(n, dtype=bool)
+        removal_order = []
+
+        leaves = deque(i for i in range(n) if degree[i] == 1)
+        while leaves:
+            u = leaves.popleft()
+            if removed[u] or degree[u] != 1:
+                continue
+
+            parent = next(v for v in self.adjacency[u] if not removed[v])
+            removed[u] = True
+            self.parent[u] = parent
+            removal_order.append(u)
+
+            degree[parent] -= 1
+            if degree[parent] == 1:
+                leaves.append(parent)
+
+        self.anchor = np.arange(n)
+        self.depth = np.zeros(n)
+        self.level = np.zeros(n, dtype=np.int64)
+
+        for u in reversed(removal_order):
+            parent = self.parent[u]
+            self.anchor[u] = self.anchor[parent]
+            self.depth[u] = self.depth[parent] + self.adjacency[u][parent]
+            self.level[u] = self.level[parent] + 1
+
+        self._in_core = ~removed
+        self._core_degree = degree
+
+    def _contract_chains(self) -> None:
+        '''Collapse runs of degree 2 nodes into single weighted links between junctions.'''
+        n = len(self.keys)
+        is_junction = self._in_core & (self._core_degree != 2)
+
+        self.chains = list()
+        self.chain_of = np.full(n, -1, dtype=np.int64)
+        self.chain_rank = np.full(n, -1, dtype=np.int64)
+        self.chain_pos = np.zeros(n)
+        self._links = dict()
+
+        def walk(a: int, first: int) -> None:
+            nodes, offsets = list(), list()
+            prev, curr, distance = a, first, self.adjacency[a][first]
+
+            while not is_junction[curr]:
+                nodes.append(curr)
+                offsets.append(distance)
+                nxt = next(v for v in self.adjacency[curr] if self._in_core[v] and v != prev)
+                distance += self.adjacency[curr][nxt]
+                prev, curr = curr, nxt
+
+            chain_id = len(self.chains)
+            self.chains.append({'a': a, 'b': curr, 'nodes': nodes, 'length': distance})
+            for rank, (node, offset) in enumerate(zip(nodes, offsets)):
+                self.chain_of[node] = chain_id
+                self.chain_rank[node] = rank
+                self.chain_pos[node] = offset
+
+            if a != curr:
+                self._add_link(a, curr, distance, chain_id)
+
+        def contract_from(a: int) -> None:
+            for first in self.adjacency[a]:
+                if not self._in_core[first]:
+                    continue
+                if is_junction[first]:
+                    self._add_link(a, first, self.adjacency[a][first], -1)
+                elif self.chain_of[first] == -1:
+                    walk(a, first)
+
+        for a in np.flatnonzero(is_junction):
+            contract_from(a)
+
+        # Components that are a plain cycle have no junction, promote one of its nodes
+        for u in np.flatnonzero(self._in_core & ~is_junction):
+            if self.chain_of[u] == -1:
+                is_junction[u] = True
+                contract_from(u)
+
+        self.junctions = np.flatnonzero(is_junction)
+        self.core_index = np.full(n, -1, dtype=np.int64)
+        self.core_index[self.junctions] = np.arange(len(self.junctions))
+
+    def _add_link(self, a: int, b: int, distance: float, chain_id: int) -> None:
+        key = (min(a, b), max(a, b))
+        if distance < self._links.get(key, (np.inf, -1))[0]:
+            self._links[key] = (distance, chain_id)
+
+    def _compute_core_paths(self) -> None:
+        '''Floyd-Warshall over the junctions, keeping the predecessor of every target.'''
+        size = len(self.junctions)
+        distances = np.full((size, size), np.inf)
+        predecessors = np.full((size, size), -1, dtype=np.int64)
+        np.fill_diagonal(distances, 0)
+        np.fill_diagonal(predecessors, np.arange(size))
+
+        for (a, b), (distance, _) in self._links.items():
+            i, j = self.core_index[a], self.core_index[b]
+            distances[i, j] = distances[j, i] = distance
+            predecessors[i, j] = i
+            predecessors[j, i] = j
+
+        for k in range(size):
+            candidate = distances[:, k, None] + distances[None, k, :]
+            improved = candidate < distances
+            distances = np.where(improved, candidate, distances)
+            predecessors = np.where(improved, predecessors[None, k, :], predecessors)
+
+        self.core_distances = distances
+        self.core_predecessors = predecessors
+
+    def _compute_portals(self) -> None:
+        '''For every node, the (up to two) junctions through which it leaves its chain.'''
+        n = len(self.keys)
+        self.portal_junction = np.zeros((n, 2), dtype=np.int64)
+        self.portal_cost = np.full((n, 2), np.inf)
+
+        for u in range(n):
+            anchor = self.anchor[u]
+
+            if self.core_index[anchor] != -1:
+                self.portal_junction[u] = self.core_index[anchor]
+                self.portal_cost[u, 0] = self.depth[u]
+            else:
+                chain = self.chains[self.chain_of[anchor]]
+                pos = self.chain_pos[anchor]
+                self.portal_junction[u] = self.core_index[chain['a']], self.core_index[chain['b']]
+                self.portal_cost[u] = self.depth[u] + pos, self.depth[u] + chain['length'] - pos
+
+    def _index_aisles(self) -> None:
+        '''Horizontal coordinate and depth of every aisle, keyed by (row, col) of its halls.'''
+        self._aisles = dict()
+
+        for labels, properties in zip(self.labels, self.properties):
+            if 'Hall' in labels:
+                key = (properties['row'], properties['col'])
+                x, depth = self._aisles.get(key, (properties['x'], 0))
+                self._aisles[key] = (x, max(depth, properties['index']))
+
+    def indices(self, ids: list[str]) -> np.ndarray:
+        '''Translate node ids into model indices.'''
+        missing = [id_ for id_ in ids if id_ not in self.node_to_index]
+        assert not missing, f'Nodes not found in warehouse layout: {missing}'
+
+        return np.array([self.node_to_index[id_] for id_ in ids], dtype=np.int64)
+
+    def distance_submatrix(self, ids: list[str]) -> np.ndarray:
+        '''
+        Shortest distances between every pair of the given node ids.
+
+        Args:
+            ids: Node identifiers, matrix rows and columns follow the same order
+
+        Returns:
+            Square array of shortest path distances
+        '''
+        return self.distance_block(ids, ids)
+
+    def distance_block(self, from_ids: list[str], to_ids: list[str]) -> np.ndarray:
+        '''
+        Shortest distances from every node of a list to every node of another.
+
+        Args:
+            from_ids: Node identifiers of the rows
+            to_ids: Node identifiers of the columns
+
+        Returns:
+            Array of shortest path distances, with a row per from_id and a column per to_id
+        '''
+        rows, cols = self.indices(from_ids), self.indices(to_ids)
+        row_junction, col_junction = self.portal_junction[rows], self.portal_junction[cols]
+        row_cost, col_cost = self.portal_cost[rows], self.portal_cost[cols]
+
+        matrix = np.full((len(rows), len(cols)), np.inf)
+        for s in range(2):
+            for t in range(2):
+                matrix = np.minimum(
+                    matrix,
+                    row_cost[:, s, None] +
+                    self.core_distances[np.ix_(row_junction[:, s], col_junction[:, t])] +
+                    col_cost[None, :, t]
+                )
+
+        row_anchors, col_anchors = self.anchor[rows], self.anchor[cols]
+
+        # Anchors on the same chain may reach each other without leaving it
+        row_chains, col_chains = self.chain_of[row_anchors], self.chain_of[col_anchors]
+        same_chain = (row_chains[:, None] == col_chains[None, :]) & (row_chains[:, None] != -1)
+        if same_chain.any():
+            row_pos, col_pos = self.chain_pos[row_anchors], self.chain_pos[col_anchors]
+            direct = (
+                self.depth[rows][:, None] + 
+                np.abs(row_pos[:, None] - col_pos[None, :]) + 
+                self.depth[cols][None, :]
+            )
+            matrix = np.where(same_chain, np.minimum(matrix, direct), matrix)
+
+        # Nodes hanging from the same anchor only travel within their tree
+        for i, j in np.argwhere(row_anchors[:, None] == col_anchors[None, :]):
+            matrix[i, j] = self._tree_distance(rows[i], cols[j])
+
+        return matrix
+
+    def aisle_attributes(self, ids: list[str]) -> list[dict]:
+        '''
+        Aisle coordinates of the given nodes, for the aisle routing heuristics.
+
+        Storages are placed by their rack row (`block`), the hall they open to (`aisle`),
+        their `position` along it and their `level`. Each aisle also reports its `depth`
+        (number of positions) and horizontal coordinate `aisle_x`, both taken from the
+        Hall nodes. Nodes outside an aisle only report their `x` coordinate.
+        '''
+        attributes = list()
+        for i in self.indices(ids):
+            properties = self.properties[i]
+            location = {'x': properties.get('x'), 'block': None}
+            cols = properties.get('adjacentCols') or []
+            aisles = [(properties.get('row'), col) for col in cols if (properties.get('row'), col) in self._aisles]
+
+            if 'Storage' in self.labels[i] and aisles and properties.get('index') is not None:
+                # Racks reachable from two halls are picked from the closest one
+                block, aisle = min(aisles, key=lambda key: abs(self._aisles[key][0] - properties['x']))
+                location.update({
+                    'block': block,
+                    'aisle': aisle,
+                    'position': properties['index'],
+                    'level': properties.get('level') or 1,
+                    'depth': self._aisles[(block, aisle)][1],
+                    'aisle_x': self._aisles[(block, aisle)][0]
+                })
+
+            attributes.append(location)
+
+        return attributes
+
+    def distance(self, from_id: str, to_id: str) -> float:
+        return float(self.distance_submatrix([from_id, to_id])[0, 1])
+
+    def _lowest_common_ancestor(self, u: int, v: int) -> int:
+        while u != v:
+            if self.level[u] >= self.level[v]:
+                u = self.parent[u]
+            else:
+                v = self.parent[v]
+        return u
+
+    def _tree_distance(self, u: int, v: int) -> float:
+        lca = self._lowest_common_ancestor(u, v)
+        return self.depth[u] + self.depth[v] - 2 * self.depth[lca]
+
+    def _walk_up(self, u: int, top: int) -> list[int]:
+        '''Nodes from u up its pendant tree to the ancestor top, both included.'''
+        nodes = [u]
+        while nodes[-1] != top:
+            nodes.append(self.parent[nodes[-1]])
+        return nodes
+
+    def _walk_to_portal(self, u: int, side: int) -> list[int]:
+        '''Nodes from the core node u to the junction at one end of its chain, both included.'''
+        if self.core_index[u] != -1:
+            return [u]
+
+        chain = self.chains[self.chain_of[u]]
+        rank = self.chain_rank[u]
+
+        if side == 0:
+            return [u] + chain['nodes'][:rank][::-1] + [chain['a']]
+        return [u] + chain['nodes'][rank + 1:] + [chain['b']]
+
+    def _walk_core(self, i: int, j: int) -> list[int]:
+        '''Nodes from junction i to junction j (core indices), expanding every contracted chain.'''
+        junctions = [j]
+        while junctions[-1] != i:
+            junctions.append(self.core_predecessors[i, junctions[-1]])
+        junctions.reverse()
+
+        nodes = [self.junctions[i]]
+        for p, q in zip(junctions, junctions[1:]):
+            a, b = self.junctions[p], self.junctions[q]
+            _, chain_id = self._links[(min(a, b), max(a, b))]
+
+            if chain_id != -1:
+                chain = self.chains[chain_id]
+                nodes.extend(chain['nodes'] if chain['a'] == a else chain['nodes'][::-1])
+            nodes.append(b)
+
+        return nodes
+
+    def path(self, u: int, v: int) -> list[int]:
+        '''
+        Node indices along a shortest path between two model indices.
+
+        Returns:
+            Nodes from u to v, both included, or an empty list if v is unreachable
+        '''
+        au, av = self.anchor[u], self.anchor[v]
+
+        if au == av:
+            lca = self._lowest_common_ancestor(u, v)
+            return self._walk_up(u, lca) + self._walk_up(v, lca)[-2::-1]
+
+        best, middle = np.inf, None
+
+        if self.chain_of[au] != -1 and self.chain_of[au] == self.chain_of[av]:
+            chain = self.chains[self.chain_of[au]]
+            ru, rv = self.chain_rank[au], self.chain_rank[av]
+            best = abs(self.chain_pos[au] - self.chain_pos[av])
+            middle = chain['nodes'][ru:rv + 1] if ru < rv else chain['nodes'][rv:ru + 1][::-1]
+
+        for s in range(2):
+            for t in range(2):
+                i, j = self.portal_junction[au, s], self.portal_junction[av, t]
+                cost = self.portal_cost[au, s] + self.core_distances[i, j] + self.portal_cost[av, t]
+
+                if cost < best:
+                    best = cost
+                    middle = (
+                        self._walk_to_portal(au, s)[:-1] +
+                        self._walk_core(i, j) +
+                        self._walk_to_portal(av, t)[-2::-1]
+                    )
+
+        if middle is None:
+            return []
+
+        return self._walk_up(u, au)[:-1] + middle + self._walk_up(v, av)[-2::-1]
+
+    def leg(self, from_id: str, to_id: str) -> dict:
+        '''
+        Detailed leg between two nodes, in the same shape FIND_PATH returns.
+
+        Reconstructed legs are memoized (in both directions), so repeated legs across
+        requests are served without recomputing the path.
+
+        Returns:
+            Dictionary with `from_location`, `to_location`, `distance` and the ground
+            level (z = 0) nodes of the `path`
+
+        Raises:
+            AssertionError: If there is no path between the nodes
+        '''
+        key = (from_id, to_id) if from_id <= to_id else (to_id, from_id)
+
+        with self._legs_lock:
+            nodes = self._legs.get(key)
+            if nodes is not None:
+                self._legs.move_to_end(key)
+
+        if nodes is None:
+            u, v = self.indices(list(key))
+            nodes = self.path(u, v)
+
+            with self._legs_lock:
+                self._legs[key] = nodes
+                if len(self._legs) > self.max_cached_legs:
+                    self._legs.popitem(last=False)
+
+        assert nodes, f'Location {to_id} is not reachable from {from_id}'
+
+        if key[0] != from_id:
+            nodes = nodes[::-1]
+
+        return {
+            'from_location': from_id,
+            'to_location': to_id,
+            'distance': sum(self.adjacency[a][b] for a, b in zip(nodes, nodes[1:])) if nodes else np.inf,
+            'path': [self.properties[n] for n in nodes if self.properties[n].get('z') == 0]
+        }
+
+
+_layout_model: Optional[LayoutModel] = None
+_layout_lock = Lock()
+
+def compiled_layout_model(tx: Transaction, name: str) -> LayoutModel:
+    '''
+    Snapshot compiled from a layout description, checked against the fingerprint recorded
+    when the database was seeded (databases seeded before fingerprints existed are trusted).
+    '''
+    assert name in LAYOUTS, f'Unknown layout {name}, use one of {sorted(LAYOUTS)}'
+    layout = compile_layout(LAYOUTS[name])
+
+    record = tx.run(GET_LAYOUT_FINGERPRINT).single()
+    if record is not None:
+        assert record['fingerprint'] == layout.fingerprint, (
+            f'The database holds the {record["name"]} layout, not the compiled {name} layout'
+        )
+    return LayoutModel.from_layout(layout)
+
+def get_layout_model(tx: Transaction, refresh: bool = False, layout: Optional[str] = None) -> LayoutModel:
+    '''
+    Shared layout snapshot, built on first use.
+
+    Args:
+        tx: Database transaction object
+        refresh: Reload the snapshot even if one is already cached (default: False)
+        layout: Name of the layout description to compile the snapshot from, the whole
+            graph is pulled from the database if not given (default: None)
+    '''
+    global _layout_model
+
+    with _layout_lock:
+        if _layout_model is None or refresh:
+            _layout_model = compiled_layout_model(tx, layout) if layout else LayoutModel.load(tx)
+
+        return _layout_model
+
+def clear_layout_model() -> None:
+    '''Drop the cached snapshot, the next request reloads it.'''
+    global _layout_model
+
+    with _layout_lock:
+        _layout_model = None
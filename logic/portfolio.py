@@ -0,0 +1,183 @@
+import math
+from bisect import bisect_left
+from dataclasses import dataclass
+from itertools import product
+from threading import Lock
+from typing import Callable, Optional
+from logic.routing_operations import Tour, objective_value
+from logic.solver_budget import SolverBudget, plan_budget
+from logic.decomposition import route_length
+
+# OR-Tools configurations raced, as (first solution strategy, metaheuristic) enum names
+FIRST_SOLUTION_STRATEGIES = ('SAVINGS', 'CHRISTOFIDES', 'PARALLEL_CHEAPEST_INSERTION', 'PATH_CHEAPEST_ARC')
+METAHEURISTICS = ('GUIDED_LOCAL_SEARCH', 'SIMULATED_ANNEALING', 'TABU_SEARCH')
+PORTFOLIO = tuple(product(FIRST_SOLUTION_STRATEGIES, METAHEURISTICS))
+
+# Largest number of nodes of every size bucket, larger problems share the last bucket
+SIZE_BUCKETS = (12, 25, 50, 100, 200)
+# Races of a bucket before its most winning configuration becomes the default
+MIN_RACES = 5
+# Seconds past the time limit the race waits for the workers, to cover the transfers
+RACE_GRACE = 0.5
+
+
+def size_bucket(num_nodes: int) -> int:
+    '''Index of the size bucket of a problem with num_nodes nodes.'''
+    return bisect_left(SIZE_BUCKETS, num_nodes)
+
+
+class PortfolioStats:
+    '''
+    Races run and won by every configuration of the portfolio, per size bucket.
+
+    Configurations are ranked by their smoothed win rate, (wins + 1) / (races + 2), so the
+    ones seldom raced in a bucket still get a chance against the usual winners.
+    '''
+    def __init__(self):
+        self.races = dict()
+        self.wins = dict()
+        self._lock = Lock()
+
+    def record(self, num_nodes: int, raced: list[tuple[str, str]], winner: tuple[str, str]) -> None:
+        bucket = size_bucket(num_nodes)
+
+        with self._lock:
+            for config in raced:
+                self.races[bucket, config] = self.races.get((bucket, config), 0) + 1
+            self.wins[bucket, winner] = self.wins.get((bucket, winner), 0) + 1
+
+    def ranking(self, num_nodes: int) -> list[tuple[str, str]]:
+        '''Configurations of the portfolio, the most promising for the size first.'''
+        bucket = size_bucket(num_nodes)
+
+        def win_rate(config: tuple[str, str]) -> float:
+            return (self.wins.get((bucket, config), 0) + 1) / (self.races.get((bucket, config), 0) + 2)
+
+        with self._lock:
+            return sorted(PORTFOLIO, key=win_rate, reverse=True)
+
+    def preferred(self, num_nodes: int, min_races: int = MIN_RACES) -> Optional[tuple[str, str]]:
+        '''Configuration with the most wins for the size, None until the bucket has min_races races.'''
+        bucket = size_bucket(num_nodes)
+
+        with self._lock:
+            wins = {config: n for (b, config), n in self.wins.items() if b == bucket}
+
+        if sum(wins.values()) < min_races:
+            return None
+        return max(wins, key=wins.get)
+
+
+_stats = PortfolioStats()
+
+def get_portfolio_stats() -> PortfolioStats:
+    '''Process-wide statistics of the races.'''
+    return _stats
+
+
+@dataclass
+class PortfolioResult:
+    tours: list[Tour]
+    config: tuple[str, str]
+
+
+def preferred_budget(
+        num_nodes: int,
+        num_vehicles: int = 1,
+        latency_target: Optional[float] = None,
+        stats: Optional[PortfolioStats] = None
+    ) -> Optional[SolverBudget]:
+    '''
+    Budget planned for the size with the strategies that win most races at that size.
+
+    Orders small enough for a greedy descent keep it, a metaheuristic would only spend the
+    whole time limit. None when the bucket has not been raced enough.
+    '''
+    config = (stats or get_portfolio_stats()).preferred(num_nodes)
+    budget = plan_budget(num_nodes, num_vehicles, latency_target)
+
+    if config is None or budget.local_search_metaheuristic == 'GREEDY_DESCENT':
+        return None
+
+    budget.first_solution_strategy, budget.local_search_metaheuristic = config
+    return budget
+
+def race(
+        distance_matrix: list[list[float]],
+        start_index: int,
+        dest_index: int,
+        num_vehicles: int,
+        race_many: Callable[[list[dict], float], list[Optional[list[Tour]]]],
+        parallelism: int,
+        size: int = 4,
+        latency_target: Optional[float] = None,
+        objective: str = 'distance',
+        stats: Optional[PortfolioStats] = None,
+        solver_params: Optional[dict] = None
+    ) -> PortfolioResult:
+    '''
+    Race the most promising OR-Tools configurations for the problem size under one deadline.
+
+    The deadline is the time limit plan_budget gives the problem. Configurations that do not
+    all fit on the workers at once share it in rounds, each getting a slice of the time.
+
+    Args:
+        distance_matrix: Distances between every node
+        start_index: Matrix index of the start
+        dest_index: Matrix index of the destination
+        num_vehicles: Number of distinct picking routes
+        race_many: Runs run_solver jobs until a deadline, such as SolverExecutor.race
+        parallelism: Number of jobs race_many runs at the same time
+        size: Number of configurations raced (default: 4)
+        latency_target: Maximum seconds the race may take (default: None)
+        objective: What the routes minimize, one of OBJECTIVES (default: 'distance')
+        stats: Statistics ranking the configurations and recording the winner
+            (default: the process-wide ones)
+        solver_params: Extra keyword arguments of ORToolsSolver given to every configuration,
+            such as a warm start. The budget is set by the race (default: None)
+
+    Returns:
+        PortfolioResult with the best routes found and the configuration that found them
+    '''
+    solver_params = solver_params or dict()
+    assert 'budget' not in solver_params, 'A portfolio plans the budget of every configuration it races'
+
+    stats = stats or get_portfolio_stats()
+    num_nodes = len(distance_matrix)
+    configs = stats.ranking(num_nodes)[:size]
+
+    base = plan_budget(num_nodes, num_vehicles, latency_target)
+    time_limit = base.time_limit / math.ceil(len(configs) / max(parallelism, 1))
+    plateau_time = min(base.plateau_time, time_limit) if base.plateau_time is not None else None
+
+    jobs = [
+        {
+            'solver': 'ortools',
+            'distance_matrix': distance_matrix,
+            'start_index': start_index,
+            'dest_index': dest_index,
+            'num_vehicles': num_vehicles,
+            'solver_params': {
+                **solver_params,
+                'budget': SolverBudget(time_limit, first, metaheuristic, base.solution_limit, plateau_time),
+                'objective': objective
+            }
+        }
+        for first, metaheuristic in configs
+    ]
+
+    best = None
+    for config, tours in zip(configs, race_many(jobs, base.time_limit + RACE_GRACE)):
+        if tours is None or not all(tour.tour for tour in tours):
+            continue
+
+        # Costs are compared on the float distances, OR-Tools reports truncated ones
+        tours = [Tour(tour.tour, route_length(distance_matrix, tour.tour)) for tour in tours]
+        value = objective_value([tour.optimal_value for tour in tours], objective)
+        if best is None or value < best[0]:
+            best = (value, PortfolioResult(tours, config))
+
+    assert best is not None, 'No configuration of the portfolio found routes'
+
+    stats.record(num_nodes, configs, best[1].config)
+    return best[1]
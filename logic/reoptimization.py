@@ -0,0 +1,197 @@
+import numpy as np
+from typing import Optional
+from logic.inventory_index import InventoryIndex
+from logic.layout_model import LayoutModel
+from logic.routing_operations import TSPSolver, get_distance_matrix
+
+# Seconds of local search after the insertions, enough for tours of a few dozen stops
+REOPTIMIZATION_LATENCY = 0.05
+
+
+class TourUpdate:
+    '''
+    Changes to the lines of a tour a picker is already walking, without routing it again.
+
+    The tour runs from the picker's position through the storages of the remaining lines,
+    in their order, to the destination. Removed quantities come off the last lines of their
+    product, and storages left without lines are dropped. Added quantities are covered by
+    cheapest insertion, as RouteAwareAllocation builds tours: at each step the storage with
+    the lowest insertion cost per unit it covers joins the tour, and storages already on
+    it cost nothing. Stock promised to the remaining lines is not allocated again.
+    '''
+    def __init__(
+            self,
+            layout: LayoutModel,
+            inventory: InventoryIndex,
+            lines: list[dict],
+            position: str,
+            dest_id: str,
+            max_candidates: Optional[int] = 50
+        ):
+        '''
+        Args:
+            layout: Layout snapshot used to measure distances
+            inventory: Inventory snapshot with the stock of every storage
+            lines: Remaining allocation lines (product_id, quantity, storage_id, take), in
+                picking order
+            position: Node the picker stands at
+            dest_id: Node of destination id
+            max_candidates: Storages off the tour considered per insertion, the closest to
+                the picker, all of them when None (default: 50)
+        '''
+        self.layout = layout
+        self.inventory = inventory
+        self.lines = [dict(line) for line in lines]
+        self.position = position
+        self.dest_id = dest_id
+        self.max_candidates = max_candidates
+
+        stops = dict.fromkeys(line['storage_id'] for line in self.lines if line['storage_id'] != position)
+        self.route = [position] + list(stops) + [dest_id]
+
+    def remove(self, product_id: str, quantity: int) -> None:
+        for line in reversed(self.lines):
+            if quantity == 0:
+                break
+
+            if line['product_id'] == product_id:
+                take = min(line['take'], quantity)
+                line['take'] -= take
+                quantity -= take
+
+        assert quantity == 0, f'Cannot remove {product_id}, {quantity} more than the tour takes'
+
+        self.lines = [line for line in self.lines if line['take'] > 0]
+        remaining = {line['storage_id'] for line in self.lines}
+        self.route = [self.route[0]] + [id_ for id_ in self.route[1:-1] if id_ in remaining] + [self.route[-1]]
+
+    def insertion(self, storage_ids: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        '''Cheapest insertion cost of every storage into the tour and the position it goes after.'''
+        columns = self.layout.distance_block(storage_ids, self.route)
+        route_distances = self.layout.distance_block(self.route, self.route)
+        edges = route_distances[np.arange(len(self.route) - 1), np.arange(1, len(self.route))]
+
+        costs = columns[:, :-1] + columns[:, 1:] - edges[None, :]
+        positions = np.argmin(costs, axis=1)
+        return costs[np.arange(len(storage_ids)), positions], positions
+
+    def add(self, product_id: str, quantity: int) -> None:
+        assert product_id in self.inventory.products, f'Warehouse has no registered product: {product_id}'
+        product = self.inventory.products[product_id]
+
+        promised = dict()
+        for line in self.lines:
+            if line['product_id'] == product_id:
+                promised[line['storage_id']] = promised.get(line['storage_id'], 0) + line['take']
+
+        # Spare stock of every storage, closest to the picker first
+        order, _ = self.inventory.sorted_stock(product_id, self.position)
+        spare = dict()
+        for i in order:
+            storage_id = product['storage_ids'][i]
+            spare[storage_id] = spare.get(storage_id, 0) + int(product['quantities'][i])
+        for storage_id, take in promised.items():
+            spare[storage_id] = spare.get(storage_id, 0) - take
+
+        available = sum(max(q, 0) for q in spare.values())
+        assert available >= quantity, f'Insufficient PRODUCT offer: {product_id} needs {quantity}, {available} available'
+
+        while quantity > 0:
+            on_route = set(self.route)
+            candidates = [id_ for id_, q in spare.items() if q > 0 and id_ in on_route]
+            off_route = [id_ for id_, q in spare.items() if q > 0 and id_ not in on_route]
+            candidates += off_route[:self.max_candidates] if self.max_candidates is not None else off_route
+
+            costs, positions = self.insertion(candidates)
+            costs[[k for k, id_ in enumerate(candidates) if id_ in on_route]] = 0
+            covered = np.array([min(spare[id_], quantity) for id_ in candidates])
+            best = int(np.argmin(costs / covered))
+
+            storage_id, take = candidates[best], int(covered[best])
+            if storage_id not in on_route:
+                self.route.insert(int(positions[best]) + 1, storage_id)
+
+            line = next(
+                (line for line in self.lines if line['storage_id'] == storage_id and line['product_id'] == product_id),
+                None
+            )
+            if line is None:
+                stock = sum(
+                    int(product['quantities'][i]) for i, id_ in enumerate(product['storage_ids']) if id_ == storage_id
+                )
+                self.lines.append({'product_id': product_id, 'quantity': stock, 'storage_id': storage_id, 'take': 0})
+                line = self.lines[-1]
+
+            line['take'] += take
+            spare[storage_id] -= take
+            quantity -= take
+
+    def optimize(self, latency_target: float = REOPTIMIZATION_LATENCY) -> tuple[list[int], dict[str, int]]:
+        '''
+        Short local search from the current tour, kept only if it is shorter.
+
+        Returns:
+            Tuple with the tour as matrix indices and the node to index mapping of the
+            lines, like solve_routes and get_distance_matrix
+        '''
+        distance_matrix, node_to_index = get_distance_matrix(
+            None, self.lines, self.position, self.dest_id, layout=self.layout
+        )
+        tour = [node_to_index[id_] for id_ in self.route]
+
+        if len(self.route) > 3:
+            solution = TSPSolver(
+                distance_matrix,
+                tour[0],
+                tour[-1],
+                latency_target=latency_target,
+                initial_routes=[tour[1:-1]]
+            )()[0]
+
+            def length(nodes: list[int]) -> float:
+                return sum(distance_matrix[a][b] for a, b in zip(nodes, nodes[1:]))
+
+            if solution.tour and length(solution.tour) < length(tour):
+                tour = solution.tour
+                index_to_node = list(node_to_index)
+                self.route = [index_to_node[i] for i in tour]
+
+        return tour, node_to_index
+
+
+def update_tour(
+        layout: LayoutModel,
+        inventory: InventoryIndex,
+        lines: list[dict],
+        position: str,
+        dest_id: str,
+        added: Optional[dict[str, int]] = None,
+        removed: Optional[dict[str, int]] = None,
+        latency_target: float = REOPTIMIZATION_LATENCY
+    ) -> tuple[list[int], dict[str, int], list[dict]]:
+    '''
+    Apply line changes to a tour in progress, see TourUpdate.
+
+    Args:
+        layout: Layout snapshot
+        inventory: Inventory snapshot
+        lines: Remaining allocation lines of the tour, in picking order
+        position: Node the picker stands at
+        dest_id: Node of destination id
+        added: Dictionary mapping product IDs to the quantities added (default: None)
+        removed: Dictionary mapping product IDs to the quantities removed (default: None)
+        latency_target: Seconds of local search after the changes (default: REOPTIMIZATION_LATENCY)
+
+    Returns:
+        Tuple with the new tour as matrix indices, the node to index mapping and the new lines
+    '''
+    update = TourUpdate(layout, inventory, lines, position, dest_id)
+
+    for product_id, quantity in (removed or dict()).items():
+        update.remove(product_id, quantity)
+    for product_id, quantity in (added or dict()).items():
+        if quantity > 0:
+            update.add(product_id, quantity)
+
+    tour, node_to_index = update.optimize(latency_target)
+    return tour, node_to_index, update.lines
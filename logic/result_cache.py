@@ -0,0 +1,91 @@
+import json
+from collections import OrderedDict
+from threading import Lock
+from time import time
+from typing import Any, Hashable, Optional
+
+
+class ResultCache:
+    '''
+    Bounded LRU cache whose entries also expire after a time to live.
+
+    Keys carry the generation of the inventory snapshot the result was computed from, so
+    entries become unreachable once the snapshot is reloaded: right after a stock change
+    made through the backend, and at most the snapshot maximum age after changes made by
+    other processes. The time to live is kept within that age.
+    '''
+    def __init__(self, max_size: int, ttl: Optional[float] = None):
+        '''
+        Args:
+            max_size: Number of entries kept, nothing is cached when 0
+            ttl: Seconds an entry is served for, forever when None (default: None)
+        '''
+        assert max_size >= 0, 'Cache size cannot be negative'
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and self.ttl is not None and time() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_size == 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time(), value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def normalize_product_list(product_list: dict[str, int]) -> tuple[tuple[str, int], ...]:
+    '''Product list as sorted (product ID, quantity) pairs, without empty lines.'''
+    return tuple(sorted((product_id, int(quantity)) for product_id, quantity in product_list.items() if quantity > 0))
+
+def picking_key(
+        product_list: dict[str, int],
+        config: dict,
+        layout_fingerprint: Optional[str],
+        inventory_generation: int
+    ) -> tuple:
+    '''
+    Cache key of a picking optimization.
+
+    Args:
+        product_list: Dictionary mapping product IDs to quantities
+        config: Routing configuration (start_id, dest_id, num_routes, solver, solver
+            parameters, allocation), any JSON-like values
+        layout_fingerprint: Fingerprint of the layout snapshot, None when pulled from the database
+        inventory_generation: Generation of the inventory snapshot the result is computed from
+    '''
+    return (
+        normalize_product_list(product_list),
+        json.dumps(config, sort_keys=True, default=repr),
+        layout_fingerprint,
+        inventory_generation
+    )
@@ -1,15 +1,26 @@
 import numpy as np
-import random
-from neo4j import Record, Transaction
+from dataclasses import replace
+from time import time
+from typing import Optional
+from neo4j import Transaction
+from logic.layout_model import LayoutModel
+from logic.solver_budget import SolverBudget, ImprovementPlateau, SolutionTrace, plan_budget
+from logic.aisle_heuristics import aisle_sequence, AISLE_HEURISTICS
 from graph_db.queries.manipulation_queries import NODE_DISTANCES, NODE_DISTANCE_EXHAUSTIVE, FIND_PATH
 from ortools.constraint_solver import routing_enums_pb2, pywrapcp
 
+# What TSPSolver minimizes over its routes: their total length, or the longest one
+OBJECTIVES = ('distance', 'makespan')
+# Cost of every unit of the longest route in the makespan objective, the total distance breaks ties
+SPAN_COST_COEFFICIENT = 100
+
 def get_distance_matrix(
         tx: Transaction, 
-        storage_locations: list[Record], 
+        storage_locations: list[dict], 
         start_id: str = 'start',
         dest_id: str = 'dest1', 
-        exhaustive: bool = False
+        exhaustive: bool = False,
+        layout: Optional[LayoutModel] = None
     ) -> tuple[list[list[float]], dict[str, int]]:
     '''
     Compute distances between storage locations and create a lookup mapping.
@@ -19,6 +30,8 @@ def get_distance_matrix(
         storage_locations: List of storage location records
         dest_id: Destination node identifier (default: 'dest1')
         exhaustive: Whether to use exhaustive distance calculation (default: False)
+        layout: In-memory layout snapshot, when given the matrix is sliced from it
+            and no query is sent (default: None)
 
     Returns:
         Tuple containing:
@@ -29,6 +42,13 @@ def get_distance_matrix(
     matrix_size = len(storage_ids)
     
     node_to_index = {id_: i for i, id_ in enumerate(storage_ids)}
+
+    if layout is not None:
+        distance_matrix = layout.distance_submatrix(storage_ids)
+        assert np.isfinite(distance_matrix).all(), 'Some locations are not reachable from each other'
+
+        return distance_matrix.tolist(), node_to_index
+
     distance_matrix = [[0] * matrix_size for _ in range(matrix_size)]
     
     query = NODE_DISTANCES if not exhaustive else NODE_DISTANCE_EXHAUSTIVE
@@ -48,6 +68,33 @@ def get_distance_matrix(
     return distance_matrix, node_to_index
 
 
+def slice_distance_matrix(
+        distance_matrix: list[list[float]],
+        node_to_index: dict[str, int],
+        storage_locations: list[dict],
+        start_id: str = 'start',
+        dest_id: str = 'dest1'
+    ) -> tuple[list[list[float]], dict[str, int]]:
+    '''
+    Distance matrix of a subset of the nodes of a larger one, laid out like get_distance_matrix.
+
+    Args:
+        distance_matrix: Distances between every node of node_to_index
+        node_to_index: Dictionary mapping node IDs to their matrix indices
+        storage_locations: Storage location records of the subset
+        start_id: Node of starting id (default: 'start')
+        dest_id: Node of destination id (default: 'dest1')
+
+    Returns:
+        Tuple with the sliced distance matrix and its node to index mapping
+    '''
+    storage_ids = list({loc['storage_id'] for loc in storage_locations} | {start_id, dest_id})
+    indices = np.array([node_to_index[id_] for id_ in storage_ids])
+
+    sliced = np.asarray(distance_matrix)[np.ix_(indices, indices)]
+    return sliced.tolist(), {id_: i for i, id_ in enumerate(storage_ids)}
+
+
 class Tour:
     def __init__(self, tour, optimal_value):
         self.tour = tour
@@ -60,12 +107,46 @@ class TSPSolver:
             distance_matrix: list[list[float]], 
             start_index: int, 
             dest_index: int, 
-            num_vehicles: int = 1
+            num_vehicles: int = 1,
+            budget: Optional[SolverBudget] = None,
+            latency_target: Optional[float] = None,
+            initial_routes: Optional[list[list[int]]] = None,
+            warm_start: Optional[str] = None,
+            locations: Optional[list[dict]] = None,
+            trace: Optional[list[tuple[float, float]]] = None,
+            objective: str = 'distance'
         ):
+        '''
+        Args:
+            budget: Search limits, planned from the problem size when not given
+            latency_target: Maximum seconds the solve may take
+            initial_routes: Routes (node indices, start and destination excluded) to
+                start the search from
+            warm_start: Aisle heuristic used to build the initial routes
+            locations: Aisle attributes of every node, needed by warm_start
+            trace: List the seconds and objective of every solution found are appended to
+            objective: What is minimized, one of OBJECTIVES: the total distance with about
+                the same number of stops per route, or the longest route (makespan)
+        '''
+        assert objective in OBJECTIVES, f'Unknown objective: {objective}. Available objectives: {list(OBJECTIVES)}'
         
         self.data = self.create_data_model(
             distance_matrix, start_index, dest_index, num_vehicles
         )
+        self.budget = budget or plan_budget(
+            len(self.data['distance_matrix']), num_vehicles, latency_target
+        )
+
+        if warm_start is not None:
+            initial_routes = [
+                tour.tour[1:-1] 
+                for tour in AisleHeuristicSolver(
+                    distance_matrix, start_index, dest_index, num_vehicles, locations, warm_start
+                )()
+            ]
+        self.initial_routes = initial_routes
+        self.trace = trace
+        self.objective = objective
 
     def create_data_model(
             self, 
@@ -104,6 +185,11 @@ class TSPSolver:
     
     def __call__(self) -> list[Tour]:
         '''Entry point of the program.'''
+        if self.objective == 'makespan' and self.initial_routes is None and self.data['num_vehicles'] > 1:
+            return self.solve_makespan()
+
+        started = time()
+
         # Create the routing index manager.
         manager = pywrapcp.RoutingIndexManager(
             len(self.data['distance_matrix']), 
@@ -124,7 +210,7 @@ class TSPSolver:
 
         def get_route_cost(route):
             return sum(
-                [distance_callback(route[i], route[i + 1]) for i in range(len(route) - 1)]
+                [self.data['distance_matrix'][route[i]][route[i + 1]] for i in range(len(route) - 1)]
             )
         
         transit_callback_index = routing.RegisterTransitCallback(distance_callback)
@@ -132,64 +218,74 @@ class TSPSolver:
         # Define cost of each arc.
         routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
         
-        # theory_max = sum(max(row) for row in self.data['distance_matrix'])
-        # theory_min = sum(min(x for x in row if x > 0) for row in self.data['distance_matrix'])
-
-        # # Add distance dimension
-        # dimension_name = 'Distance'
-        # routing.AddDimension(
-        #     transit_callback_index,
-        #     0,  # no slack
-        #     theory_max, # maximum distance per vehicle
-        #     True,  # start cumul to zero
-        #     dimension_name)
-        # distance_dimension = routing.GetDimensionOrDie(dimension_name)
-        
-        # print(theory_min//self.data['num_vehicles'])
-        # print(theory_max//self.data['num_vehicles'])
-
-        # for vehicle_idx in range(self.data['num_vehicles']):
-        #     routing.AddVariableMinimizedByFinalizer(
-        #         distance_dimension.CumulVar(routing.End(vehicle_idx))
-        #     )
-        
-        # Use Global Span Cost Coefficient to minimize the longest route
-        # distance_dimension.SetGlobalSpanCostCoefficient(int(1000))
+        if self.objective == 'makespan':
+            # Upper bound of any route: leaving every node by its longest edge
+            route_capacity = sum(max(row) for row in self.data['distance_matrix'])
+
+            dimension_name = 'Distance'
+            routing.AddDimension(
+                transit_callback_index,
+                0,  # no slack
+                route_capacity,
+                True,  # start cumul to zero
+                dimension_name
+            )
+            distance_dimension = routing.GetDimensionOrDie(dimension_name)
+
+            # Global span cost: every route starts at zero, so the span is the longest route
+            distance_dimension.SetGlobalSpanCostCoefficient(SPAN_COST_COEFFICIENT)
+        else:
+            dimension_name = 'Counter'
+            routing.AddVectorDimension(
+                self.data['visit_counter'],
+                manager.GetNumberOfNodes(),
+                True,  # start cumul to zero
+                dimension_name
+            )
+            counter_dimension = routing.GetDimensionOrDie(dimension_name)
+            num_visit = sum(self.data['visit_counter']) // manager.GetNumberOfVehicles()
 
+            # Routes with many more stops than the others are penalized
+            for vehicle_idx in range(self.data['num_vehicles']):
+                index = routing.End(vehicle_idx)
+                counter_dimension.SetCumulVarSoftUpperBound(index, num_visit + 1, int(1e9))
 
-        dimension_name = 'Counter'
-        routing.AddVectorDimension(
-            self.data['visit_counter'],
-            manager.GetNumberOfNodes(),
-            True,  # start cumul to zero
-            dimension_name
-        )
-        counter_dimension = routing.GetDimensionOrDie(dimension_name)
-        num_visit = sum(self.data['visit_counter']) // manager.GetNumberOfVehicles()
-        # print(f'num of visit per vehicle: {num_visit}')
-
-        # Create and set the objective function
-        for vehicle_idx in range(self.data['num_vehicles']):
-            index = routing.End(vehicle_idx)
-            #counter_dimension.SetCumulVarSoftLowerBound(index, num_visit//4, int(1e9))
-            counter_dimension.SetCumulVarSoftUpperBound(index, num_visit + 1, int(1e9))
-        
-        # Set the cost of each route to be its length
         routing.SetPrimaryConstrainedDimension(dimension_name)
-        
 
-        # Setting first solution heuristic.
+        # Setting first solution heuristic and search limits from the budget.
         search_parameters = pywrapcp.DefaultRoutingSearchParameters()
-        search_parameters.first_solution_strategy = (
-            routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
+        search_parameters.first_solution_strategy = getattr(
+            routing_enums_pb2.FirstSolutionStrategy, self.budget.first_solution_strategy
         )
-        search_parameters.local_search_metaheuristic = (
-            routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+        search_parameters.local_search_metaheuristic = getattr(
+            routing_enums_pb2.LocalSearchMetaheuristic, self.budget.local_search_metaheuristic
         )
-        search_parameters.time_limit.seconds = 5
+        search_parameters.time_limit.FromMilliseconds(int(self.budget.time_limit * 1000))
+
+        if self.budget.solution_limit is not None:
+            search_parameters.solution_limit = self.budget.solution_limit
+
+        if self.budget.plateau_time is not None:
+            routing.AddAtSolutionCallback(
+                ImprovementPlateau(routing, self.budget.plateau_time)
+            )
 
-        # Solve the problem.
-        solution = routing.SolveWithParameters(search_parameters)
+        if self.trace is not None:
+            routing.AddAtSolutionCallback(SolutionTrace(routing, self.trace, started))
+
+        # Solve the problem, from the initial routes when there are some.
+        initial_solution = None
+        if self.initial_routes is not None:
+            routing.CloseModelWithParameters(search_parameters)
+            initial_solution = routing.ReadAssignmentFromRoutes(
+                [[manager.NodeToIndex(node) for node in route] for route in self.initial_routes],
+                True
+            )
+
+        if initial_solution is not None:
+            solution = routing.SolveFromAssignmentWithParameters(initial_solution, search_parameters)
+        else:
+            solution = routing.SolveWithParameters(search_parameters)
 
         if solution:
             routes = self.get_routes(manager, routing, solution)
@@ -199,11 +295,47 @@ class TSPSolver:
             ]
         
         return [Tour([], 0)]
+
+    def solve_makespan(self) -> list[Tour]:
+        '''
+        Minimize the longest route in two phases, each with half of the time limit.
+
+        The span cost says little about which stops to move from a first solution, so the
+        search starts from routes of minimal total distance with balanced numbers of stops,
+        and only improves the longest of them from there.
+        '''
+        time_limit = self.budget.time_limit / 2
+        plateau_time = min(self.budget.plateau_time, time_limit) if self.budget.plateau_time is not None else None
+        half = replace(self.budget, time_limit=time_limit, plateau_time=plateau_time)
+
+        start_index, dest_index = self.data['starts'][0], self.data['ends'][0]
+        balanced = TSPSolver(
+            self.data['distance_matrix'], start_index, dest_index, self.data['num_vehicles'], budget=half
+        )()
+        if not all(tour.tour for tour in balanced):
+            return balanced
+
+        makespan = TSPSolver(
+            self.data['distance_matrix'],
+            start_index,
+            dest_index,
+            self.data['num_vehicles'],
+            budget=half,
+            initial_routes=[tour.tour[1:-1] for tour in balanced],
+            trace=self.trace,
+            objective='makespan'
+        )()
+        return makespan if all(tour.tour for tour in makespan) else balanced
     
 
+def objective_value(lengths: list[float], objective: str = 'distance') -> float:
+    '''Value of routes of the given lengths under an objective of OBJECTIVES.'''
+    return max(lengths, default=0) if objective == 'makespan' else sum(lengths)
+
+
 def get_picking_summary(
         tour: list, 
-        storage_locations: list[Record],
+        storage_locations: list[dict],
         node_to_index: dict[str, int]
     ) -> list[dict[str, str | int]]:
     '''
@@ -224,7 +356,7 @@ def get_picking_summary(
         for loc in storage_locations 
         if (i := node_to_index[loc['storage_id']]) in tour_nodes
     ]
-    summary = [loc.data() for loc, _ in sorted(locations, key=lambda x: x[1], reverse=False)]
+    summary = [dict(loc) for loc, _ in sorted(locations, key=lambda x: x[1], reverse=False)]
     
     return summary
 
@@ -232,17 +364,27 @@ def get_picking_summary(
 def find_path(
         tx: Transaction, 
         tour: list[int], 
-        node_to_index: dict[str, int]
+        node_to_index: dict[str, int],
+        layout: Optional[LayoutModel] = None
     ) -> list[dict]:
     '''
     Given a TSP tour (where every element is the index of a pallet to be visited) and
     the id to which each index refers to, this function returns a detailed path of
     the nodes that must be traveled to move from one pallet to another, from start to end.
+
+    When a layout snapshot is given, every leg is rebuilt from its predecessor tables
+    instead of running a Dijkstra per leg on the database.
     '''
 
     index_to_node = [x for x,_ in sorted(node_to_index.items(), key=lambda x: x[1])]
     sorted_nodes = [index_to_node[i] for i in tour]
 
+    if layout is not None:
+        return [
+            layout.leg(from_id, to_id) 
+            for from_id, to_id in zip(sorted_nodes, sorted_nodes[1:])
+        ]
+
     result = tx.run(
         FIND_PATH,
         sortedNodes=sorted_nodes
@@ -252,132 +394,309 @@ def find_path(
 
 
 class ACO:
-    def __init__(self, distance_matrix):
-        self.distance_matrix = distance_matrix
-
-    def get_distance(self, c1, c2) -> float:
-        return self.distance_matrix[c1][c2]
-
-    def get_cost(self, tour) -> float:
-        ''' Calcular costo de un tour dado '''
-        return sum(
-            [
-                self.get_distance(tour[i], tour[i + 1])
-                for i in range(len(tour) - 1)
-            ]
-        ) + self.get_distance(tour[-1], tour[0])
-
-    @staticmethod
-    def to_triag(i, j):
-        return (j * (j - 1))//2 + i
-    
-    def update_pheromones(self, pheromones: list[float],
-                        rho: float, solutions: list[dict]):
-        ''' Actualizar las feromonas con el factor de decadencia
-        y recompensando las rutas con menor costo'''
+    '''
+    Ant Colony Optimization solver, interchangeable with TSPSolver.
 
-        pheromones = list(map(lambda x: x * (1 - rho), pheromones))
+    The pheromone and heuristic information are NumPy matrices, and every ant of an
+    iteration is built at once: at each step the next stop of all ants is sampled in a
+    single vectorized pass. Tours are open, from the start to the destination, and with
+    several vehicles the best tour is split into routes with a balanced number of visits.
+    '''
+    def __init__(
+            self, 
+            distance_matrix: list[list[float]], 
+            start_index: int, 
+            dest_index: int, 
+            num_vehicles: int = 1,
+            alpha: float = 1,
+            beta: float = 8,
+            rho: float = 0.5,
+            max_iter: int = 50,
+            n_ants: int = 50,
+            seed: Optional[int] = None,
+            latency_target: Optional[float] = None,
+            trace: Optional[list[tuple[float, float]]] = None
+        ):
+        
+        self.distance_matrix = np.asarray(distance_matrix, dtype=float)
+        self.start_index = start_index
+        self.dest_index = dest_index
+        self.num_vehicles = num_vehicles
+        self.alpha = alpha
+        self.beta = beta
+        self.rho = rho
+        self.max_iter = max_iter
+        self.n_ants = n_ants
+        self.rng = np.random.default_rng(seed)
+        self.latency_target = latency_target
+        self.trace = trace
+
+    def get_costs(self, tours: np.ndarray) -> np.ndarray:
+        '''Cost of every tour (one per row) of an array of tours'''
+        return self.distance_matrix[tours[:, :-1], tours[:, 1:]].sum(axis=1)
+
+    def generate_tours(self, weights: np.ndarray, stops: np.ndarray) -> np.ndarray:
+        '''
+        Build one tour per ant, choosing every next stop with probability proportional
+        to the pheromone and heuristic weight of the arc that reaches it.
+        '''
+        n = len(self.distance_matrix)
+        ants = np.arange(self.n_ants)
+
+        tours = np.empty((self.n_ants, len(stops) + 2), dtype=np.int64)
+        tours[:, 0] = self.start_index
+        tours[:, -1] = self.dest_index
+
+        visited = np.ones((self.n_ants, n), dtype=bool)
+        visited[:, stops] = False
+        current = tours[:, 0]
+
+        for step in range(1, len(stops) + 1):
+            choices = np.where(visited, 0, weights[current])
+            
+            # Ants whose weights underflowed pick uniformly among the remaining stops
+            exhausted = choices.sum(axis=1) <= 0
+            choices[exhausted] = ~visited[exhausted]
+
+            cumulative = np.cumsum(choices, axis=1)
+            threshold = (1 - self.rng.random(self.n_ants)) * cumulative[:, -1]
+            current = (cumulative < threshold[:, None]).sum(axis=1)
+
+            tours[:, step] = current
+            visited[ants, current] = True
+
+        return tours
+
+    def update_pheromones(
+            self, 
+            pheromones: np.ndarray, 
+            tours: np.ndarray, 
+            costs: np.ndarray
+        ) -> np.ndarray:
+        '''Evaporate the pheromones and reward every arc in proportion to its tour quality'''
+        pheromones *= 1 - self.rho
 
-        for solution in solutions:
-            cities = solution['tour']
-            for i in range(len(cities) - 1, -1, -1):
-                k = self.to_triag(*sorted([cities[i], cities[i - 1]]))
-                pheromones[k] += 1 / solution['cost']
+        rewards = np.repeat(1 / np.maximum(costs, 1e-9), tours.shape[1] - 1)
+        np.add.at(pheromones, (tours[:, :-1].ravel(), tours[:, 1:].ravel()), rewards)
+        np.add.at(pheromones, (tours[:, 1:].ravel(), tours[:, :-1].ravel()), rewards)
 
         return pheromones
 
+    def solve(self) -> tuple[np.ndarray, float]:
+        '''Run the colony and return the best open tour found and its cost'''
+        n = len(self.distance_matrix)
+        stops = np.setdiff1d(np.arange(n), [self.start_index, self.dest_index])
+        best_tour = np.concatenate([[self.start_index], stops, [self.dest_index]])
+
+        if len(stops) < 2:
+            return best_tour, float(self.get_costs(best_tour[None, :])[0])
+
+        # Initial pheromone close to the reward of an average tour
+        positive = self.distance_matrix[self.distance_matrix > 0]
+        mean_distance = positive.mean() if positive.size else 1
+        pheromones = np.full((n, n), 1 / (n * mean_distance))
+        visibility = (1 / (self.distance_matrix + 1e-6)) ** self.beta
+
+        best_cost = np.inf
+        started = time()
+        for iteration in range(self.max_iter):
+            if iteration > 0 and self.latency_target is not None and time() - started > self.latency_target:
+                break
+
+            weights = pheromones ** self.alpha * visibility
+            tours = self.generate_tours(weights, stops)
+            costs = self.get_costs(tours)
+
+            i = np.argmin(costs)
+            if costs[i] < best_cost:
+                best_tour, best_cost = tours[i], costs[i]
+
+                if self.trace is not None:
+                    self.trace.append((time() - started, float(best_cost)))
+
+            # The best tour so far is reinforced as an extra ant (elitist strategy)
+            pheromones = self.update_pheromones(
+                pheromones,
+                np.vstack([tours, best_tour]),
+                np.append(costs, best_cost)
+            )
 
-    def get_choices(self, curr_tour: list[int],
-                    pheromones: list[float], a: float, b: float):
-        ''' Obtener las opciones restantes para la ruta
-        y su correspondiente heurística '''
-
-        choices = list()
-        remaining_cities_idx = set(range(len(self.distance_matrix[0]))) - set(curr_tour)
-
-        for i in remaining_cities_idx:
-            d = self.get_distance(self.distance_matrix, curr_tour[-1], i)
-
-            k = self.to_triag(*sorted([curr_tour[-1], i]))
-            history = pheromones[k] ** a
-
-            heuristic = (1 / (d + 1e-6)) ** b
-
-            prob = {
-                'city': i,
-                'prob': history * heuristic,
-            }
-            choices.append(prob)
-        return choices
-
-
-    @staticmethod
-    def select_next(choices: list[dict]):
-        ''' Seleccionar la siguiente ciudad en la ruta a partir
-        de las opciones dadas y sus heurísticas con aleatoriedad '''
-        p_sum = sum(map(lambda x: x['prob'], choices))
-
-        if p_sum == 0:
-            rand = np.random.randint(len(choices))
-            return choices[rand]['city']
+        return best_tour, float(best_cost)
 
-        return random.choices(
-            choices,
-            weights=list(map(lambda x: x['prob'], choices)),
-            k=1)[0]['city']
+    def __call__(self) -> list[Tour]:
+        tour, cost = self.solve()
 
+        if self.num_vehicles == 1:
+            return [Tour(tour.tolist(), cost)]
 
-    def generate_tour(self, pheromones: list[float], a: float, b: float):
-        ''' Generar un tour aleatorio considerando las feromonas actuales '''
+        return split_tour(self.distance_matrix, tour.tolist(), self.num_vehicles)
 
-        tour = [0]
 
-        for _ in range(len(self.distance_matrix[0]) - 1):
-            choices = self.get_choices(tour, pheromones, a, b)
-            tour.append(self.select_next(choices))
+def split_tour(
+        distance_matrix: np.ndarray, 
+        tour: list[int], 
+        num_vehicles: int
+    ) -> list[Tour]:
+    '''Split a single tour into routes with a balanced number of visits, all sharing its ends'''
+    start_index, dest_index = tour[0], tour[-1]
+    tours = list()
 
-        return tour
+    for chunk in np.array_split(np.array(tour[1:-1], dtype=np.int64), num_vehicles):
+        route = [start_index, *chunk.tolist(), dest_index]
+        cost = sum(distance_matrix[a][b] for a, b in zip(route, route[1:]))
+        tours.append(Tour(route, float(cost)))
 
-    def solve(self, a: float, b: float, rho: float, max_iter: int,
-            n_ants: int, debug: bool = True) -> dict:
-        ''' Implementación del algoritmo Ant Colony Optimization '''
+    return tours
 
-        n = len(self.distance_matrix[0])
-        # Inicializar una ruta aleatoria
-        tour = np.random.permutation(n)
 
-        best = {
-            'cost': self.get_cost(tour),
-            'tour': tour,
-        }
+class AisleHeuristicSolver:
+    '''
+    Routing by classic parallel-aisle heuristics (S-shape, return, largest gap and
+    combined), interchangeable with TSPSolver.
 
-        pheromones = [1.0 for _ in range(n*(n-1)//2)] # Inicializar feromonas
+    The heuristics only decide the visiting order, from the block, aisle and position of
+    every stop, so they run in O(n log n). Tour costs are measured on the distance matrix,
+    and stops outside any aisle are placed by cheapest insertion.
+    '''
+    method = 'combined'
 
-        for i in range(max_iter):
-            solutions = []
-            for j in range(n_ants):
-                # Generar una nueva ruta basada en las feromonas
-                tour = self.generate_tour(pheromones, a, b)
-                candidate = {
-                    'cost': self.get_cost(tour),
-                    'tour': tour,
-                }
+    def __init__(
+            self, 
+            distance_matrix: list[list[float]], 
+            start_index: int, 
+            dest_index: int, 
+            num_vehicles: int = 1,
+            locations: Optional[list[dict]] = None,
+            method: Optional[str] = None
+        ):
+        assert locations is not None, 'Aisle heuristics need the aisle attributes of every location'
+
+        self.distance_matrix = np.asarray(distance_matrix, dtype=float)
+        self.start_index = start_index
+        self.dest_index = dest_index
+        self.num_vehicles = num_vehicles
+        self.locations = locations
+        self.method = method or self.method
+
+    def insert(self, tour: list[int], stop: int) -> list[int]:
+        '''Insert a stop where it adds the least distance, keeping both ends in place'''
+        d = self.distance_matrix
+        tour_array = np.array(tour)
+        added = d[tour_array[:-1], stop] + d[stop, tour_array[1:]] - d[tour_array[:-1], tour_array[1:]]
+        position = int(np.argmin(added)) + 1
+        return tour[:position] + [stop] + tour[position:]
 
-                solutions.append(candidate)
+    def __call__(self) -> list[Tour]:
+        stops = [
+            i for i in range(len(self.distance_matrix)) 
+            if i not in (self.start_index, self.dest_index)
+        ]
+        sequence, unplaced = aisle_sequence(
+            stops, self.locations, self.locations[self.start_index]['x'], self.method
+        )
 
-                # Actualizar mejor solución
-                if candidate['cost'] < best['cost']:
-                    best = candidate
-                    if debug: print(f'New best found - {best}')
+        tour = [self.start_index, *sequence, self.dest_index]
+        for stop in unplaced:
+            tour = self.insert(tour, stop)
+
+        return split_tour(self.distance_matrix, tour, self.num_vehicles)
+
+
+class SShapeSolver(AisleHeuristicSolver):
+    method = 's_shape'
+
+class ReturnSolver(AisleHeuristicSolver):
+    method = 'return'
+
+class LargestGapSolver(AisleHeuristicSolver):
+    method = 'largest_gap'
+
+class CombinedSolver(AisleHeuristicSolver):
+    method = 'combined'
+
+
+SOLVERS = {
+    'ortools': TSPSolver,
+    'aco': ACO,
+    's_shape': SShapeSolver,
+    'return': ReturnSolver,
+    'largest_gap': LargestGapSolver,
+    'combined': CombinedSolver,
+}
+
+
+def run_solver(
+        solver: str,
+        distance_matrix: list[list[float]],
+        start_index: int,
+        dest_index: int,
+        num_vehicles: int,
+        solver_params: dict
+    ) -> list[Tour]:
+    '''Build and run a routing engine from SOLVERS.'''
+    return SOLVERS[solver](
+        distance_matrix, 
+        start_index=start_index,
+        dest_index=dest_index,
+        num_vehicles=num_vehicles,
+        **solver_params
+    )()
+
+
+def solver_job(
+        solver: str,
+        distance_matrix: list[list[float]],
+        node_to_index: dict[str, int],
+        start_id: str,
+        dest_id: str,
+        num_routes: int,
+        solver_params: dict,
+        layout: Optional[LayoutModel] = None
+    ) -> dict:
+    '''
+    Self-contained arguments of run_solver for a routing problem, so it can be
+    solved here or shipped to another process.
 
-            # Actualizar feromonas
-            pheromones = self.update_pheromones(pheromones, rho, solutions)
+    Args:
+        solver: Name of the routing engine, one of SOLVERS
+        distance_matrix: Distances between the nodes of node_to_index
+        node_to_index: Dictionary mapping node IDs to their matrix indices
+        start_id: Node of starting id
+        dest_id: Node of destination id
+        num_routes: Number of distinct picking routes
+        solver_params: Extra keyword arguments for the routing engine
+        layout: Layout snapshot, needed by the aisle heuristics (default: None)
+    '''
+    if solver in AISLE_HEURISTICS or solver_params.get('warm_start'):
+        assert layout is not None, f'Solver {solver} needs the warehouse layout snapshot'
+        solver_params = {**solver_params, 'locations': layout.aisle_attributes(list(node_to_index))}
+
+    return {
+        'solver': solver,
+        'distance_matrix': distance_matrix,
+        'start_index': node_to_index[start_id],
+        'dest_index': node_to_index[dest_id],
+        'num_vehicles': num_routes,
+        'solver_params': solver_params
+    }
+
+
+def solve_routes(
+        solver: str,
+        distance_matrix: list[list[float]],
+        node_to_index: dict[str, int],
+        start_id: str,
+        dest_id: str,
+        num_routes: int,
+        solver_params: dict,
+        layout: Optional[LayoutModel] = None
+    ) -> list[Tour]:
+    '''
+    Run the chosen routing engine over a distance matrix, see solver_job for the arguments.
 
-        return best
-    
-    def __call__(self, debug=True):
-        solution = self.solve(1, 8, 0.5, 50, 50, debug)
-        return Tour(
-            solution['tour'] + [0], 
-            solution['cost']
-        )
\ No newline at end of file
+    Returns:
+        One Tour per route
+    '''
+    return run_solver(**solver_job(
+        solver, distance_matrix, node_to_index, start_id, dest_id, num_routes, solver_params, layout
+    ))
@@ -0,0 +1,116 @@
+from dataclasses import dataclass
+from time import time
+from typing import Optional
+from ortools.constraint_solver import pywrapcp
+
+# Orders up to this many nodes are solved to a local optimum, no metaheuristic needed
+SMALL_ORDER_NODES = 12
+# Time limits are kept within these bounds (seconds), unless a latency target is tighter
+MIN_TIME_LIMIT = 0.05
+MAX_TIME_LIMIT = 30
+
+
+@dataclass
+class SolverBudget:
+    '''
+    Search limits and strategies for a single OR-Tools solve.
+
+    Strategies are given by their enum names in routing_enums_pb2, so budgets can be
+    written in request configs and benchmark reports as plain strings.
+    '''
+    time_limit: float
+    first_solution_strategy: str = 'PATH_CHEAPEST_ARC'
+    local_search_metaheuristic: str = 'GUIDED_LOCAL_SEARCH'
+    solution_limit: Optional[int] = None
+    plateau_time: Optional[float] = None
+
+
+def plan_budget(
+        num_nodes: int,
+        num_vehicles: int = 1,
+        latency_target: Optional[float] = None
+    ) -> SolverBudget:
+    '''
+    Choose the search limits for a routing problem from its size.
+
+    Args:
+        num_nodes: Number of nodes in the distance matrix (start and destination included)
+        num_vehicles: Number of routes to build (default: 1)
+        latency_target: Maximum seconds the solve may take (default: None)
+
+    Returns:
+        SolverBudget for the problem
+    '''
+    stops = max(num_nodes - 2, 0)
+
+    if stops <= 1:
+        # There is a single possible tour, the first solution is the optimum
+        budget = SolverBudget(
+            time_limit=MIN_TIME_LIMIT,
+            first_solution_strategy='PATH_CHEAPEST_ARC',
+            local_search_metaheuristic='GREEDY_DESCENT',
+            solution_limit=1
+        )
+    elif num_nodes <= SMALL_ORDER_NODES and num_vehicles == 1:
+        # Greedy descent stops by itself once no move improves the tour
+        budget = SolverBudget(
+            time_limit=0.5,
+            first_solution_strategy='PATH_CHEAPEST_ARC',
+            local_search_metaheuristic='GREEDY_DESCENT'
+        )
+    else:
+        # Guided local search never stops by itself, it is cut by the plateau monitor
+        time_limit = 0.1 + 5e-5 * num_nodes ** 2 * (1 + 0.25 * (num_vehicles - 1))
+        time_limit = min(max(time_limit, MIN_TIME_LIMIT), MAX_TIME_LIMIT)
+        budget = SolverBudget(
+            time_limit=time_limit,
+            first_solution_strategy='PATH_CHEAPEST_ARC',
+            local_search_metaheuristic='GUIDED_LOCAL_SEARCH',
+            plateau_time=max(0.1, 0.25 * time_limit)
+        )
+
+    if latency_target is not None:
+        budget.time_limit = max(min(budget.time_limit, latency_target), 0.001)
+
+        if budget.plateau_time is not None:
+            budget.plateau_time = min(budget.plateau_time, budget.time_limit)
+
+    return budget
+
+
+class ImprovementPlateau:
+    '''
+    Solution callback that finishes the search once the objective stops improving.
+
+    Every time the routing model finds a solution the best objective is updated. When
+    `plateau_time` seconds pass without a strict improvement the current search is
+    finished, and the best solution found so far is returned by the solver.
+    '''
+    def __init__(self, routing: pywrapcp.RoutingModel, plateau_time: float):
+        self.routing = routing
+        self.plateau_time = plateau_time
+        self.best_objective = None
+        self.last_improvement = time()
+
+    def __call__(self) -> None:
+        objective = self.routing.CostVar().Value()
+
+        if self.best_objective is None or objective < self.best_objective:
+            self.best_objective = objective
+            self.last_improvement = time()
+        elif time() - self.last_improvement > self.plateau_time:
+            self.routing.solver().FinishCurrentSearch()
+
+
+class SolutionTrace:
+    '''
+    Solution callback recording the anytime curve of a search: the seconds elapsed since
+    `started` and the objective of every solution found, appended to `trace`.
+    '''
+    def __init__(self, routing: pywrapcp.RoutingModel, trace: list[tuple[float, float]], started: float):
+        self.routing = routing
+        self.trace = trace
+        self.started = started
+
+    def __call__(self) -> None:
+        self.trace.append((time() - self.started, self.routing.CostVar().Value()))
@@ -0,0 +1,109 @@
+import numpy as np
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from threading import Lock
+from time import time
+from typing import Optional
+from logic.routing_operations import run_solver, Tour
+
+def compact_job(job: dict) -> dict:
+    '''
+    Copy of a solver job with its distance matrix as a float32 array, which pickles
+    as a single buffer instead of a list of Python floats per entry.
+    '''
+    return {**job, 'distance_matrix': np.asarray(job['distance_matrix'], dtype=np.float32)}
+
+
+class SolverExecutor:
+    '''
+    Pool of worker processes solving independent routing problems in parallel.
+
+    OR-Tools and the NumPy engines hold the GIL for most of a solve, so threads would
+    run them one after the other. Jobs are the dictionaries built by solver_job, and
+    workers are started with spawn so they never inherit the database driver.
+    '''
+    def __init__(self, max_workers: int):
+        assert max_workers >= 1, 'The executor needs at least one worker'
+
+        self.max_workers = max_workers
+        self._pool = None
+        self._lock = Lock()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+        return self._pool
+
+    def solve_many(self, jobs: list[dict]) -> list[list[Tour]]:
+        '''
+        Solve every job, in parallel when there are several of them and more than one worker.
+
+        Args:
+            jobs: Arguments of run_solver, as built by solver_job
+
+        Returns:
+            The Tours of each job, in the order of the jobs
+        '''
+        if len(jobs) <= 1 or self.max_workers <= 1:
+            return [run_solver(**job) for job in jobs]
+
+        futures = [self.pool.submit(run_solver, **compact_job(job)) for job in jobs]
+        return [future.result() for future in futures]
+
+    def race(self, jobs: list[dict], timeout: float) -> list[Optional[list[Tour]]]:
+        '''
+        Solve every job until a shared deadline, waiting past it only if no job finished.
+
+        Args:
+            jobs: Arguments of run_solver, as built by solver_job
+            timeout: Seconds from now to the deadline
+
+        Returns:
+            The Tours of each job, in the order of the jobs, None for the jobs not done in time
+        '''
+        deadline = time() + timeout
+
+        if len(jobs) <= 1 or self.max_workers <= 1:
+            results = list()
+            for job in jobs:
+                started = not results or time() < deadline
+                results.append(run_solver(**job) if started else None)
+            return results
+
+        futures = [self.pool.submit(run_solver, **compact_job(job)) for job in jobs]
+        done, _ = wait(futures, timeout=max(deadline - time(), 0))
+        if not done:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+        for future in futures:
+            if future not in done:
+                future.cancel()
+
+        return [future.result() if future in done else None for future in futures]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+
+_executor: Optional[SolverExecutor] = None
+_executor_lock = Lock()
+
+def get_solver_executor(max_workers: int) -> SolverExecutor:
+    '''Process-wide executor, the pool is only started on its first parallel solve.'''
+    global _executor
+
+    with _executor_lock:
+        if _executor is None or _executor.max_workers != max_workers:
+            if _executor is not None:
+                _executor.shutdown()
+            _executor = SolverExecutor(max_workers)
+
+    return _executor
@@ -1,7 +1,14 @@
 import random
-from neo4j import Record, Transaction
+from typing import Optional
+from neo4j import Transaction
+from logic.inventory_index import InventoryIndex
 from graph_db.queries.utility_queries import GET_RAND_N_PRODUCTS, SPECIFIC_PRODUCT_OFFER
-from graph_db.queries.manipulation_queries import STORAGE_LOCATION_RETRIEVER
+from graph_db.queries.manipulation_queries import (
+    STORAGE_LOCATION_RETRIEVER,
+    RESERVE_PRODUCTS,
+    ADD_PRODUCT_TO_LOCATION,
+    MOVE_PRODUCT_TO_LOCATION
+)
 
 def simulate_product_list(
         tx: Transaction, 
@@ -23,23 +30,88 @@ def simulate_product_list(
 def get_storage_locations(
         tx: Transaction, 
         start_id: str,
-        product_list: dict[str, int]
-    ) -> list[Record]:
-    
+        product_list: dict[str, int],
+        inventory: Optional[InventoryIndex] = None
+    ) -> list[dict]:
+    '''
+    Closest storages covering every product of the list, with the quantity to take from each.
+    When an inventory index is given the allocation is computed from it and no query is sent.
+    '''
+    if inventory is not None:
+        return inventory.allocate(start_id, product_list)
+
     result = tx.run(
         STORAGE_LOCATION_RETRIEVER,
         startId=start_id,
         productList=[list(item) for item in product_list.items()]
     )
 
-    return [record for record in result]
+    return [record.data() for record in result]
+
+def merge_product_lists(product_lists: list[dict[str, int]]) -> dict[str, int]:
+    '''Add up the quantities of several product lists.'''
+    merged = dict()
+    for product_list in product_lists:
+        for product_id, quantity in product_list.items():
+            merged[product_id] = merged.get(product_id, 0) + quantity
+
+    return merged
+
+def split_allocation(
+        storage_locations: list[dict],
+        orders: dict[str, dict[str, int]]
+    ) -> dict[str, list[dict]]:
+    '''
+    Distribute an allocation computed for the merged product list of several orders
+    back to each order.
+
+    Orders are served in the given order, each taking from the storages in the order
+    they were allocated (closest first), so no stock is assigned twice.
+
+    Args:
+        storage_locations: Allocation lines (product_id, quantity, storage_id, take)
+        orders: Dictionary mapping order IDs to their product lists
+
+    Returns:
+        Dictionary mapping order IDs to their own allocation lines, tagged with `order_id`
+    '''
+    available = dict()
+    for location in storage_locations:
+        available.setdefault(location['product_id'], []).append(dict(location))
+
+    order_locations = dict()
+    for order_id, product_list in orders.items():
+        order_locations[order_id] = list()
+
+        for product_id, quantity in product_list.items():
+            lines = available.get(product_id, [])
+
+            while quantity > 0 and lines:
+                take = min(quantity, lines[0]['take'])
+                order_locations[order_id].append({**lines[0], 'take': take, 'order_id': order_id})
+
+                quantity -= take
+                lines[0]['take'] -= take
+                if lines[0]['take'] == 0:
+                    lines.pop(0)
+
+            assert quantity == 0, f'Allocation does not cover {product_id} for order {order_id}'
+
+    return order_locations
 
 def assert_enough_offer(
         tx: Transaction, 
-        product_list: dict[str, int]
+        product_list: dict[str, int],
+        inventory: Optional[InventoryIndex] = None
     ) -> None:
 
-    result = tx.run(SPECIFIC_PRODUCT_OFFER, productIds=list(product_list.keys()))
+    if inventory is not None:
+        missing = inventory.missing_products(list(product_list))
+        assert not missing, f'Warehouse has no registered product: {missing}'
+        result = [{'id': id, 'contained': inventory.offer[id]} for id in product_list]
+    else:
+        result = tx.run(SPECIFIC_PRODUCT_OFFER, productIds=list(product_list.keys()))
+
     insufficiencies = dict()
 
     for record in result:
@@ -53,7 +125,7 @@ def assert_enough_offer(
 
 def assert_route(
         product_list: dict[str, int], 
-        storage_locations: list[Record]
+        storage_locations: list[dict]
     ) -> None:
 
     built_product_list = dict()
@@ -83,4 +155,32 @@ def assert_order_summary(
         summary=summary
     ).single()['failedItems']
 
-    assert not mismatches, f'{len(mismatches)} mismatches found. {[mismatch for mismatch in mismatches]}'
\ No newline at end of file
+    assert not mismatches, f'{len(mismatches)} mismatches found. {[mismatch for mismatch in mismatches]}'
+
+def reserve_products(tx: Transaction, picking_list: list[dict]) -> None:
+    '''
+    Move the picked quantities from CONTAINS to RESERVE.
+
+    Args:
+        tx: Database transaction object
+        picking_list: Lines with `from_location`, `gwin` (product ID) and `quantity`
+    '''
+    tx.run(RESERVE_PRODUCTS, pickingList=picking_list).consume()
+
+def add_product_to_location(tx: Transaction, location: str, product_id: str, quantity: int) -> None:
+    tx.run(ADD_PRODUCT_TO_LOCATION, location=location, productId=product_id, quantity=quantity).consume()
+
+def move_product_to_location(
+        tx: Transaction,
+        product_id: str,
+        from_location: str,
+        to_location: str,
+        quantity: int
+    ) -> None:
+    tx.run(
+        MOVE_PRODUCT_TO_LOCATION,
+        gwin=product_id,
+        fromLocation=from_location,
+        toLocation=to_location,
+        quantity=quantity
+    ).consume()
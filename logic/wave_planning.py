@@ -0,0 +1,141 @@
+import heapq
+import numpy as np
+from typing import Optional
+from logic.layout_model import LayoutModel
+
+
+def estimate_tour_length(
+        distance_matrix: np.ndarray,
+        stops: frozenset[int],
+        start: int,
+        dest: int
+    ) -> float:
+    '''Nearest neighbour tour from start to dest through the stops, a cheap stand-in for the solver.'''
+    remaining = np.array(sorted(stops - {start, dest}), dtype=np.int64)
+    current, length = start, 0.0
+
+    while remaining.size:
+        distances = distance_matrix[current, remaining]
+        k = int(np.argmin(distances))
+        length += distances[k]
+        current = remaining[k]
+        remaining = np.delete(remaining, k)
+
+    return length + distance_matrix[current, dest]
+
+
+def plan_waves(
+        order_stops: dict[str, list[str]],
+        layout: LayoutModel,
+        start_id: str,
+        dest_id: str,
+        max_orders: int = 10,
+        max_stops: Optional[int] = None,
+        neighbors: int = 8
+    ) -> list[list[str]]:
+    '''
+    Cluster orders into batches that are picked together in a single tour.
+
+    Every order starts as its own batch. Batches are then merged greedily by tour-length
+    savings (the length of both tours minus the length of the merged one), as in the
+    Clarke-Wright savings algorithm. Only promising pairs are evaluated: orders that share
+    a storage location, and the closest orders by distance between their medoid stops.
+
+    Args:
+        order_stops: Dictionary mapping order IDs to the storage IDs they are picked from
+        layout: Layout snapshot used to measure distances
+        start_id: Node of starting id
+        dest_id: Node of destination id
+        max_orders: Maximum number of orders in a batch (default: 10)
+        max_stops: Maximum number of distinct storages in a batch (default: None)
+        neighbors: Closest orders evaluated as merge candidates of each order (default: 8)
+
+    Returns:
+        Batches as lists of order IDs
+    '''
+    order_ids = list(order_stops)
+    node_ids = sorted({id_ for stops in order_stops.values() for id_ in stops} | {start_id, dest_id})
+    node_index = {id_: i for i, id_ in enumerate(node_ids)}
+    distance_matrix = layout.distance_submatrix(node_ids)
+    start, dest = node_index[start_id], node_index[dest_id]
+
+    batches = dict()
+    for batch_id, order_id in enumerate(order_ids):
+        stops = frozenset(node_index[id_] for id_ in order_stops[order_id])
+        batches[batch_id] = {
+            'orders': [order_id],
+            'stops': stops,
+            'length': estimate_tour_length(distance_matrix, stops, start, dest)
+        }
+
+    # Merge candidates: orders sharing a storage and the closest ones by medoid
+    candidates = {batch_id: set() for batch_id in batches}
+    orders_at = dict()
+    for batch_id, batch in batches.items():
+        for stop in batch['stops']:
+            orders_at.setdefault(stop, []).append(batch_id)
+
+    for sharing in orders_at.values():
+        for batch_id in sharing:
+            candidates[batch_id].update(sharing)
+
+    medoids = list()
+    for batch in batches.values():
+        stops = np.array(sorted(batch['stops']), dtype=np.int64)
+        medoids.append(stops[np.argmin(distance_matrix[np.ix_(stops, stops)].sum(axis=1))] if stops.size else start)
+
+    medoid_distances = distance_matrix[np.ix_(medoids, medoids)]
+    for batch_id in batches:
+        closest = np.argsort(medoid_distances[batch_id])[:neighbors + 1]
+        candidates[batch_id].update(closest.tolist())
+        for other in closest.tolist():
+            candidates[other].add(batch_id)
+
+    for batch_id in batches:
+        candidates[batch_id].discard(batch_id)
+
+    def push_saving(heap: list, a: int, b: int) -> None:
+        if len(batches[a]['orders']) + len(batches[b]['orders']) > max_orders:
+            return
+
+        stops = batches[a]['stops'] | batches[b]['stops']
+        if max_stops is not None and len(stops) > max_stops:
+            return
+
+        length = estimate_tour_length(distance_matrix, stops, start, dest)
+        saving = batches[a]['length'] + batches[b]['length'] - length
+        if saving > 0:
+            heapq.heappush(heap, (-saving, a, b, length))
+
+    heap = list()
+    for a in batches:
+        for b in candidates[a]:
+            if a < b:
+                push_saving(heap, a, b)
+
+    next_id = len(batches)
+    while heap:
+        _, a, b, length = heapq.heappop(heap)
+        if a not in batches or b not in batches:
+            continue
+
+        merged = next_id
+        next_id += 1
+        batches[merged] = {
+            'orders': batches[a]['orders'] + batches[b]['orders'],
+            'stops': batches[a]['stops'] | batches[b]['stops'],
+            'length': length
+        }
+        candidates[merged] = (candidates.pop(a) | candidates.pop(b)) - {a, b}
+        del batches[a], batches[b]
+
+        for other in candidates[merged]:
+            candidates[other] -= {a, b}
+            candidates[other].add(merged)
+            push_saving(heap, merged, other)
+
+    position = {order_id: i for i, order_id in enumerate(order_ids)}
+    return sorted(
+        (batch['orders'] for batch in batches.values()),
+        key=lambda orders: min(position[order_id] for order_id in orders)
+    )
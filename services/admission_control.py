@@ -0,0 +1,82 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from math import ceil
+from time import time
+from typing import Any, Callable
+
+class Overloaded(Exception):
+    '''Raised when a request is rejected because the admission queue is full.'''
+    def __init__(self, retry_after: int):
+        super().__init__(f'Picking service is overloaded, retry in {retry_after} s')
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    '''
+    Runs blocking calls off the event loop, on a bounded pool of worker threads.
+
+    At most `max_workers` calls run at once and at most `max_queue` more wait for a
+    worker. Any call beyond that is rejected right away with Overloaded, carrying an
+    estimate of when a slot frees up, so clients back off instead of piling up timeouts.
+    '''
+    def __init__(
+            self,
+            max_workers: int,
+            max_queue: int,
+            smoothing: float = 0.2
+        ):
+        '''
+        Args:
+            max_workers: Calls running at the same time
+            max_queue: Calls waiting for a worker before new ones are rejected
+            smoothing: Weight of the last call in the moving average of call durations
+        '''
+        assert max_workers >= 1, 'The admission controller needs at least one worker'
+        assert max_queue >= 0, 'The admission queue depth cannot be negative'
+
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.smoothing = smoothing
+
+        self.in_flight = 0
+        self.average_duration = 1.0
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='picking')
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def retry_after(self) -> int:
+        '''Seconds until the calls ahead are expected to be done, at least 1.'''
+        return max(1, ceil(self.average_duration * self.in_flight / self.max_workers))
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        '''
+        Run fn(*args, **kwargs) on a worker thread and wait for its result.
+
+        Raises:
+            Overloaded: If every worker is busy and the queue is full
+        '''
+        if self.in_flight >= self.capacity:
+            raise Overloaded(self.retry_after())
+
+        # Only touched from the event loop thread, so no lock is needed
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._pool, partial(self._timed, fn, *args, **kwargs)
+            )
+        finally:
+            self.in_flight -= 1
+
+    def _timed(self, fn: Callable, *args, **kwargs) -> Any:
+        start = time()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            duration = time() - start
+            self.average_duration += self.smoothing * (duration - self.average_duration)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False)
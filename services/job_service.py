@@ -0,0 +1,247 @@
+import heapq
+import json
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from math import ceil
+from threading import Condition, Thread
+from time import time
+from typing import Any, Callable, Optional
+from services.admission_control import Overloaded
+
+QUEUED, RUNNING, DONE, FAILED, EXPIRED = 'queued', 'running', 'done', 'failed', 'expired'
+FINISHED = (DONE, FAILED, EXPIRED)
+
+def job_key(product_list: dict[str, int], config: dict) -> str:
+    '''Normalized form of a request, equal for orders that only differ in key order or zero lines.'''
+    return json.dumps(
+        [sorted((product, quantity) for product, quantity in product_list.items() if quantity > 0), config],
+        sort_keys=True,
+        default=str
+    )
+
+
+@dataclass
+class Job:
+    id: str
+    key: str
+    product_list: dict[str, int]
+    config: dict
+    priority: int = 0
+    deadline: Optional[float] = None
+    status: str = QUEUED
+    result: Any = None
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def sort_key(self) -> tuple[float, float]:
+        '''Higher priority first, then earliest deadline, jobs without deadline last.'''
+        return (-self.priority, self.deadline if self.deadline is not None else float('inf'))
+
+
+class JobScheduler:
+    '''
+    Queue of picking jobs run in the background by a fixed number of worker threads.
+
+    Jobs are started by priority and, within a priority, earliest deadline first; a job
+    whose deadline passes while it waits is expired instead of solved. Submitting an order
+    that is already queued or running returns the existing job, raising its priority and
+    deadline when the new submission is more urgent. At most `max_queue` jobs wait for a
+    worker, new orders beyond that are rejected with Overloaded. Finished jobs are kept
+    for polling until `max_finished` newer ones have completed.
+    '''
+    def __init__(
+            self,
+            runner: Callable[[Job], Any],
+            max_workers: int = 2,
+            max_queue: int = 1000,
+            max_finished: int = 1000,
+            smoothing: float = 0.2
+        ):
+        '''
+        Args:
+            runner: Function solving a job, its return value becomes the job result
+            max_workers: Jobs solved at the same time (default: 2)
+            max_queue: Jobs waiting for a worker before new ones are rejected (default: 1000)
+            max_finished: Finished jobs kept for polling (default: 1000)
+            smoothing: Weight of the last job in the moving average of job durations
+        '''
+        assert max_workers >= 1, 'The scheduler needs at least one worker'
+        assert max_queue >= 0, 'The job queue depth cannot be negative'
+
+        self.runner = runner
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_finished = max_finished
+        self.smoothing = smoothing
+
+        self.queued = 0
+        self.average_duration = 1.0
+
+        self.jobs: dict[str, Job] = dict()
+        self._pending: dict[str, Job] = dict()
+        self._finished: OrderedDict[str, None] = OrderedDict()
+        self._heap: list[tuple[tuple[float, float], int, Job]] = list()
+        self._counter = 0
+        self._condition = Condition()
+        self._closed = False
+
+        self._workers = [
+            Thread(target=self._work, name=f'picking-job-{i}', daemon=True)
+            for i in range(max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(
+            self,
+            product_list: dict[str, int],
+            config: Optional[dict] = None,
+            priority: int = 0,
+            deadline: Optional[float] = None
+        ) -> tuple[Job, bool]:
+        '''
+        Queue a picking job, or join the pending job of the same order.
+
+        Args:
+            product_list: Dictionary mapping product IDs to quantities
+            config: Keyword arguments for the runner (default: None)
+            priority: Higher values are started first (default: 0)
+            deadline: Seconds from now after which the job is no longer worth solving (default: None)
+
+        Returns:
+            The job and whether it was deduplicated against an existing one
+
+        Raises:
+            Overloaded: If the order is new and the queue is full
+        '''
+        config = config or dict()
+        key = job_key(product_list, config)
+        deadline = time() + deadline if deadline is not None else None
+
+        with self._condition:
+            assert not self._closed, 'Job scheduler is shut down'
+
+            job = self._pending.get(key)
+            if job is not None:
+                if job.status == QUEUED:
+                    previous = job.sort_key
+                    job.priority = max(job.priority, priority)
+                    if deadline is not None:
+                        job.deadline = deadline if job.deadline is None else min(job.deadline, deadline)
+                    if job.sort_key != previous:
+                        self._push(job)
+
+                return job, True
+
+            if self.queued >= self.max_queue:
+                raise Overloaded(self.retry_after())
+
+            job = Job(
+                id=uuid.uuid4().hex,
+                key=key,
+                product_list=dict(product_list),
+                config=config,
+                priority=priority,
+                deadline=deadline
+            )
+            self.jobs[job.id] = job
+            self._pending[key] = job
+            self.queued += 1
+            self._push(job)
+
+        return job, False
+
+    def retry_after(self) -> int:
+        '''Seconds until the queued jobs are expected to be started, at least 1.'''
+        return max(1, ceil(self.average_duration * self.queued / self.max_workers))
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Job]:
+        '''Block until the job is finished or the timeout runs out, and return it.'''
+        with self._condition:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                self._condition.wait_for(lambda: job.status in FINISHED, timeout)
+            return job
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        '''Number of queued jobs that start before the given one, None if it is not queued.'''
+        with self._condition:
+            job = self.jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                return None
+
+            return sum(
+                1 for other in self._pending.values()
+                if other.status == QUEUED and other.sort_key < job.sort_key
+            )
+
+    def shutdown(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+        for worker in self._workers:
+            worker.join()
+
+    def _push(self, job: Job) -> None:
+        # Entries whose key no longer matches the job are stale and skipped when popped
+        self._counter += 1
+        heapq.heappush(self._heap, (job.sort_key, self._counter, job))
+        self._condition.notify_all()
+
+    def _next(self) -> Optional[Job]:
+        with self._condition:
+            while True:
+                while self._heap:
+                    sort_key, _, job = heapq.heappop(self._heap)
+                    if job.status != QUEUED or sort_key != job.sort_key:
+                        continue
+
+                    self.queued -= 1
+                    if job.deadline is not None and job.deadline < time():
+                        self._finish(job, EXPIRED, error='Deadline passed before the job was started')
+                        continue
+
+                    job.status = RUNNING
+                    job.started_at = time()
+                    return job
+
+                if self._closed:
+                    return None
+                self._condition.wait()
+
+    def _work(self) -> None:
+        while (job := self._next()) is not None:
+            try:
+                result = self.runner(job)
+            except Exception as e:
+                with self._condition:
+                    self._finish(job, FAILED, error=str(e) or type(e).__name__)
+            else:
+                with self._condition:
+                    job.result = result
+                    self._finish(job, DONE)
+
+            with self._condition:
+                duration = job.finished_at - job.started_at
+                self.average_duration += self.smoothing * (duration - self.average_duration)
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None) -> None:
+        job.status = status
+        job.error = error
+        job.finished_at = time()
+        self._pending.pop(job.key, None)
+
+        self._finished[job.id] = None
+        while len(self._finished) > self.max_finished:
+            old_id, _ = self._finished.popitem(last=False)
+            del self.jobs[old_id]
+
+        self._condition.notify_all()
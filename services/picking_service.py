@@ -1,16 +1,59 @@
 from dataclasses import dataclass
 from typing import Optional
 from time import time
-from neo4j import Transaction
-from logic.warehouse_operations import get_storage_locations, assert_enough_offer, assert_route, assert_order_summary
-from logic.routing_operations import get_distance_matrix, get_picking_summary, TSPSolver, find_path
-from config.settings import Config
+from logic.warehouse_operations import (
+    get_storage_locations, 
+    assert_enough_offer, 
+    assert_route, 
+    assert_order_summary, 
+    merge_product_lists, 
+    split_allocation
+)
+from logic.routing_operations import (
+    get_distance_matrix, 
+    slice_distance_matrix, 
+    get_picking_summary, 
+    find_path, 
+    solve_routes, 
+    solver_job, 
+    SOLVERS,
+    OBJECTIVES
+)
+from logic.solver_executor import get_solver_executor
+from logic.layout_model import LayoutModel
+from logic.inventory_index import InventoryIndex
+from logic.allocation import allocate_stock, ALLOCATIONS
+from logic.wave_planning import plan_waves
+from logic.result_cache import ResultCache, picking_key
+from logic.reoptimization import update_tour, REOPTIMIZATION_LATENCY
+from logic.decomposition import Decomposition, DECOMPOSITIONS, solve_decomposed
+from logic.portfolio import race, preferred_budget
+from graph_db.backend import WarehouseBackend, get_backend
+from config.settings import Settings
 import warnings
 
 @dataclass
 class PickingSolution:
     summaries: list[list[dict[str, str | int]]]
     paths: list[list[dict]]
+    performance_metrics: Optional[dict[str, float | tuple[str, str]]]
+    # OR-Tools configuration that won the portfolio race, when one was run
+    portfolio_config: Optional[tuple[str, str]] = None
+
+@dataclass
+class WaveBatch:
+    order_ids: list[str]
+    solution: PickingSolution
+    order_summaries: dict[str, list[dict[str, str | int]]]
+
+@dataclass
+class WaveSolution:
+    batches: list[WaveBatch]
+    performance_metrics: Optional[dict[str, float]]
+
+@dataclass
+class BatchSolution:
+    solutions: list[PickingSolution]
     performance_metrics: Optional[dict[str, float]]
 
 class TimedOperation:
@@ -31,28 +74,139 @@ class TimedOperation:
             print(f'{self.duration:.4f} s. \t {self.name}')
 
 class PickingService:
-    def __init__(self, is_testing: bool):
+    '''
+    Picking pipeline in three phases: a fetch phase that refreshes the layout and inventory
+    snapshots from the warehouse backend, a compute phase (allocation, distances and
+    routing) that only works on the snapshots, and a render phase rebuilding the paths
+    from the layout. No backend call is made once a solver runs.
+
+    Outside testing mode, `optimize` results are cached by product list, configuration,
+    layout fingerprint and inventory version, so resubmitted orders skip the pipeline.
+    '''
+    def __init__(self, is_testing: bool, backend: Optional[WarehouseBackend] = None):
         self.is_testing = is_testing
+        self.backend = backend or get_backend(Settings.backend, Settings.layout, Settings.inventory_max_age)
+        # A result never outlives the inventory snapshot it was computed from
+        self.results = ResultCache(
+            Settings.result_cache_size, min(Settings.result_cache_ttl, Settings.inventory_max_age)
+        )
+
+    def fetch(self) -> tuple[LayoutModel, InventoryIndex]:
+        '''Snapshots every phase works on, only queried when missing or stale.'''
+        return self.backend.snapshots()
+
+    @staticmethod
+    def _solve_routes(
+            solver: str,
+            distance_matrix: list[list[float]],
+            node_to_index: dict[str, int],
+            start_id: str,
+            dest_id: str,
+            num_routes: int,
+            solver_params: dict,
+            layout: LayoutModel,
+            decomposition: Optional[dict] = None,
+            portfolio: bool = False
+        ) -> tuple[list, Optional[tuple[str, str]]]:
+        '''
+        Run the routing engine over the whole problem, or over clusters of stops solved in
+        parallel on the solver pool when a decomposition is given (see solve_decomposed).
+        Each cluster then shares the latency target and gets a budget for its own size.
+
+        A portfolio races OR-Tools configurations on the solver pool instead (see race), each
+        with the other solver_params, such as a warm start.
+        Otherwise OR-Tools runs with the configuration that wins most races at the size
+        of the problem, once there are enough of them.
+
+        Returns:
+            The routes, and the configuration that won the race when a portfolio was raced
+        '''
+        if portfolio:
+            executor = get_solver_executor(Settings.solver_workers)
+            job = solver_job(
+                solver, distance_matrix, node_to_index, start_id, dest_id, num_routes, solver_params, layout
+            )
+            result = race(
+                distance_matrix,
+                job['start_index'],
+                job['dest_index'],
+                num_routes,
+                executor.race,
+                executor.max_workers,
+                Settings.portfolio_size,
+                solver_params.get('latency_target'),
+                solver_params.get('objective', 'distance'),
+                solver_params=job['solver_params']
+            )
+            return result.tours, result.config
+
+        if decomposition is None:
+            solver_params = PickingService._preferred_params(solver, solver_params, len(distance_matrix), num_routes)
+            return solve_routes(
+                solver, distance_matrix, node_to_index, start_id, dest_id, num_routes, solver_params, layout
+            ), None
+
+        executor = get_solver_executor(Settings.solver_workers)
+        decomposition = Decomposition(**decomposition)
+        job = solver_job(
+            solver, distance_matrix, node_to_index, start_id, dest_id, num_routes, solver_params, layout
+        )
+        return solve_decomposed(
+            job['solver'],
+            job['distance_matrix'],
+            job['start_index'],
+            job['dest_index'],
+            num_routes,
+            job['solver_params'],
+            decomposition,
+            executor.solve_many,
+            layout.aisle_attributes(list(node_to_index)) if decomposition.method == 'aisle' else None,
+            executor.max_workers,
+            preferred_budget if solver == 'ortools' and 'budget' not in solver_params else None
+        ), None
+
+    @staticmethod
+    def _preferred_params(solver: str, solver_params: dict, num_nodes: int, num_routes: int) -> dict:
+        '''Solver parameters with the budget of the configuration that wins most races at the size, if any.'''
+        if solver != 'ortools' or 'budget' in solver_params:
+            return solver_params
+
+        budget = preferred_budget(num_nodes, num_routes, solver_params.get('latency_target'))
+        return {**solver_params, 'budget': budget} if budget is not None else solver_params
 
     @staticmethod
     def _solve_test(
-            tx: Transaction,
+            layout: LayoutModel,
+            inventory: InventoryIndex,
             product_list: dict[str, int],
             start_id: str,
             dest_id: str,
             num_routes: int,
-            debug: bool
+            solver: str,
+            solver_params: dict,
+            allocation: str,
+            debug: bool,
+            decomposition: Optional[dict] = None,
+            portfolio: bool = False
         ) -> PickingSolution:
         '''
         Solve the optimal picking order for a given product list.
         
         Args:
-            tx: Database transaction object
+            layout: Layout snapshot
+            inventory: Inventory snapshot
             product_list: Dictionary mapping product IDs to quantities
             start_id: Node of starting id
             dest_id: Node of destination id
             num_routes: Number of distinct picking routes
+            solver: Name of the routing engine, one of SOLVERS
+            solver_params: Extra keyword arguments for the routing engine
+            allocation: How storages are chosen for each product, one of ALLOCATIONS
             debug: Bool that determines if times are printed
+            decomposition: Settings of Decomposition to route clusters of stops separately,
+                everything is routed at once when None (default: None)
+            portfolio: Race several OR-Tools configurations instead of running the solver
+                (default: False)
             
         Returns:
             PickingSolution containing picking summaries, paths, and performance metrics
@@ -64,8 +218,10 @@ class PickingService:
         
         # Validate and get storage locations
         with TimedOperation('location_search', debug) as op:
-            assert_enough_offer(tx, product_list)
-            storage_locations = get_storage_locations(tx, start_id, product_list)
+            assert_enough_offer(None, product_list, inventory)
+            storage_locations = allocate_stock(
+                None, start_id, dest_id, product_list, allocation, inventory, layout
+            )
             assert_route(product_list, storage_locations)
 
         metrics['location_search'] = op.duration
@@ -73,24 +229,31 @@ class PickingService:
         # Compute distance matrix
         with TimedOperation('distance_matrix', debug) as op:
             distance_matrix, node_to_index = get_distance_matrix(
-                tx, storage_locations, start_id, dest_id
+                None, storage_locations, start_id, dest_id, layout=layout
             )
 
         metrics['distance_matrix'] = op.duration
         
         #Solve TSP
         with TimedOperation('tour_optimization', debug) as op:
-            start_index = node_to_index[start_id]
-            dest_index = node_to_index[dest_id]
-
-            solutions = TSPSolver(
-                distance_matrix, 
-                start_index=start_index,
-                dest_index=dest_index,
-                num_vehicles=num_routes
-            )()
+            solutions, portfolio_config = PickingService._solve_routes(
+                solver,
+                distance_matrix,
+                node_to_index,
+                start_id,
+                dest_id,
+                num_routes,
+                solver_params,
+                layout,
+                decomposition,
+                portfolio
+            )
 
         metrics['tour_optimization'] = op.duration
+        metrics['travel_distance'] = sum(solution.optimal_value for solution in solutions)
+        metrics['longest_route'] = max(solution.optimal_value for solution in solutions)
+        if portfolio_config is not None:
+            metrics['portfolio_config'] = portfolio_config
         
         paths, summaries = list(), list()
         metrics['path_finding'] = 0
@@ -99,7 +262,7 @@ class PickingService:
         for solution in solutions:
             # Find path
             with TimedOperation('path_finding', debug) as op:
-                path = find_path(tx, solution.tour, node_to_index)
+                path = find_path(None, solution.tour, node_to_index, layout)
             metrics['path_finding'] += op.duration
             
             # Generate picking summary
@@ -113,26 +276,39 @@ class PickingService:
         return PickingSolution(
             summaries=summaries,
             paths=paths,
-            performance_metrics=metrics
+            performance_metrics=metrics,
+            portfolio_config=portfolio_config
         )
 
     @staticmethod
     def _solve(
-            tx: Transaction,
+            layout: LayoutModel,
+            inventory: InventoryIndex,
             product_list: dict[str, int],
             start_id: str,
             dest_id: str,
-            num_routes: int
+            num_routes: int,
+            solver: str,
+            solver_params: dict,
+            allocation: str,
+            decomposition: Optional[dict] = None,
+            portfolio: bool = False
         ) -> PickingSolution:
         '''
         Solve the optimal picking order for a given product list.
         
         Args:
-            tx: Database transaction object
+            layout: Layout snapshot
+            inventory: Inventory snapshot
             product_list: Dictionary mapping product IDs to quantities
             start_id: Node of starting id
             dest_id: Node of destination id
             num_routes: Number of distinct picking routes
+            solver: Name of the routing engine, one of SOLVERS
+            solver_params: Extra keyword arguments for the routing engine
+            allocation: How storages are chosen for each product, one of ALLOCATIONS
+            decomposition: Settings of Decomposition, see `_solve_test` (default: None)
+            portfolio: Race several OR-Tools configurations, see `_solve_test` (default: False)
             
         Returns:
             PickingSolution containing picking summaries and paths
@@ -142,32 +318,37 @@ class PickingService:
         '''
         
         # Validate and get storage locations
-        assert_enough_offer(tx, product_list)
-        storage_locations = get_storage_locations(tx, start_id, product_list)
+        assert_enough_offer(None, product_list, inventory)
+        storage_locations = allocate_stock(
+            None, start_id, dest_id, product_list, allocation, inventory, layout
+        )
         assert_route(product_list, storage_locations)
 
         
         # Compute distance matrix
         distance_matrix, node_to_index = get_distance_matrix(
-            tx, storage_locations, start_id, dest_id
+            None, storage_locations, start_id, dest_id, layout=layout
         )
         
         #Solve TSP
-        start_index = node_to_index[start_id]
-        dest_index = node_to_index[dest_id]
-
-        solutions = TSPSolver(
-            distance_matrix, 
-            start_index=start_index,
-            dest_index=dest_index,
-            num_vehicles=num_routes
-        )()
+        solutions, portfolio_config = PickingService._solve_routes(
+            solver,
+            distance_matrix,
+            node_to_index,
+            start_id,
+            dest_id,
+            num_routes,
+            solver_params,
+            layout,
+            decomposition,
+            portfolio
+        )
 
         paths, summaries = list(), list()
 
         for solution in solutions:
             # Find path
-            path = find_path(tx, solution.tour, node_to_index)
+            path = find_path(None, solution.tour, node_to_index, layout)
             paths.append(path)
             
             # Generate picking summary
@@ -177,41 +358,516 @@ class PickingService:
         return PickingSolution(
             summaries=summaries,
             paths=paths,
-            performance_metrics=None
+            performance_metrics=None,
+            portfolio_config=portfolio_config
         )
     
+    @staticmethod
+    def _solve_wave(
+            layout: LayoutModel,
+            inventory: InventoryIndex,
+            orders: dict[str, dict[str, int]],
+            start_id: str,
+            dest_id: str,
+            num_routes: int,
+            max_orders: int,
+            max_stops: Optional[int],
+            solver: str,
+            solver_params: dict,
+            debug: bool
+        ) -> WaveSolution:
+        '''
+        Group many orders into batches and solve a single picking tour per batch.
+
+        Stock is allocated once for the merged product list of every order, then split
+        back per order, so no storage quantity is promised to two orders.
+
+        Args:
+            layout: Layout snapshot
+            inventory: Inventory snapshot
+            orders: Dictionary mapping order IDs to their product lists
+            start_id: Node of starting id
+            dest_id: Node of destination id
+            num_routes: Number of distinct picking routes per batch
+            max_orders: Maximum number of orders in a batch
+            max_stops: Maximum number of distinct storages in a batch
+            solver: Name of the routing engine, one of SOLVERS
+            solver_params: Extra keyword arguments for the routing engine
+            debug: Bool that determines if times are printed
+
+        Returns:
+            WaveSolution with one PickingSolution per batch
+
+        Raises:
+            AssertionError: If product availability or route requirements are not met
+        '''
+        metrics = {}
+
+        with TimedOperation('location_search', debug) as op:
+            product_list = merge_product_lists(list(orders.values()))
+            assert_enough_offer(None, product_list, inventory)
+            storage_locations = get_storage_locations(None, start_id, product_list, inventory)
+            assert_route(product_list, storage_locations)
+            order_locations = split_allocation(storage_locations, orders)
+
+        metrics['location_search'] = op.duration
+
+        with TimedOperation('wave_planning', debug) as op:
+            wave = plan_waves(
+                {
+                    order_id: [location['storage_id'] for location in locations]
+                    for order_id, locations in order_locations.items()
+                },
+                layout,
+                start_id,
+                dest_id,
+                max_orders=max_orders,
+                max_stops=max_stops
+            )
+
+        metrics['wave_planning'] = op.duration
+
+        # Batches are independent, so every solve is prepared first and run on the solver pool
+        with TimedOperation('tour_optimization', debug) as op:
+            batch_locations, batch_indices, jobs = list(), list(), list()
+            for order_ids in wave:
+                locations = [location for order_id in order_ids for location in order_locations[order_id]]
+                distance_matrix, node_to_index = get_distance_matrix(
+                    None, locations, start_id, dest_id, layout=layout
+                )
+                batch_locations.append(locations)
+                batch_indices.append(node_to_index)
+                jobs.append(solver_job(
+                    solver,
+                    distance_matrix,
+                    node_to_index,
+                    start_id,
+                    dest_id,
+                    num_routes,
+                    PickingService._preferred_params(solver, solver_params, len(distance_matrix), num_routes),
+                    layout
+                ))
+
+            batch_solutions = get_solver_executor(Settings.solver_workers).solve_many(jobs)
+
+        metrics['tour_optimization'] = op.duration
+
+        batches = list()
+        with TimedOperation('path_finding', debug) as op:
+            for order_ids, locations, node_to_index, solutions in zip(
+                    wave, batch_locations, batch_indices, batch_solutions
+                ):
+                paths = [find_path(None, solution.tour, node_to_index, layout) for solution in solutions]
+                summaries = [
+                    get_picking_summary(solution.tour, locations, node_to_index) 
+                    for solution in solutions
+                ]
+
+                order_summaries = {order_id: list() for order_id in order_ids}
+                for summary in summaries:
+                    for line in summary:
+                        order_summaries[line['order_id']].append(line)
+
+                batches.append(WaveBatch(
+                    order_ids=order_ids,
+                    solution=PickingSolution(summaries=summaries, paths=paths, performance_metrics=None),
+                    order_summaries=order_summaries
+                ))
+
+        metrics['path_finding'] = op.duration
+
+        return WaveSolution(batches=batches, performance_metrics=metrics)
+
+    @staticmethod
+    def _solve_batch(
+            layout: LayoutModel,
+            inventory: InventoryIndex,
+            product_lists: list[dict[str, int]],
+            configs: list[dict],
+            debug: bool
+        ) -> BatchSolution:
+        '''
+        Solve the picking order of several independent orders in a single transaction.
+
+        The offer check, the storage location search (once per start node) and the
+        distance matrix cover the union of all orders, then each order is solved on its
+        own slice of the matrix. Orders leaving from different start nodes are allocated
+        one start after the other, each from the stock the previous ones left, and orders of
+        the same start in the given order, so no storage quantity is promised to two of them.
+
+        Args:
+            layout: Layout snapshot
+            inventory: Inventory snapshot
+            product_lists: Product list of every order
+            configs: Routing configuration of every order (start_id, dest_id, num_routes,
+                solver and solver_params)
+            debug: Bool that determines if times are printed
+
+        Returns:
+            BatchSolution with one PickingSolution per order, in the given order
+
+        Raises:
+            AssertionError: If product availability or route requirements are not met
+        '''
+        metrics = {}
+
+        with TimedOperation('location_search', debug) as op:
+            assert_enough_offer(None, merge_product_lists(product_lists), inventory)
+
+            order_locations, taken = dict(), dict()
+            for start_id in sorted({config['start_id'] for config in configs}):
+                orders = {
+                    i: product_list 
+                    for i, (product_list, config) in enumerate(zip(product_lists, configs))
+                    if config['start_id'] == start_id
+                }
+                product_list = merge_product_lists(list(orders.values()))
+                storage_locations = inventory.allocate(start_id, product_list, taken)
+                assert_route(product_list, storage_locations)
+                order_locations.update(split_allocation(storage_locations, orders))
+
+                for location in storage_locations:
+                    key = (location['product_id'], location['storage_id'])
+                    taken[key] = taken.get(key, 0) + location['take']
+
+        metrics['location_search'] = op.duration
+
+        with TimedOperation('distance_matrix', debug) as op:
+            endpoints = {config['start_id'] for config in configs} | {config['dest_id'] for config in configs}
+            distance_matrix, node_to_index = get_distance_matrix(
+                None,
+                [location for locations in order_locations.values() for location in locations] 
+                + [{'storage_id': id_} for id_ in endpoints],
+                configs[0]['start_id'],
+                configs[0]['dest_id'],
+                layout=layout
+            )
+
+            order_indices, jobs = list(), list()
+            for i, config in enumerate(configs):
+                order_matrix, order_index = slice_distance_matrix(
+                    distance_matrix, node_to_index, order_locations[i], config['start_id'], config['dest_id']
+                )
+                order_indices.append(order_index)
+                jobs.append(solver_job(
+                    config['solver'],
+                    order_matrix,
+                    order_index,
+                    config['start_id'],
+                    config['dest_id'],
+                    config['num_routes'],
+                    PickingService._preferred_params(
+                        config['solver'], config['solver_params'], len(order_matrix), config['num_routes']
+                    ),
+                    layout
+                ))
+
+        metrics['distance_matrix'] = op.duration
+
+        with TimedOperation('tour_optimization', debug) as op:
+            order_solutions = get_solver_executor(Settings.solver_workers).solve_many(jobs)
+
+        metrics['tour_optimization'] = op.duration
+
+        with TimedOperation('path_finding', debug) as op:
+            solutions = [
+                PickingSolution(
+                    summaries=[
+                        get_picking_summary(tour.tour, order_locations[i], order_indices[i]) 
+                        for tour in tours
+                    ],
+                    paths=[find_path(None, tour.tour, order_indices[i], layout) for tour in tours],
+                    performance_metrics=None
+                )
+                for i, tours in enumerate(order_solutions)
+            ]
+
+        metrics['path_finding'] = op.duration
+
+        return BatchSolution(solutions=solutions, performance_metrics=metrics)
+
+    @staticmethod
+    def _objective_params(solver: str, solver_params: dict, objective: str) -> dict:
+        '''Solver parameters with the objective of the routes, only OR-Tools minimizes another one than distance.'''
+
+        assert objective in OBJECTIVES, f'Unknown objective: {objective}. Available objectives: {list(OBJECTIVES)}'
+        if objective == 'distance':
+            return solver_params
+
+        assert solver == 'ortools', f'Solver {solver} cannot minimize the {objective} objective, use ortools'
+        return {**solver_params, 'objective': objective}
+
+    @staticmethod
+    def _order_config(
+            start_id: str = 'start',
+            dest_id: str = 'dest1',
+            num_routes: int = 1,
+            solver: str = 'ortools',
+            solver_params: Optional[dict] = None,
+            latency_target: Optional[float] = None,
+            objective: str = 'distance'
+        ) -> dict:
+        '''Routing configuration of an order with its defaults filled in, as taken by `optimize`.'''
+
+        assert solver in SOLVERS, f'Unknown solver: {solver}. Available solvers: {list(SOLVERS)}'
+        solver_params = PickingService._objective_params(solver, solver_params or dict(), objective)
+
+        if latency_target is not None:
+            solver_params = {**solver_params, 'latency_target': latency_target}
+
+        return {
+            'start_id': start_id,
+            'dest_id': dest_id,
+            'num_routes': num_routes,
+            'solver': solver,
+            'solver_params': solver_params
+        }
+
+    def optimize_batch(
+            self,
+            product_lists: list[dict[str, int]],
+            configs: Optional[list[dict]] = None,
+            debug: Optional[bool] = None
+        ) -> BatchSolution:
+        '''
+        Solve many independent orders at once, see `_solve_batch`.
+
+        Args:
+            product_lists: Product list of every order
+            configs: Keyword arguments of `optimize` for every order, except debug (default: None)
+            debug: Bool that determines if times are printed (default: None)
+        '''
+
+        configs = configs or [dict() for _ in product_lists]
+        assert len(configs) == len(product_lists), 'Every order needs its own configuration'
+        configs = [self._order_config(**config) for config in configs]
+
+        if self.is_testing:
+            debug = True if debug is None else debug
+        else:
+            if debug is not None:
+                warnings.warn('Picking service is not on testing mode, therefore debug arg is ignored')
+            debug = False
+
+        if not product_lists:
+            return BatchSolution(solutions=list(), performance_metrics=None)
+
+        layout, inventory = self.fetch()
+        batch_solution = self._solve_batch(
+            layout,
+            inventory,
+            product_lists,
+            configs,
+            debug
+        )
+
+        if not self.is_testing:
+            batch_solution.performance_metrics = None
+
+        return batch_solution
+
+    def optimize_wave(
+            self,
+            orders: dict[str, dict[str, int]],
+            start_id: str = 'start',
+            dest_id: str = 'dest1',
+            num_routes: int = 1,
+            max_orders: int = 10,
+            max_stops: Optional[int] = None,
+            solver: str = 'ortools',
+            solver_params: Optional[dict] = None,
+            latency_target: Optional[float] = None,
+            objective: str = 'distance',
+            debug: Optional[bool] = None
+        ) -> WaveSolution:
+        '''
+        Plan a picking wave for many orders at once, see `_solve_wave`.
+
+        The latency target applies to the solve of each batch. With the 'makespan' objective
+        the routes of a batch are balanced so its longest one is as short as possible.
+        '''
+
+        assert solver in SOLVERS, f'Unknown solver: {solver}. Available solvers: {list(SOLVERS)}'
+        solver_params = self._objective_params(solver, solver_params or dict(), objective)
+
+        if latency_target is not None:
+            solver_params = {**solver_params, 'latency_target': latency_target}
+
+        if self.is_testing:
+            debug = True if debug is None else debug
+        else:
+            if debug is not None:
+                warnings.warn('Picking service is not on testing mode, therefore debug arg is ignored')
+            debug = False
+
+        layout, inventory = self.fetch()
+        wave_solution = self._solve_wave(
+            layout,
+            inventory,
+            orders,
+            start_id,
+            dest_id,
+            num_routes,
+            max_orders,
+            max_stops,
+            solver,
+            solver_params,
+            debug
+        )
+
+        if not self.is_testing:
+            wave_solution.performance_metrics = None
+
+        return wave_solution
+
     def optimize(
             self, 
             product_list: dict[str, int], 
             start_id: str = 'start',
             dest_id: str = 'dest1',
             num_routes: int = 1,
+            solver: str = 'ortools',
+            solver_params: Optional[dict] = None,
+            allocation: str = 'greedy',
+            latency_target: Optional[float] = None,
+            objective: str = 'distance',
+            decomposition: Optional[dict] = None,
+            portfolio: bool = False,
             debug: Optional[bool] = None
         ) -> PickingSolution:
 
+        assert solver in SOLVERS, f'Unknown solver: {solver}. Available solvers: {list(SOLVERS)}'
+        assert allocation in ALLOCATIONS, f'Unknown allocation: {allocation}. Available allocations: {list(ALLOCATIONS)}'
+        assert decomposition is None or decomposition.get('method', 'kmedoids') in DECOMPOSITIONS, (
+            f'Unknown decomposition: {decomposition["method"]}. Available decompositions: {list(DECOMPOSITIONS)}'
+        )
+        assert not portfolio or (solver == 'ortools' and decomposition is None), (
+            'A portfolio races OR-Tools configurations over the whole order, without decomposition'
+        )
+        assert not portfolio or 'budget' not in (solver_params or dict()), (
+            'A portfolio plans the budget of every configuration it races'
+        )
+        solver_params = self._objective_params(solver, solver_params or dict(), objective)
+
+        if latency_target is not None:
+            solver_params = {**solver_params, 'latency_target': latency_target}
+
         if self.is_testing:
             debug = True if debug is None else debug
 
-            with Config.db.driver.session() as session:
-                picking_solution = session.execute_read(
-                    self._solve_test,
-                    product_list,
-                    start_id,
-                    dest_id,
-                    num_routes,
-                    debug
-                )
+            with TimedOperation('fetch', debug) as op:
+                layout, inventory = self.fetch()
+
+            picking_solution = self._solve_test(
+                layout,
+                inventory,
+                product_list,
+                start_id,
+                dest_id,
+                num_routes,
+                solver,
+                solver_params,
+                allocation,
+                debug,
+                decomposition,
+                portfolio
+            )
+            picking_solution.performance_metrics = {'fetch': op.duration, **picking_solution.performance_metrics}
         else:
             if debug is not None:
                 warnings.warn('Picking service is not on testing mode, therefore debug arg is ignored')
 
-            with Config.db.driver.session() as session:
-                picking_solution = session.execute_read(
-                    self._solve,
+            layout, inventory = self.fetch()
+            key = picking_key(
+                product_list,
+                {
+                    'start_id': start_id,
+                    'dest_id': dest_id,
+                    'num_routes': num_routes,
+                    'solver': solver,
+                    'solver_params': solver_params,
+                    'allocation': allocation,
+                    'decomposition': decomposition,
+                    'portfolio': portfolio
+                },
+                layout.fingerprint,
+                inventory.generation
+            )
+
+            picking_solution = self.results.get(key)
+            if picking_solution is None:
+                picking_solution = self._solve(
+                    layout,
+                    inventory,
                     product_list,
                     start_id,
                     dest_id,
-                    num_routes
+                    num_routes,
+                    solver,
+                    solver_params,
+                    allocation,
+                    decomposition,
+                    portfolio
                 )
+                self.results.put(key, picking_solution)
         
-        return picking_solution
\ No newline at end of file
+        return picking_solution
+
+    def reoptimize(
+            self,
+            summary: list[dict],
+            position: str,
+            added: Optional[dict[str, int]] = None,
+            removed: Optional[dict[str, int]] = None,
+            dest_id: str = 'dest1',
+            latency_target: float = REOPTIMIZATION_LATENCY,
+            debug: Optional[bool] = None
+        ) -> PickingSolution:
+        '''
+        Update a route a picker is already walking when lines are added to or removed from
+        the order, see TourUpdate. Only the changed lines are allocated, by cheapest
+        insertion, and the tour gets a short local search started from the current one.
+
+        Args:
+            summary: Lines of the route not picked yet, in picking order, as in the
+                summaries returned by `optimize`
+            position: Node the picker stands at
+            added: Dictionary mapping product IDs to the quantities added (default: None)
+            removed: Dictionary mapping product IDs to the quantities removed (default: None)
+            dest_id: Node of destination id (default: 'dest1')
+            latency_target: Seconds of local search (default: REOPTIMIZATION_LATENCY)
+            debug: Bool that determines if times are printed (default: None)
+
+        Returns:
+            PickingSolution with the single updated route, from the position to the destination
+        '''
+
+        if self.is_testing:
+            debug = True if debug is None else debug
+        else:
+            if debug is not None:
+                warnings.warn('Picking service is not on testing mode, therefore debug arg is ignored')
+            debug = False
+
+        metrics = {}
+
+        with TimedOperation('fetch', debug) as op:
+            layout, inventory = self.fetch()
+        metrics['fetch'] = op.duration
+
+        with TimedOperation('tour_update', debug) as op:
+            tour, node_to_index, lines = update_tour(
+                layout, inventory, summary, position, dest_id, added, removed, latency_target
+            )
+        metrics['tour_update'] = op.duration
+
+        with TimedOperation('path_finding', debug) as op:
+            path = find_path(None, tour, node_to_index, layout)
+            summary = get_picking_summary(tour, lines, node_to_index)
+        metrics['path_finding'] = op.duration
+
+        return PickingSolution(
+            summaries=[summary],
+            paths=[path],
+            performance_metrics=metrics if self.is_testing else None
+        )
@@ -0,0 +1,8 @@
+import pytest
+from data.synthetic import generate_warehouse
+from graph_db.backend import InMemoryBackend
+
+@pytest.fixture
+def memory_backend() -> InMemoryBackend:
+    '''Fresh in-memory backend over a seeded synthetic warehouse.'''
+    return InMemoryBackend(generate_warehouse(200, seed=3).graph())
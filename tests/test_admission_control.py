@@ -0,0 +1,43 @@
+import asyncio
+import pytest
+from threading import Event
+from services.admission_control import AdmissionController, Overloaded
+
+def test_calls_beyond_the_queue_are_rejected():
+    admission = AdmissionController(max_workers=1, max_queue=1)
+    release = Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(admission.run(release.wait))
+        queued = asyncio.ensure_future(admission.run(lambda: 'done'))
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(Overloaded) as rejected:
+            await admission.run(lambda: 'rejected')
+
+        release.set()
+        return rejected.value, await running, await queued
+
+    rejected, running, queued = asyncio.run(scenario())
+    admission.shutdown()
+
+    assert rejected.retry_after >= 1
+    assert running is True and queued == 'done'
+    assert admission.in_flight == 0
+
+def test_event_loop_keeps_running_during_blocking_calls():
+    admission = AdmissionController(max_workers=2, max_queue=0)
+    release = Event()
+
+    async def scenario():
+        blocked = asyncio.ensure_future(admission.run(release.wait))
+        ticks = 0
+        while ticks < 5:
+            await asyncio.sleep(0.01)
+            ticks += 1
+        release.set()
+        await blocked
+        return ticks
+
+    assert asyncio.run(scenario()) == 5
+    admission.shutdown()
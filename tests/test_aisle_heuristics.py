@@ -0,0 +1,92 @@
+import numpy as np
+from logic.layout_model import LayoutModel
+from logic.aisle_heuristics import AISLE_HEURISTICS, route_block
+from logic.routing_operations import solve_routes
+
+def build_warehouse(n_blocks: int = 2, n_aisles: int = 4, depth: int = 10) -> LayoutModel:
+    '''Parallel-aisle layout shaped like the seeded ones: intersections, halls and racks.'''
+    nodes, edges = list(), list()
+
+    def add_node(id_, label, **properties):
+        nodes.append({'key': id_, 'labels': [label], 'properties': {'id': id_, 'z': 0, **properties}})
+
+    def connect(a, b, distance):
+        edges.append({'from': a, 'to': b, 'distance': distance})
+
+    for row in range(1, n_blocks + 2):
+        y = (row - 1) * (depth + 2)
+        for col in range(1, n_aisles + 1):
+            add_node(f'C{col}.R{row}', 'Intersection', row=row, col=col, x=col * 4, y=y)
+            if col > 1:
+                connect(f'C{col - 1}.R{row}', f'C{col}.R{row}', 4)
+
+    for row in range(1, n_blocks + 1):
+        for col in range(1, n_aisles + 1):
+            previous = f'C{col}.R{row}'
+            for index in range(1, depth + 1):
+                hall = f'C{col}.R{row}.{index}'
+                add_node(hall, 'Hall', row=row, col=col, index=index, x=col * 4, y=(row - 1) * (depth + 2) + index)
+                connect(previous, hall, 1)
+                previous = hall
+
+                for side in (-1, 1):
+                    storage = f'S{col}.{row}.{index}.{side}'
+                    add_node(
+                        storage, 'Storage', row=row, index=index, level=1, adjacentCols=[col],
+                        x=col * 4 + side, y=(row - 1) * (depth + 2) + index
+                    )
+                    connect(hall, storage, 1)
+
+            connect(previous, f'C{col}.R{row + 1}', 1)
+
+    add_node('start', 'Origin', x=0, y=-2)
+    add_node('dest1', 'Origin', x=0, y=n_blocks * (depth + 2) + 2)
+    for col in range(1, n_aisles + 1):
+        connect('start', f'C{col}.R1', 4 * col)
+        connect(f'C{col}.R{n_blocks + 1}', 'dest1', 4 * col)
+
+    return LayoutModel(nodes, edges)
+
+def pick_order(layout: LayoutModel, n_picks: int, seed: int = 0) -> tuple[np.ndarray, dict[str, int]]:
+    storages = [id_ for id_ in layout.node_to_index if id_.startswith('S')]
+    picks = np.random.default_rng(seed).choice(storages, size=n_picks, replace=False).tolist()
+    ids = ['start', 'dest1', *picks]
+    return layout.distance_submatrix(ids), {id_: i for i, id_ in enumerate(ids)}
+
+def test_route_block_orders():
+    aisles = [[(1, 1, 'a'), (5, 1, 'b')], [(2, 1, 'c'), (9, 1, 'd')], [(3, 1, 'e')]]
+
+    assert route_block(aisles, 10, 'return') == ['a', 'b', 'c', 'd', 'e']
+    assert route_block(aisles, 10, 's_shape') == ['a', 'b', 'd', 'c', 'e']
+    assert route_block(aisles, 10, 'largest_gap') == ['a', 'b', 'd', 'e', 'c']
+
+def test_aisle_heuristics_build_valid_tours():
+    layout = build_warehouse()
+    distance_matrix, node_to_index = pick_order(layout, 25)
+
+    for method in AISLE_HEURISTICS:
+        tours = solve_routes(method, distance_matrix, node_to_index, 'start', 'dest1', 2, {}, layout)
+
+        assert len(tours) == 2
+        assert all(tour.tour[0] == 0 and tour.tour[-1] == 1 for tour in tours)
+        assert sorted(x for tour in tours for x in tour.tour[1:-1]) == list(range(2, 27))
+
+def test_aisle_heuristics_are_close_to_ortools():
+    layout = build_warehouse(n_blocks=3, n_aisles=6)
+    distance_matrix, node_to_index = pick_order(layout, 40, seed=3)
+
+    optimum, = solve_routes('ortools', distance_matrix, node_to_index, 'start', 'dest1', 1, {}, layout)
+    for method in ('s_shape', 'largest_gap', 'combined'):
+        tour, = solve_routes(method, distance_matrix, node_to_index, 'start', 'dest1', 1, {}, layout)
+        assert tour.optimal_value < 1.5 * optimum.optimal_value
+
+def test_warm_start_is_never_worse_than_its_heuristic():
+    layout = build_warehouse()
+    distance_matrix, node_to_index = pick_order(layout, 30, seed=1)
+
+    heuristic, = solve_routes('largest_gap', distance_matrix, node_to_index, 'start', 'dest1', 1, {}, layout)
+    warm, = solve_routes(
+        'ortools', distance_matrix, node_to_index, 'start', 'dest1', 1,
+        {'warm_start': 'largest_gap', 'latency_target': 0.1}, layout
+    )
+    assert warm.optimal_value <= heuristic.optimal_value
@@ -0,0 +1,83 @@
+import numpy as np
+from logic.allocation import allocate_stock
+from logic.inventory_index import InventoryIndex
+from logic.routing_operations import get_distance_matrix, solve_routes
+from logic.warehouse_operations import assert_route
+from test_aisle_heuristics import build_warehouse
+
+def scattered_inventory(layout, n_products: int = 30, copies: int = 4, seed: int = 0) -> InventoryIndex:
+    '''Every product stored in a few random storages of the layout.'''
+    rng = np.random.default_rng(seed)
+    storages = [i for i, labels in enumerate(layout.labels) if 'Storage' in labels]
+    stock = list()
+    for p in range(n_products):
+        for i in rng.choice(storages, size=copies, replace=False):
+            properties = layout.properties[i]
+            stock.append({
+                'product_id': f'Product_{p}', 
+                'storage_id': properties['id'], 
+                'quantity': int(rng.integers(5, 20)),
+                'x': properties['x'], 
+                'y': properties['y'], 
+                'z': properties['z']
+            })
+
+    coordinates = {p['id']: (p['x'], p['y'], p['z']) for p in layout.properties}
+    return InventoryIndex(stock, coordinates)
+
+def tour_length(layout, storage_locations: list[dict]) -> float:
+    distance_matrix, node_to_index = get_distance_matrix(None, storage_locations, layout=layout)
+    tour, = solve_routes('ortools', distance_matrix, node_to_index, 'start', 'dest1', 1, {'latency_target': 0.2})
+    return tour.optimal_value
+
+def test_route_aware_allocation_covers_demand_with_shorter_tours():
+    layout = build_warehouse(n_blocks=3, n_aisles=6)
+    inventory = scattered_inventory(layout)
+    rng = np.random.default_rng(1)
+
+    greedy_total, route_aware_total = 0, 0
+    for _ in range(5):
+        products = rng.choice(list(inventory.offer), size=8, replace=False)
+        product_list = {str(p): int(rng.integers(1, 25)) for p in products}
+
+        greedy = allocate_stock(None, 'start', 'dest1', product_list, 'greedy', inventory, layout)
+        route_aware = allocate_stock(None, 'start', 'dest1', product_list, 'route_aware', inventory, layout)
+
+        assert_route(product_list, route_aware)
+        assert all(0 < line['take'] <= line['quantity'] for line in route_aware)
+
+        greedy_total += tour_length(layout, greedy)
+        route_aware_total += tour_length(layout, route_aware)
+
+    assert route_aware_total < greedy_total
+
+def test_stop_on_the_route_serves_other_products():
+    layout = build_warehouse()
+    shared, far = 'S1.1.5.1', 'S4.2.10.1'
+    coordinates = {p['id']: (p['x'], p['y'], p['z']) for p in layout.properties}
+    stock = [
+        {'product_id': 'A', 'storage_id': shared, 'quantity': 10, 'x': 5, 'y': 5, 'z': 0},
+        {'product_id': 'B', 'storage_id': shared, 'quantity': 10, 'x': 5, 'y': 5, 'z': 0},
+        {'product_id': 'B', 'storage_id': 'S1.1.1.1', 'quantity': 10, 'x': 5, 'y': 1, 'z': 0},
+        {'product_id': 'C', 'storage_id': far, 'quantity': 10, 'x': 17, 'y': 10, 'z': 0},
+    ]
+    inventory = InventoryIndex(stock, coordinates)
+
+    lines = allocate_stock(None, 'start', 'dest1', {'A': 5, 'B': 5}, 'route_aware', inventory, layout)
+    assert {line['storage_id'] for line in lines} == {shared}
+
+def test_demand_beyond_the_candidate_storages_is_covered():
+    layout = build_warehouse(n_blocks=3, n_aisles=6)
+    storages = [properties for properties, labels in zip(layout.properties, layout.labels) if 'Storage' in labels]
+    stock = [
+        {'product_id': 'A', 'storage_id': p['id'], 'quantity': 1 if k < 80 else 0, 'x': p['x'], 'y': p['y'], 'z': p['z']}
+        for k, p in enumerate(storages[:100])
+    ]
+    coordinates = {p['id']: (p['x'], p['y'], p['z']) for p in layout.properties}
+    inventory = InventoryIndex(stock, coordinates)
+
+    greedy = allocate_stock(None, 'start', 'dest1', {'A': 60}, 'greedy', inventory, layout)
+    route_aware = allocate_stock(None, 'start', 'dest1', {'A': 60}, 'route_aware', inventory, layout)
+
+    assert len(greedy) == len(route_aware) == 60
+    assert_route({'A': 60}, route_aware)
@@ -0,0 +1,81 @@
+import pytest
+from graph_db.backend import InMemoryBackend
+from logic.warehouse_operations import assert_route
+from services.picking_service import PickingService
+
+def stock_lines(backend: InMemoryBackend, product_id: str) -> list[dict]:
+    return [
+        {'storage_id': storage_id, 'quantity': products[product_id]}
+        for storage_id, products in backend.contains.items() if product_id in products
+    ]
+
+def test_offer_and_allocation_follow_the_stock(memory_backend):
+    backend = memory_backend
+    product_list = {'Product_1': 20, 'Product_2': 5}
+
+    offer = backend.product_offer(list(product_list))
+    assert offer['Product_1'] == sum(line['quantity'] for line in stock_lines(backend, 'Product_1'))
+
+    storage_locations = backend.storage_locations('start', product_list)
+    assert_route(product_list, storage_locations)
+
+    with pytest.raises(AssertionError, match='no registered product'):
+        backend.product_offer(['Product_unknown'])
+
+def test_reserve_and_move_update_the_snapshots(memory_backend):
+    backend = memory_backend
+    line = stock_lines(backend, 'Product_1')[0]
+    storage_id, quantity = line['storage_id'], line['quantity']
+    _, before = backend.snapshots()
+
+    backend.reserve_products([{'from_location': storage_id, 'gwin': 'Product_1', 'quantity': quantity}])
+    _, after = backend.snapshots()
+
+    assert after is not before
+    assert after.offer['Product_1'] == before.offer['Product_1'] - quantity
+    assert 'Product_1' not in backend.contains[storage_id]
+    assert backend.reserved[storage_id]['Product_1'] == quantity
+
+    other = stock_lines(backend, 'Product_1')[0]
+    with pytest.raises(AssertionError, match='not enough to move'):
+        backend.move_product_to_location('Product_1', other['storage_id'], storage_id, other['quantity'] + 1)
+    with pytest.raises(AssertionError, match='does not have product'):
+        backend.move_product_to_location('Product_1', storage_id, other['storage_id'], 1)
+
+    backend.move_product_to_location('Product_1', other['storage_id'], storage_id, 1)
+    assert backend.contains[storage_id]['Product_1'] == 1
+    assert backend.snapshots()[1].offer['Product_1'] == after.offer['Product_1']
+
+def test_picking_service_runs_on_the_memory_backend(memory_backend):
+    backend = memory_backend
+    product_list = {'Product_1': 12, 'Product_3': 4, 'Product_7': 2}
+
+    solution = PickingService(is_testing=False, backend=backend).optimize(product_list, latency_target=0.1)
+    assert_route(product_list, [line for summary in solution.summaries for line in summary])
+
+    # Legs come from the backend in the same shape the pipeline renders
+    distance_matrix, node_to_index = backend.distance_matrix(solution.summaries[0])
+    tour = [node_to_index['start']] + [node_to_index[line['storage_id']] for line in solution.summaries[0]]
+    legs = backend.find_path(list(dict.fromkeys(tour)) + [node_to_index['dest1']], node_to_index)
+    assert legs[0]['from_location'] == 'start' and legs[-1]['to_location'] == 'dest1'
+    assert legs[0]['distance'] == pytest.approx(distance_matrix[tour[0]][tour[1]])
+
+def test_fetch_returns_the_snapshots_the_solve_works_on(memory_backend):
+    picking_service = PickingService(is_testing=False, backend=memory_backend)
+    product_list = {'Product_1': 12, 'Product_3': 4}
+
+    layout, inventory = picking_service.fetch()
+    assert picking_service.fetch() == (layout, inventory)
+    assert all(inventory.offer[product_id] >= quantity for product_id, quantity in product_list.items())
+
+    solution = PickingService._solve(
+        layout, inventory, product_list, 'start', 'dest1', 1, 'ortools', {'latency_target': 0.1}, 'greedy'
+    )
+    assert_route(product_list, [line for summary in solution.summaries for line in summary])
+
+    memory_backend.reserve_products([
+        {'from_location': line['storage_id'], 'gwin': line['product_id'], 'quantity': line['take']}
+        for summary in solution.summaries for line in summary
+    ])
+    assert picking_service.fetch()[0] is layout
+    assert picking_service.fetch()[1].offer['Product_1'] == inventory.offer['Product_1'] - 12
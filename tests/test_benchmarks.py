@@ -0,0 +1,17 @@
+import copy
+from benchmarks.pipeline import STAGES, run_suite, compare
+
+def test_suite_reports_every_stage_and_flags_regressions():
+    report = run_suite(sizes=(100,), pick_list_sizes=(3,), num_routes=(1,), runs=3, solver_params={'latency_target': 0.05})
+    result = report['scenarios']['100-locations/3-lines/1-routes']
+
+    assert set(result['stages']) == set(STAGES)
+    assert result['total']['p50'] <= result['total']['p99']
+    assert result['peak_memory_mb'] > 0 and result['travel_distance'] > 0
+    assert compare(report, report) == []
+
+    slower = copy.deepcopy(report)
+    slower['scenarios']['100-locations/3-lines/1-routes']['stages']['distance_matrix']['p90'] += 0.5
+    regressions = compare(slower, report)
+
+    assert len(regressions) == 1 and 'distance_matrix p90' in regressions[0]
@@ -0,0 +1,52 @@
+import csv
+import os
+from graph_db.bulk_loader import WarehouseGraph, graph_statements, export_csv
+from graph_db.seed import build_warehouse, build_products, build_stock
+from graph_db.gaon_seed import build_gaon_warehouse
+from logic.layout_model import LayoutModel
+
+def test_seed_graph_is_connected():
+    for graph in (build_warehouse(), build_gaon_warehouse()):
+        model = LayoutModel(graph.nodes, graph.edges)
+        storages = [storage['id'] for storage in graph.by_label('Storage')]
+
+        assert all(model.distance('start', storage) < float('inf') for storage in storages)
+        assert all(model.distance(storage, 'dest1') < float('inf') for storage in storages)
+
+def test_gaon_wall_only_opens_at_last_column():
+    graph = build_gaon_warehouse()
+    n_cols = max(i['col'] for i in graph.by_label('Intersection'))
+
+    assert [i['col'] for i in graph.by_label('Intersection') if i['row'] == 2] == [n_cols]
+
+def test_statements_respect_batch_size():
+    graph = build_warehouse()
+    statements = list(graph_statements(graph, batch_size=100))
+
+    assert all(len(rows) <= 100 for _, rows in statements)
+    assert sum(len(rows) for query, rows in statements if 'CREATE (n:' in query) == len(graph.nodes)
+    assert sum(len(rows) for query, rows in statements if 'CONNECTED_TO' in query) == len(graph.edges)
+
+def test_export_csv_sums_stock(tmp_path):
+    graph = WarehouseGraph()
+    build_products(graph)
+    graph.add_node('Storage', id='S1', rack='A', index=1, level=1, row=1, adjacentCols=[1], x=0.5, y=1, z=0)
+    build_stock(graph, ['S1'])
+    graph.add_stock('S1', graph.stock[0]['product_id'], 10)
+
+    files = export_csv(graph, str(tmp_path))
+    assert [os.path.basename(path) for path in files['relationships']] == ['connected_to.csv', 'contains.csv']
+
+    with open(os.path.join(tmp_path, 'storage_nodes.csv')) as file:
+        header = next(csv.reader(file))
+    assert header[0] == ':ID' and header[-1] == ':LABEL'
+    assert 'adjacentCols:int[]' in header and 'x:float' in header
+
+    with open(files['relationships'][1]) as file:
+        rows = list(csv.DictReader(file))
+    expected = dict()
+    for line in graph.stock:
+        expected[line['product_id']] = expected.get(line['product_id'], 0) + line['quantity']
+    assert {row[':END_ID']: int(row['quantity:int']) for row in rows} == {
+        f'Product:{product_id}': quantity for product_id, quantity in expected.items()
+    }
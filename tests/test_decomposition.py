@@ -0,0 +1,112 @@
+from time import time
+from logic.decomposition import Decomposition, kmedoids, aisle_clusters, solve_decomposed
+from logic.routing_operations import solver_job, run_solver
+from logic.solver_budget import SolverBudget, plan_budget
+from logic.warehouse_operations import assert_route
+from services.picking_service import PickingService
+from test_aisle_heuristics import build_warehouse, pick_order
+
+def solve_inline(jobs: list[dict]) -> list:
+    return [run_solver(**job) for job in jobs]
+
+def test_clusters_cover_every_stop_once():
+    layout = build_warehouse(2, 6, 12)
+    distance_matrix, node_to_index = pick_order(layout, 60, seed=2)
+    job = solver_job('ortools', distance_matrix, node_to_index, 'start', 'dest1', 1, {}, layout)
+    stops = [i for i in range(len(distance_matrix)) if i not in (job['start_index'], job['dest_index'])]
+
+    clusters = kmedoids(job['distance_matrix'], stops, 4)
+    assert sorted(stop for cluster in clusters for stop in cluster) == stops
+
+    runs = aisle_clusters(layout.aisle_attributes(list(node_to_index)), stops, 4)
+    assert len(runs) == 4 and sorted(stop for run in runs for stop in run) == stops
+    assert max(map(len, runs)) - min(map(len, runs)) <= 1
+
+def test_decomposed_routes_visit_every_stop():
+    layout = build_warehouse(2, 6, 12)
+    distance_matrix, node_to_index = pick_order(layout, 80, seed=4)
+    job = solver_job('ortools', distance_matrix, node_to_index, 'start', 'dest1', 2, {'latency_target': 0.2}, layout)
+    stops = set(range(len(distance_matrix))) - {job['start_index'], job['dest_index']}
+
+    for method in ('kmedoids', 'aisle'):
+        tours = solve_decomposed(
+            job['solver'],
+            job['distance_matrix'],
+            job['start_index'],
+            job['dest_index'],
+            2,
+            job['solver_params'],
+            Decomposition(method=method, cluster_size=20, polish_time=0.2),
+            solve_inline,
+            layout.aisle_attributes(list(node_to_index))
+        )
+
+        assert len(tours) == 2
+        visited = [stop for tour in tours for stop in tour.tour[1:-1]]
+        assert sorted(visited) == sorted(stops)
+        assert all(tour.tour[0] == job['start_index'] and tour.tour[-1] == job['dest_index'] for tour in tours)
+
+def test_decomposed_solve_stays_within_its_latency_target():
+    layout = build_warehouse(2, 6, 12)
+    distance_matrix, node_to_index = pick_order(layout, 160, seed=6)
+    # Guided local search without a plateau would spend the whole time limit on every cluster
+    budget = SolverBudget(time_limit=5)
+    job = solver_job(
+        'ortools', distance_matrix, node_to_index, 'start', 'dest1', 2, {'latency_target': 1.0, 'budget': budget}, layout
+    )
+    jobs = list()
+
+    def solve_recorded(cluster_jobs: list[dict]) -> list:
+        jobs.extend(cluster_jobs)
+        return solve_inline(cluster_jobs)
+
+    started = time()
+    tours = solve_decomposed(
+        job['solver'],
+        job['distance_matrix'],
+        job['start_index'],
+        job['dest_index'],
+        2,
+        job['solver_params'],
+        Decomposition(cluster_size=20, polish_time=1.0),
+        solve_recorded
+    )
+    assert time() - started < 1.0 + 0.5
+
+    # The clusters are solved one after the other and share the target with the polish
+    assert len(tours) == 2 and len(jobs) >= 8
+    assert all(job['solver_params']['budget'].time_limit <= 1.0 / (len(jobs) + 1) for job in jobs)
+
+    # Without a budget every cluster plans one for its own size
+    planned = solver_job('ortools', distance_matrix, node_to_index, 'start', 'dest1', 2, {'latency_target': 1.0}, layout)
+    jobs.clear()
+    solve_decomposed(
+        planned['solver'],
+        planned['distance_matrix'],
+        planned['start_index'],
+        planned['dest_index'],
+        2,
+        planned['solver_params'],
+        Decomposition(cluster_size=20),
+        solve_recorded,
+        cluster_budget=plan_budget
+    )
+    assert all(
+        job['solver_params']['budget'] == plan_budget(len(job['distance_matrix']), 1, job['solver_params']['latency_target'])
+        for job in jobs
+    )
+
+def test_service_routes_clusters_of_an_order(memory_backend):
+    picking_service = PickingService(is_testing=True, backend=memory_backend)
+    product_list = {f'Product_{i}': 2 for i in range(1, 30)}
+
+    solution = picking_service.optimize(
+        product_list,
+        num_routes=2,
+        latency_target=0.2,
+        decomposition={'method': 'kmedoids', 'cluster_size': 10},
+        debug=False
+    )
+
+    assert len(solution.summaries) == 2
+    assert_route(product_list, [line for summary in solution.summaries for line in summary])
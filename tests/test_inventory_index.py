@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from logic.inventory_index import InventoryIndex
+from logic.warehouse_operations import assert_enough_offer, assert_route, get_storage_locations
+
+def build_inventory(n_products: int = 20, n_storages: int = 300, seed: int = 0) -> tuple[InventoryIndex, list[dict]]:
+    rng = np.random.default_rng(seed)
+    stock = [
+        {
+            'product_id': f'Product_{rng.integers(n_products)}', 
+            'storage_id': f'S{i}', 
+            'quantity': int(rng.integers(0, 50)),
+            'x': float(rng.integers(0, 100)), 
+            'y': float(rng.integers(0, 100)), 
+            'z': float(rng.integers(0, 3))
+        }
+        for i in range(n_storages)
+    ]
+    stock.append({'product_id': 'Empty', 'storage_id': None, 'quantity': None, 'x': None, 'y': None, 'z': None})
+    return InventoryIndex(stock, {'start': (0, 0, 0), 'dock': (100, 50, 0)}), stock
+
+def retriever(stock: list[dict], origin: tuple, product_list: dict[str, int]) -> list[dict]:
+    '''Straight port of STORAGE_LOCATION_RETRIEVER.'''
+    lines = list()
+    for product_id in sorted(product_list):
+        storages = sorted(
+            (x for x in stock if x['product_id'] == product_id and x['storage_id'] is not None),
+            key=lambda x: (
+                abs(origin[0] - x['x']) + abs(origin[1] - x['y']) + abs(origin[2] - x['z']) * 100, 
+                -x['quantity']
+            )
+        )
+        previous = 0
+        for storage in storages:
+            take = min(storage['quantity'], product_list[product_id] - previous)
+            if previous < product_list[product_id] and take > 0:
+                lines.append({
+                    'product_id': product_id, 
+                    'quantity': storage['quantity'], 
+                    'storage_id': storage['storage_id'], 
+                    'take': take
+                })
+            previous += storage['quantity']
+    return lines
+
+def test_allocation_matches_the_retriever_query():
+    inventory, stock = build_inventory()
+    rng = np.random.default_rng(1)
+
+    for origin_id, origin in (('start', (0, 0, 0)), ('dock', (100, 50, 0))):
+        for _ in range(20):
+            products = rng.choice(list(inventory.offer), size=5, replace=False)
+            product_list = {
+                str(p): int(rng.integers(1, inventory.offer[p] + 1)) 
+                for p in products if inventory.offer[p] > 0
+            }
+
+            storage_locations = get_storage_locations(None, origin_id, product_list, inventory)
+            assert storage_locations == retriever(stock, origin, product_list)
+            assert_route(product_list, storage_locations)
+
+def test_offer_check_from_the_index():
+    inventory, _ = build_inventory()
+    product_id = next(p for p, offer in inventory.offer.items() if offer > 0)
+
+    assert_enough_offer(None, {product_id: inventory.offer[product_id]}, inventory)
+    with pytest.raises(AssertionError, match='Insufficient PRODUCT offer'):
+        assert_enough_offer(None, {product_id: inventory.offer[product_id] + 1}, inventory)
+    with pytest.raises(AssertionError, match='Insufficient PRODUCT offer'):
+        assert_enough_offer(None, {'Empty': 1}, inventory)
+    with pytest.raises(AssertionError, match='no registered product'):
+        assert_enough_offer(None, {'Unknown': 1}, inventory)
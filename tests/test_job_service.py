@@ -0,0 +1,91 @@
+import pytest
+from threading import Event
+from time import sleep
+from services.admission_control import Overloaded
+from services.job_service import JobScheduler, DONE, FAILED, EXPIRED
+
+def test_jobs_run_by_priority_then_deadline():
+    started, release, order = Event(), Event(), list()
+
+    def runner(job):
+        if job.product_list == {'blocker': 1}:
+            started.set()
+            release.wait()
+        order.append(next(iter(job.product_list)))
+        return len(order)
+
+    scheduler = JobScheduler(runner, max_workers=1)
+    blocker, _ = scheduler.submit({'blocker': 1})
+    started.wait(timeout=5)
+    bulk, _ = scheduler.submit({'bulk': 1}, priority=0)
+    late, _ = scheduler.submit({'late': 1}, priority=5, deadline=60)
+    soon, _ = scheduler.submit({'soon': 1}, priority=5, deadline=30)
+
+    assert scheduler.queue_position(bulk.id) == 2
+    release.set()
+    for job in (blocker, bulk, late, soon):
+        assert scheduler.wait(job.id, timeout=5).status == DONE
+    scheduler.shutdown()
+
+    assert order == ['blocker', 'soon', 'late', 'bulk']
+
+def test_duplicate_orders_share_a_job():
+    started, release = Event(), Event()
+    scheduler = JobScheduler(lambda job: started.set() or release.wait(), max_workers=1)
+    scheduler.submit({'blocker': 1})
+    started.wait(timeout=5)
+
+    job, deduplicated = scheduler.submit({'P1': 2, 'P2': 3})
+    same, deduplicated_again = scheduler.submit({'P2': 3, 'P1': 2, 'P3': 0}, priority=9)
+    other, _ = scheduler.submit({'P1': 2, 'P2': 3}, {'num_routes': 2})
+
+    assert not deduplicated and deduplicated_again
+    assert same is job and job.priority == 9
+    assert other is not job
+
+    release.set()
+    scheduler.wait(other.id, timeout=5)
+    scheduler.shutdown()
+
+def test_failed_and_expired_jobs():
+    started, release = Event(), Event()
+
+    def runner(job):
+        started.set()
+        release.wait()
+        if job.product_list == {'missing': 1}:
+            raise ValueError('Insufficient PRODUCT offer')
+
+    scheduler = JobScheduler(runner, max_workers=1)
+    scheduler.submit({'blocker': 1})
+    started.wait(timeout=5)
+    failed, _ = scheduler.submit({'missing': 1})
+    expired, _ = scheduler.submit({'P1': 1}, deadline=0.01)
+
+    sleep(0.05)
+    release.set()
+    assert scheduler.wait(failed.id, timeout=5).status == FAILED
+    assert failed.error == 'Insufficient PRODUCT offer'
+    assert scheduler.wait(expired.id, timeout=5).status == EXPIRED
+    scheduler.shutdown()
+
+def test_full_queue_rejects_new_orders():
+    started, release = Event(), Event()
+    scheduler = JobScheduler(lambda job: started.set() or release.wait(), max_workers=1, max_queue=2)
+    scheduler.submit({'blocker': 1})
+    started.wait(timeout=5)
+    first, _ = scheduler.submit({'P1': 1})
+    second, _ = scheduler.submit({'P2': 1})
+
+    with pytest.raises(Overloaded) as rejected:
+        scheduler.submit({'P3': 1})
+    assert rejected.value.retry_after >= 2
+
+    # Joining a queued order adds no job
+    assert scheduler.submit({'P1': 1}, priority=3) == (first, True)
+
+    release.set()
+    assert scheduler.wait(second.id, timeout=5).status == DONE
+    job, deduplicated = scheduler.submit({'P3': 1})
+    assert not deduplicated and scheduler.wait(job.id, timeout=5).status == DONE
+    scheduler.shutdown()
@@ -0,0 +1,60 @@
+import json
+from dataclasses import asdict
+from data.layouts import LAYOUTS, standard_row
+from logic.layout_compiler import LayoutSpec, RowSpec, WallSpec, OriginSpec, compile_layout
+from logic.layout_model import LayoutModel
+
+def small_layout(**overrides) -> LayoutSpec:
+    spec = dict(
+        name='small',
+        rows=[RowSpec(row=1, elements=standard_row(3)), RowSpec(row=2, elements=standard_row(3), rack_offset=4)],
+        indexes=3,
+        levels=2,
+        hall={'x': 4, 'y': 6},
+        pallet={'x': 1.2, 'y': 1, 'z': 2},
+        origins=[
+            OriginSpec(id='start', col=1, y=-5, inbound=True, intersections=['C1.R1']),
+            OriginSpec(id='dest1', col=3, y=-5, inbound=False, intersections=['C3.R1']),
+        ]
+    )
+    spec.update(overrides)
+    return LayoutSpec(**spec)
+
+def test_compiled_arrays_match_graph():
+    layout = compile_layout(small_layout())
+    graph = layout.graph
+
+    assert len(graph.by_label('Storage')) == 2 * 4 * 3 * 2
+    assert layout.coordinates.shape == (len(graph.nodes), 3)
+    assert layout.edge_index.shape == (len(graph.edges), 2)
+    for (u, v), distance, edge in zip(layout.edge_index, layout.edge_distance, graph.edges):
+        assert (graph.nodes[u]['key'], graph.nodes[v]['key'], distance) == (edge['from'], edge['to'], edge['distance'])
+
+def test_fingerprint_tracks_geometry_only():
+    layout = small_layout()
+    same = LayoutSpec.from_dict(json.loads(json.dumps(asdict(layout))))
+
+    assert compile_layout(layout).fingerprint == compile_layout(same).fingerprint
+    assert compile_layout(layout).fingerprint != compile_layout(small_layout(levels=3)).fingerprint
+
+def test_wall_cuts_intersection_row():
+    open_model = LayoutModel.from_layout(compile_layout(small_layout()))
+    walled = compile_layout(small_layout(walls=[WallSpec(row=2, openings=[3])]))
+    walled_model = LayoutModel.from_layout(walled)
+
+    assert sorted(i['col'] for i in walled.graph.by_label('Intersection') if i['row'] == 2) == [3]
+    assert walled_model.fingerprint == walled.fingerprint
+
+    # Crossing to the second row now means walking around to the last column
+    storage = 'E.1.1'
+    assert walled_model.distance('start', storage) > open_model.distance('start', storage)
+    assert walled_model.distance('start', storage) < float('inf')
+
+def test_site_layouts_compile():
+    for name, spec in LAYOUTS.items():
+        layout = compile_layout(spec)
+        model = LayoutModel.from_layout(layout)
+        storages = [storage['id'] for storage in layout.graph.by_label('Storage')]
+
+        assert layout.name == name
+        assert all(model.distance('start', storage) < float('inf') for storage in storages)
@@ -0,0 +1,106 @@
+import heapq
+import random
+import numpy as np
+import pytest
+from logic.layout_model import LayoutModel
+
+def build_graph(n_nodes: int, n_edges: int, seed: int) -> tuple[list[dict], list[dict]]:
+    rng = random.Random(seed)
+    nodes = [
+        {'key': f'k{i}', 'labels': ['Storage'], 'properties': {'id': f'n{i}', 'z': 0}}
+        for i in range(n_nodes)
+    ]
+
+    # Random tree plus a few extra edges, so chains, cycles and pendant trees all appear
+    edges = [
+        {'from': f'k{i}', 'to': f'k{rng.randrange(i)}', 'distance': rng.randint(1, 9)}
+        for i in range(1, n_nodes)
+    ]
+    edges += [
+        {'from': f'k{rng.randrange(n_nodes)}', 'to': f'k{rng.randrange(n_nodes)}', 'distance': rng.randint(1, 9)}
+        for _ in range(n_edges)
+    ]
+    return nodes, edges
+
+def dijkstra(nodes: list[dict], edges: list[dict], source: str) -> dict[str, float]:
+    adjacency = {node['key']: [] for node in nodes}
+    for edge in edges:
+        adjacency[edge['from']].append((edge['to'], edge['distance']))
+        adjacency[edge['to']].append((edge['from'], edge['distance']))
+
+    distances = {source: 0}
+    heap = [(0, source)]
+    while heap:
+        distance, u = heapq.heappop(heap)
+        if distance > distances[u]:
+            continue
+        for v, w in adjacency[u]:
+            if distance + w < distances.get(v, np.inf):
+                distances[v] = distance + w
+                heapq.heappush(heap, (distance + w, v))
+    return distances
+
+def test_distance_submatrix_matches_dijkstra():
+    for seed in range(10):
+        nodes, edges = build_graph(60, seed % 5, seed)
+        model = LayoutModel(nodes, edges)
+
+        ids = [node['properties']['id'] for node in nodes]
+        matrix = model.distance_submatrix(ids)
+
+        for i, node in enumerate(nodes):
+            expected = dijkstra(nodes, edges, node['key'])
+            for j, other in enumerate(nodes):
+                assert matrix[i, j] == expected.get(other['key'], np.inf)
+
+def test_distance_submatrix_keeps_requested_order():
+    nodes, edges = build_graph(30, 3, 42)
+    model = LayoutModel(nodes, edges)
+
+    matrix = model.distance_submatrix(['n5', 'n2', 'n9'])
+    assert matrix[0, 2] == model.distance('n5', 'n9')
+    assert matrix[1, 0] == model.distance('n2', 'n5')
+    assert np.allclose(matrix, matrix.T)
+
+def test_leg_follows_edges_and_matches_distance():
+    for seed in range(5):
+        nodes, edges = build_graph(50, seed, seed)
+        model = LayoutModel(nodes, edges)
+        ids = [node['properties']['id'] for node in nodes]
+        matrix = model.distance_submatrix(ids)
+
+        for i, from_id in enumerate(ids):
+            for j, to_id in enumerate(ids):
+                u, v = model.node_to_index[from_id], model.node_to_index[to_id]
+                path = model.path(u, v)
+
+                assert path[0] == u and path[-1] == v
+                assert all(b in model.adjacency[a] for a, b in zip(path, path[1:]))
+                assert np.isclose(model.leg(from_id, to_id)['distance'], matrix[i, j])
+
+def test_leg_keeps_ground_nodes_only():
+    nodes = [
+        {'key': 'a', 'labels': ['Origin'], 'properties': {'id': 'start', 'z': 0}},
+        {'key': 'b', 'labels': ['Storage'], 'properties': {'id': 'A.1.1', 'z': 0}},
+        {'key': 'c', 'labels': ['Storage'], 'properties': {'id': 'A.2.1', 'z': 2}},
+    ]
+    edges = [
+        {'from': 'a', 'to': 'b', 'distance': 3},
+        {'from': 'b', 'to': 'c', 'distance': 2},
+    ]
+    leg = LayoutModel(nodes, edges).leg('A.2.1', 'start')
+
+    assert leg['distance'] == 5
+    assert [node['id'] for node in leg['path']] == ['A.1.1', 'start']
+
+def test_leg_between_disconnected_nodes_fails():
+    nodes = [
+        {'key': 'a', 'labels': ['Origin'], 'properties': {'id': 'start', 'z': 0}},
+        {'key': 'b', 'labels': ['Storage'], 'properties': {'id': 'A.1.1', 'z': 0}},
+        {'key': 'c', 'labels': ['Storage'], 'properties': {'id': 'B.1.1', 'z': 0}},
+    ]
+    model = LayoutModel(nodes, [{'from': 'a', 'to': 'b', 'distance': 3}])
+
+    with pytest.raises(AssertionError, match='not reachable'):
+        model.leg('start', 'B.1.1')
+    assert model.leg('start', 'A.1.1')['distance'] == 3
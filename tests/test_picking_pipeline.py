@@ -0,0 +1,60 @@
+from services.picking_service import PickingService
+from logic.warehouse_operations import assert_route
+from test_aisle_heuristics import build_warehouse
+from test_allocation import scattered_inventory
+
+def test_pipeline_runs_on_snapshots_only():
+    layout = build_warehouse(n_blocks=3, n_aisles=6)
+    inventory = scattered_inventory(layout)
+    product_list = {'Product_1': 12, 'Product_4': 30, 'Product_9': 3}
+
+    solution = PickingService._solve(
+        layout, inventory, product_list, 'start', 'dest1', 2, 'ortools', {'latency_target': 0.2}, 'greedy'
+    )
+
+    assert len(solution.paths) == len(solution.summaries) == 2
+    assert_route(product_list, [line for summary in solution.summaries for line in summary])
+    assert solution.paths[0][0]['from_location'] == 'start'
+    assert solution.paths[0][-1]['to_location'] == 'dest1'
+
+def test_batch_and_wave_share_the_allocation():
+    layout = build_warehouse(n_blocks=3, n_aisles=6)
+    inventory = scattered_inventory(layout)
+    orders = {'o1': {'Product_1': 5, 'Product_2': 4}, 'o2': {'Product_1': 7}, 'o3': {'Product_3': 2}}
+    configs = [PickingService._order_config(latency_target=0.1) for _ in orders]
+
+    batch = PickingService._solve_batch(layout, inventory, list(orders.values()), configs, False)
+    wave = PickingService._solve_wave(
+        layout, inventory, orders, 'start', 'dest1', 1, 2, None, 'ortools', {'latency_target': 0.1}, False
+    )
+
+    for product_list, solution in zip(orders.values(), batch.solutions):
+        assert_route(product_list, [line for summary in solution.summaries for line in summary])
+
+    assert sorted(order_id for batch in wave.batches for order_id in batch.order_ids) == sorted(orders)
+    for batch in wave.batches:
+        for order_id, lines in batch.order_summaries.items():
+            assert_route(orders[order_id], lines)
+
+def test_batch_orders_from_different_starts_never_share_stock():
+    layout = build_warehouse(n_blocks=3, n_aisles=6)
+    inventory = scattered_inventory(layout)
+    offer = inventory.offer['Product_1']
+
+    # The first order takes nearly all the stock, the second one leaves from the other end
+    product_lists = [{'Product_1': offer - 3}, {'Product_1': 3}]
+    configs = [
+        PickingService._order_config(latency_target=0.1),
+        PickingService._order_config(start_id='dest1', dest_id='start', latency_target=0.1)
+    ]
+    batch = PickingService._solve_batch(layout, inventory, product_lists, configs, False)
+
+    promised = dict()
+    for product_list, solution in zip(product_lists, batch.solutions):
+        lines = [line for summary in solution.summaries for line in summary]
+        assert_route(product_list, lines)
+        for line in lines:
+            promised[line['storage_id']] = promised.get(line['storage_id'], 0) + line['take']
+
+    stock = dict(zip(inventory.products['Product_1']['storage_ids'], inventory.products['Product_1']['quantities']))
+    assert all(take <= stock[storage_id] for storage_id, take in promised.items())
@@ -0,0 +1,107 @@
+import pytest
+import logic.portfolio
+import services.picking_service
+from logic.portfolio import PORTFOLIO, MIN_RACES, PortfolioStats, preferred_budget, race
+from logic.routing_operations import run_solver
+from logic.solver_executor import SolverExecutor
+from logic.warehouse_operations import assert_route
+from services.picking_service import PickingService
+from test_aisle_heuristics import build_warehouse, pick_order
+
+def test_wins_rank_configurations_and_set_the_default():
+    stats = PortfolioStats()
+    winner, loser = PORTFOLIO[4], PORTFOLIO[0]
+
+    for _ in range(MIN_RACES - 1):
+        stats.record(40, [loser, winner], winner)
+    assert stats.preferred(40) is None
+    assert preferred_budget(40, stats=stats) is None
+
+    stats.record(40, [loser, winner], winner)
+    assert stats.preferred(40) == winner and stats.preferred(150) is None
+
+    ranking = stats.ranking(40)
+    assert ranking[0] == winner and ranking[-1] == loser
+
+    budget = preferred_budget(40, stats=stats)
+    assert (budget.first_solution_strategy, budget.local_search_metaheuristic) == winner
+    # Small orders keep their greedy descent
+    assert preferred_budget(6, stats=stats) is None
+
+def test_race_returns_the_shortest_routes_of_the_workers():
+    layout = build_warehouse(2, 6, 12)
+    distance_matrix, _ = pick_order(layout, 40, seed=5)
+    stats = PortfolioStats()
+
+    executor = SolverExecutor(max_workers=2)
+    try:
+        result = race(distance_matrix, 0, 1, 2, executor.race, executor.max_workers, 4, 0.3, stats=stats)
+    finally:
+        executor.shutdown()
+
+    assert result.config in PORTFOLIO
+    assert sorted(stop for tour in result.tours for stop in tour.tour[1:-1]) == list(range(2, 42))
+    assert sum(stats.races.values()) == 4 and sum(stats.wins.values()) == 1
+
+def test_service_races_a_portfolio(memory_backend):
+    picking_service = PickingService(is_testing=True, backend=memory_backend)
+    product_list = {'Product_1': 12, 'Product_3': 4, 'Product_7': 2, 'Product_9': 3}
+
+    solution = picking_service.optimize(product_list, latency_target=0.1, portfolio=True, debug=False)
+    assert_route(product_list, solution.summaries[0])
+    assert solution.portfolio_config in PORTFOLIO
+    assert solution.performance_metrics['portfolio_config'] == solution.portfolio_config
+
+def test_race_passes_the_other_solver_params_to_every_configuration():
+    layout = build_warehouse(2, 6, 12)
+    distance_matrix, _ = pick_order(layout, 20, seed=2)
+    jobs = list()
+
+    def race_many(race_jobs: list[dict], timeout: float) -> list:
+        jobs.extend(race_jobs)
+        return [run_solver(**job) for job in race_jobs]
+
+    race(distance_matrix, 0, 1, 1, race_many, 2, 2, 0.1, 'makespan', PortfolioStats(), {'initial_routes': [[2, 3]]})
+    assert all(job['solver_params']['initial_routes'] == [[2, 3]] for job in jobs)
+    assert all(job['solver_params']['objective'] == 'makespan' for job in jobs)
+
+    with pytest.raises(AssertionError, match='plans the budget'):
+        race(distance_matrix, 0, 1, 1, race_many, 2, 2, solver_params={'budget': None})
+
+def test_service_races_a_warm_started_portfolio(memory_backend):
+    picking_service = PickingService(is_testing=True, backend=memory_backend)
+    product_list = {'Product_1': 12, 'Product_3': 4}
+
+    solution = picking_service.optimize(
+        product_list, solver_params={'warm_start': 'largest_gap'}, latency_target=0.1, portfolio=True, debug=False
+    )
+    assert_route(product_list, solution.summaries[0])
+
+def test_batches_and_waves_use_the_preferred_configuration(memory_backend, monkeypatch):
+    stats = PortfolioStats()
+    for num_nodes in range(13, 60):
+        for _ in range(MIN_RACES):
+            stats.record(num_nodes, [PORTFOLIO[0]], PORTFOLIO[5])
+    monkeypatch.setattr(logic.portfolio, '_stats', stats)
+
+    jobs = list()
+    class RecordingExecutor:
+        def solve_many(self, solve_jobs: list[dict]) -> list:
+            jobs.extend(solve_jobs)
+            return [run_solver(**job) for job in solve_jobs]
+    monkeypatch.setattr(services.picking_service, 'get_solver_executor', lambda workers: RecordingExecutor())
+
+    picking_service = PickingService(is_testing=True, backend=memory_backend)
+    orders = {
+        'A': {f'Product_{i}': 1 for i in range(1, 16)},
+        'B': {f'Product_{i}': 1 for i in range(20, 36)}
+    }
+    picking_service.optimize_batch(list(orders.values()), [{'latency_target': 0.1}] * 2, debug=False)
+    picking_service.optimize_wave(orders, max_orders=1, latency_target=0.1, debug=False)
+
+    assert len(jobs) == 4
+    assert all(
+        (job['solver_params']['budget'].first_solution_strategy, job['solver_params']['budget'].local_search_metaheuristic)
+        == PORTFOLIO[5]
+        for job in jobs
+    )
@@ -0,0 +1,42 @@
+import pytest
+from logic.reoptimization import update_tour
+from logic.warehouse_operations import assert_route, merge_product_lists
+from services.picking_service import PickingService
+
+def test_added_and_removed_lines_update_the_route(memory_backend):
+    backend = memory_backend
+    picking_service = PickingService(is_testing=True, backend=backend)
+    product_list = {'Product_1': 12, 'Product_3': 4, 'Product_7': 2, 'Product_9': 3}
+
+    summary = picking_service.optimize(product_list, latency_target=0.1, debug=False).summaries[0]
+    position, remaining = summary[0]['storage_id'], summary[1:]
+    picked = {summary[0]['product_id']: summary[0]['take']}
+
+    removed = {remaining[-1]['product_id']: 1}
+    added = {'Product_2': 5, 'Product_1': 3}
+    solution = picking_service.reoptimize(remaining, position, added=added, removed=removed, debug=False)
+
+    expected = merge_product_lists([
+        product_list, added, {p: -q for p, q in picked.items()}, {p: -q for p, q in removed.items()}
+    ])
+    assert_route({p: q for p, q in expected.items() if q > 0}, solution.summaries[0])
+
+    path = solution.paths[0]
+    assert path[0]['from_location'] == position and path[-1]['to_location'] == 'dest1'
+    assert set(solution.performance_metrics) == {'fetch', 'tour_update', 'path_finding'}
+
+def test_added_stock_is_not_promised_twice(memory_backend):
+    backend = memory_backend
+    layout, inventory = backend.snapshots()
+    offer = inventory.offer['Product_5']
+    lines = inventory.allocate('start', {'Product_5': offer - 2})
+
+    tour, node_to_index, updated = update_tour(layout, inventory, lines, 'start', 'dest1', added={'Product_5': 2})
+    assert sum(line['take'] for line in updated) == offer
+    assert all(line['take'] <= line['quantity'] for line in updated)
+    assert tour[0] == node_to_index['start'] and tour[-1] == node_to_index['dest1']
+
+    with pytest.raises(AssertionError, match='Insufficient'):
+        update_tour(layout, inventory, lines, 'start', 'dest1', added={'Product_5': 3})
+    with pytest.raises(AssertionError, match='Cannot remove'):
+        update_tour(layout, inventory, lines, 'start', 'dest1', removed={'Product_5': offer})
@@ -0,0 +1,56 @@
+from logic.result_cache import ResultCache, picking_key
+from services.picking_service import PickingService
+
+def test_cache_evicts_least_recently_used_and_expired_entries():
+    cache = ResultCache(max_size=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+
+    expiring = ResultCache(max_size=2, ttl=-1)
+    expiring.put('a', 1)
+    assert expiring.get('a') is None and len(expiring) == 0
+
+    disabled = ResultCache(max_size=0)
+    disabled.put('a', 1)
+    assert disabled.get('a') is None
+
+def test_key_ignores_line_order_and_empty_lines():
+    config = {'start_id': 'start', 'solver_params': {'latency_target': 0.1}}
+    key = picking_key({'P1': 2, 'P2': 1}, config, 'layout', 0)
+
+    assert picking_key({'P2': 1, 'P1': 2, 'P3': 0}, dict(reversed(config.items())), 'layout', 0) == key
+    assert picking_key({'P1': 2, 'P2': 1}, config, 'layout', 1) != key
+    assert picking_key({'P1': 3, 'P2': 1}, config, 'layout', 0) != key
+
+def test_stock_changes_invalidate_cached_solutions(memory_backend):
+    backend = memory_backend
+    picking_service = PickingService(is_testing=False, backend=backend)
+    product_list = {'Product_1': 12, 'Product_3': 4}
+
+    first = picking_service.optimize(product_list, latency_target=0.1)
+    assert picking_service.optimize(dict(reversed(product_list.items())), latency_target=0.1) is first
+    assert picking_service.optimize(product_list, latency_target=0.2) is not first
+
+    picking_list = [
+        {'from_location': line['storage_id'], 'gwin': line['product_id'], 'quantity': line['take']}
+        for summary in first.summaries for line in summary
+    ]
+    backend.reserve_products(picking_list)
+
+    second = picking_service.optimize(product_list, latency_target=0.1)
+    assert second is not first
+    taken = {line['storage_id'] for summary in first.summaries for line in summary if line['take'] == line['quantity']}
+    assert not taken & {line['storage_id'] for summary in second.summaries for line in summary}
+
+def test_reloaded_inventory_gets_a_new_generation(memory_backend):
+    _, inventory = memory_backend.snapshots()
+    assert memory_backend.snapshots()[1].generation == inventory.generation
+
+    storage_id = next(iter(memory_backend.contains))
+    memory_backend.add_product_to_location(storage_id, 'Product_1', 1)
+    assert memory_backend.snapshots()[1].generation != inventory.generation
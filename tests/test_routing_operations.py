@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+from time import time
+from logic.routing_operations import ACO, TSPSolver, get_distance_matrix, slice_distance_matrix
+from logic.solver_budget import plan_budget
+from services.picking_service import PickingService
+from test_aisle_heuristics import build_warehouse
+
+def random_distance_matrix(n: int, seed: int = 0) -> np.ndarray:
+    points = np.random.default_rng(seed).random((n, 2)) * 100
+    return np.abs(points[:, None, :] - points[None, :, :]).sum(axis=-1)
+
+def tour_cost(distance_matrix: np.ndarray, tour: list[int]) -> float:
+    return sum(distance_matrix[a, b] for a, b in zip(tour, tour[1:]))
+
+def test_aco_builds_open_tour_visiting_every_stop():
+    distance_matrix = random_distance_matrix(30)
+    tour, = ACO(distance_matrix, start_index=3, dest_index=7, max_iter=10, seed=1)()
+
+    assert tour.tour[0] == 3 and tour.tour[-1] == 7
+    assert sorted(tour.tour) == list(range(30))
+    assert np.isclose(tour.optimal_value, tour_cost(distance_matrix, tour.tour))
+
+def test_aco_beats_a_random_tour():
+    distance_matrix = random_distance_matrix(40)
+    tour, = ACO(distance_matrix, start_index=0, dest_index=1, max_iter=20, seed=1)()
+
+    rng = np.random.default_rng(2)
+    random_costs = [
+        tour_cost(distance_matrix, [0, *rng.permutation(np.arange(2, 40)), 1])
+        for _ in range(20)
+    ]
+    assert tour.optimal_value < min(random_costs)
+
+def test_aco_splits_routes_between_vehicles():
+    distance_matrix = random_distance_matrix(20)
+    tours = ACO(distance_matrix, start_index=0, dest_index=0, num_vehicles=3, max_iter=5, seed=1)()
+
+    assert len(tours) == 3
+    assert all(tour.tour[0] == 0 and tour.tour[-1] == 0 for tour in tours)
+    assert sorted(x for tour in tours for x in tour.tour[1:-1]) == list(range(1, 20))
+
+def test_small_orders_skip_guided_local_search():
+    budget = plan_budget(num_nodes=8)
+
+    assert budget.local_search_metaheuristic == 'GREEDY_DESCENT'
+    assert plan_budget(num_nodes=200).local_search_metaheuristic == 'GUIDED_LOCAL_SEARCH'
+    assert plan_budget(num_nodes=200).time_limit > plan_budget(num_nodes=50).time_limit
+
+def test_latency_target_caps_time_limit():
+    budget = plan_budget(num_nodes=500, num_vehicles=2, latency_target=0.3)
+
+    assert budget.time_limit == 0.3
+    assert budget.plateau_time <= 0.3
+
+def test_tsp_solver_small_order_returns_fast():
+    distance_matrix = random_distance_matrix(8)
+
+    started = time()
+    tour, = TSPSolver(distance_matrix, start_index=0, dest_index=1)()
+
+    assert time() - started < 1
+    assert tour.tour[0] == 0 and tour.tour[-1] == 1
+    assert sorted(tour.tour) == list(range(8))
+    assert tour.optimal_value == tour_cost(distance_matrix.astype(int), tour.tour)
+
+def test_slice_distance_matrix_matches_direct_matrix():
+    layout = build_warehouse()
+    orders = [
+        [{'storage_id': 'S1.1.1.1'}, {'storage_id': 'S2.2.5.-1'}],
+        [{'storage_id': 'S4.1.3.1'}, {'storage_id': 'S1.1.1.1'}, {'storage_id': 'S3.2.8.1'}],
+    ]
+    union_matrix, union_index = get_distance_matrix(
+        None, [location for locations in orders for location in locations], layout=layout
+    )
+
+    for locations in orders:
+        sliced, sliced_index = slice_distance_matrix(union_matrix, union_index, locations)
+        direct, direct_index = get_distance_matrix(None, locations, layout=layout)
+
+        for a, i in sliced_index.items():
+            for b, j in sliced_index.items():
+                assert sliced[i][j] == direct[direct_index[a]][direct_index[b]]
+
+def test_makespan_objective_shortens_the_longest_route():
+    layout = build_warehouse(3, 8, 20)
+    storages = [id_ for id_ in layout.node_to_index if id_.startswith('S')]
+    by_distance = np.argsort(layout.distance_block(['start'], storages)[0])
+
+    # Many stops close to the start and a few far away, so equal stop counts are unequal walks
+    rng = np.random.default_rng(0)
+    picks = [*rng.choice(by_distance[:100], 40, replace=False), *rng.choice(by_distance[-60:], 8, replace=False)]
+    distance_matrix = layout.distance_submatrix(['start', 'dest1', *[storages[i] for i in picks]])
+
+    distance = TSPSolver(distance_matrix, 0, 1, 3)()
+    makespan = TSPSolver(distance_matrix, 0, 1, 3, objective='makespan')()
+
+    assert sorted(stop for tour in makespan for stop in tour.tour[1:-1]) == list(range(2, 50))
+    assert max(tour_cost(distance_matrix, tour.tour) for tour in makespan) < max(
+        tour_cost(distance_matrix, tour.tour) for tour in distance
+    )
+
+def test_wave_routes_can_be_balanced_by_makespan(memory_backend):
+    picking_service = PickingService(is_testing=True, backend=memory_backend)
+    orders = {'order_1': {'Product_1': 12, 'Product_3': 4}, 'order_2': {'Product_7': 2, 'Product_9': 3}}
+
+    wave = picking_service.optimize_wave(orders, num_routes=2, latency_target=0.2, objective='makespan', debug=False)
+    assert {order_id for batch in wave.batches for order_id in batch.order_ids} == set(orders)
+
+    with pytest.raises(AssertionError, match='cannot minimize'):
+        picking_service.optimize(orders['order_1'], solver='aco', objective='makespan')
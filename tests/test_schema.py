@@ -0,0 +1,27 @@
+import pytest
+from graph_db.schema import HOT_QUERIES, SchemaError, check_plans, plan_operators, plan_violations
+
+def plan(operator: str, *children: dict) -> dict:
+    return {'operatorType': f'{operator}@neo4j', 'children': list(children)}
+
+def test_plan_violations_walk_the_whole_plan():
+    seek = plan('ProduceResults', plan('Projection', plan('NodeUniqueIndexSeek')))
+    scan = plan('ProduceResults', plan('Apply', plan('NodeIndexSeek'), plan('CartesianProduct', plan('AllNodesScan'), plan('Argument'))))
+
+    assert plan_operators(seek) == ['ProduceResults', 'Projection', 'NodeUniqueIndexSeek']
+    assert plan_violations(seek) == []
+    assert plan_violations(scan) == ['AllNodesScan', 'CartesianProduct']
+
+def test_hot_queries_only_match_labelled_nodes():
+    for name, (query, _) in HOT_QUERIES.items():
+        assert 'MATCH (from)\n' not in query and 'MATCH (from), (to)' not in query, name
+        assert 'MATCH (n)\n' not in query, name
+
+def test_unbacked_plans_raise_schema_error():
+    seek = plan('ProduceResults', plan('NodeUniqueIndexSeek'))
+    scan = plan('ProduceResults', plan('Filter', plan('AllNodesScan')))
+
+    check_plans({'seek': seek})
+    with pytest.raises(SchemaError, match='not backed by indexes') as error:
+        check_plans({'seek': seek, 'scan': scan})
+    assert error.value.violations == {'scan': ['AllNodesScan']}
@@ -0,0 +1,22 @@
+from logic.routing_operations import solver_job, solve_routes
+from logic.solver_executor import SolverExecutor
+from test_aisle_heuristics import build_warehouse, pick_order
+
+def test_process_pool_matches_inline_solves():
+    layout = build_warehouse()
+    problems = [pick_order(layout, 12, seed=seed) for seed in range(3)]
+    jobs = [
+        solver_job('s_shape', distance_matrix, node_to_index, 'start', 'dest1', 1, {}, layout)
+        for distance_matrix, node_to_index in problems
+    ]
+
+    executor = SolverExecutor(max_workers=2)
+    try:
+        pooled = executor.solve_many(jobs)
+    finally:
+        executor.shutdown()
+
+    for (distance_matrix, node_to_index), tours in zip(problems, pooled):
+        inline, = solve_routes('s_shape', distance_matrix, node_to_index, 'start', 'dest1', 1, {}, layout)
+        assert [tour.tour for tour in tours] == [inline.tour]
+        assert abs(tours[0].optimal_value - inline.optimal_value) < 1e-3
@@ -0,0 +1,18 @@
+import numpy as np
+from benchmarks.solver_frontier import build_corpus, solver_configs, run_frontier, cost_at
+
+def test_frontier_curves_are_anytime_and_reach_the_best_tour():
+    corpus = build_corpus(stop_counts=(4, 12), per_size=1, n_locations=300)
+    configs = [config for config in solver_configs(0.2) if 'SAVINGS' not in config.name and 'TABU' not in config.name]
+    report = run_frontier(corpus, configs, checkpoints=(0.01, 0.2))
+
+    for problem in corpus:
+        for run in report['runs'][problem.name].values():
+            curve = [cost_at(run['trace'], seconds) for seconds in (0.01, 0.05, 0.1, 0.2, np.inf)]
+            assert curve == sorted(curve, reverse=True)
+            assert curve[-1] <= run['cost'] + 1e-9
+
+    for bucket in report['buckets'].values():
+        gaps = [point['gap'] for point in bucket['frontier']]
+        assert gaps == sorted(gaps, reverse=True) and gaps[-1] >= 0
+        assert bucket['recommended'] is not None
@@ -0,0 +1,51 @@
+import numpy as np
+from data.synthetic import generate_warehouse, zipf_popularity
+
+def test_generator_is_deterministic():
+    a, b = generate_warehouse(300, seed=7), generate_warehouse(300, seed=7)
+
+    assert a.layout.fingerprint == b.layout.fingerprint
+    assert a.stock == b.stock
+    assert list(a.orders(20)) == list(b.orders(20))
+    assert generate_warehouse(300, seed=8).stock != a.stock
+
+def test_sizes_cover_the_requested_locations():
+    for n in (100, 1000, 5000):
+        warehouse = generate_warehouse(n)
+        n_storages = len(warehouse.layout.graph.by_label('Storage'))
+
+        assert n <= n_storages < 1.5 * n
+        assert len(warehouse.stock) == n_storages
+
+def test_popular_products_are_stocked_and_slotted_close():
+    warehouse = generate_warehouse(2000, slotting=1.0)
+    inventory = warehouse.inventory_index()
+    locations = {product_id: len(product['storage_ids']) for product_id, product in inventory.products.items()}
+
+    assert locations['Product_1'] > locations['Product_100'] >= 1
+
+    coordinates = dict(zip(
+        [node['properties']['id'] for node in warehouse.layout.graph.nodes], warehouse.layout.coordinates
+    ))
+    def mean_distance(product_id):
+        return np.mean([
+            np.abs(coordinates[storage_id] - coordinates['start']).sum()
+            for storage_id in inventory.products[product_id]['storage_ids']
+        ])
+    assert mean_distance('Product_1') < mean_distance(f'Product_{len(warehouse.products)}')
+
+def test_orders_follow_popularity_and_are_in_stock():
+    warehouse = generate_warehouse(1000)
+    inventory = warehouse.inventory_index()
+    orders = list(warehouse.orders(500, mean_lines=5))
+
+    counts = dict()
+    for order in orders:
+        assert all(inventory.offer[product_id] >= quantity for product_id, quantity in order.product_list.items())
+        for product_id in order.product_list:
+            counts[product_id] = counts.get(product_id, 0) + 1
+
+    assert np.mean([len(order.product_list) for order in orders]) > 3
+    assert counts['Product_1'] > counts.get('Product_50', 0)
+    assert all(a.arrival < b.arrival for a, b in zip(orders, orders[1:]))
+    assert np.isclose(zipf_popularity(10).sum(), 1)
@@ -0,0 +1,45 @@
+import numpy as np
+from logic.warehouse_operations import split_allocation, merge_product_lists
+from logic.wave_planning import plan_waves
+from test_aisle_heuristics import build_warehouse
+
+def test_split_allocation_never_assigns_stock_twice():
+    orders = {'o1': {'P1': 30, 'P2': 5}, 'o2': {'P1': 50}}
+    storage_locations = [
+        {'product_id': 'P1', 'quantity': 40, 'storage_id': 'S1', 'take': 40},
+        {'product_id': 'P1', 'quantity': 100, 'storage_id': 'S2', 'take': 40},
+        {'product_id': 'P2', 'quantity': 10, 'storage_id': 'S3', 'take': 5},
+    ]
+    order_locations = split_allocation(storage_locations, orders)
+
+    assert merge_product_lists(list(orders.values())) == {'P1': 80, 'P2': 5}
+    assert [(x['storage_id'], x['take']) for x in order_locations['o1']] == [('S1', 30), ('S3', 5)]
+    assert [(x['storage_id'], x['take']) for x in order_locations['o2']] == [('S1', 10), ('S2', 40)]
+    assert all(x['order_id'] == 'o2' for x in order_locations['o2'])
+
+def test_plan_waves_batches_every_order_within_capacity():
+    layout = build_warehouse(n_blocks=2, n_aisles=6)
+    storages = [id_ for id_ in layout.node_to_index if id_.startswith('S')]
+    rng = np.random.default_rng(0)
+    order_stops = {
+        f'order_{i}': rng.choice(storages, size=rng.integers(1, 6), replace=False).tolist()
+        for i in range(60)
+    }
+
+    batches = plan_waves(order_stops, layout, 'start', 'dest1', max_orders=8)
+
+    assert sorted(order_id for batch in batches for order_id in batch) == sorted(order_stops)
+    assert all(len(batch) <= 8 for batch in batches)
+    assert len(batches) < len(order_stops)
+
+def test_plan_waves_groups_orders_sharing_locations():
+    layout = build_warehouse()
+    order_stops = {
+        'a': ['S1.1.1.1', 'S1.1.2.1'],
+        'b': ['S4.2.9.-1', 'S4.2.10.1'],
+        'c': ['S1.1.2.1', 'S1.1.3.-1'],
+        'd': ['S4.2.9.-1'],
+    }
+
+    batches = plan_waves(order_stops, layout, 'start', 'dest1', max_orders=2)
+    assert sorted(map(sorted, batches)) == [['a', 'c'], ['b', 'd']]